@@ -2,7 +2,7 @@
 
 import json
 import hashlib
-from typing import Optional, Any, Callable
+from typing import Optional, Any, Callable, Dict, List
 from functools import wraps
 import redis.asyncio as redis
 
@@ -134,6 +134,55 @@ class CacheManager:
             print(f"Cache set error for key {key}: {e}")
             return False
     
+    @classmethod
+    async def get_many(cls, keys: List[str]) -> List[Optional[Any]]:
+        """
+        Get several values in one round trip (MGET)
+        
+        Args:
+            keys: Cache keys
+        
+        Returns:
+            Cached values aligned with keys, None where not found
+        """
+        if not cls.is_enabled() or not keys:
+            return [None] * len(keys)
+        
+        try:
+            values = await cls._redis_client.mget(keys)
+            return [json.loads(value) if value else None for value in values]
+        except Exception as e:
+            print(f"Cache get_many error for {len(keys)} keys: {e}")
+            return [None] * len(keys)
+    
+    @classmethod
+    async def set_many(cls, items: Dict[str, Any], ttl: Optional[int] = None) -> bool:
+        """
+        Set several values in one round trip (pipelined SETEX)
+        
+        Args:
+            items: Values to cache by key (must be JSON serializable)
+            ttl: Time to live in seconds (default: from settings)
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        if not cls.is_enabled() or not items:
+            return False
+        
+        try:
+            ttl = ttl or settings.REDIS_TTL
+            async with cls._redis_client.pipeline(transaction=False) as pipe:
+                for key, value in items.items():
+                    if hasattr(value, 'model_dump'):
+                        value = value.model_dump(mode='json')
+                    pipe.setex(key, ttl, json.dumps(value, default=str))
+                await pipe.execute()
+            return True
+        except Exception as e:
+            print(f"Cache set_many error for {len(items)} keys: {e}")
+            return False
+    
     @classmethod
     async def delete(cls, key: str) -> bool:
         """
@@ -255,3 +304,13 @@ async def invalidate_cache(prefix: str):
     pattern = f"{prefix}:*"
     deleted = await CacheManager.delete_pattern(pattern)
     print(f"Invalidated {deleted} cache entries with prefix '{prefix}'")
+
+
+# Prefixes of every cached response derived from suitability scores
+SCORE_CACHE_PREFIXES = ("sites_list", "site_detail", "statistics", "export_data", "what_if")
+
+
+async def invalidate_score_caches():
+    """Invalidate all cached data derived from scores"""
+    for prefix in SCORE_CACHE_PREFIXES:
+        await invalidate_cache(prefix)
@@ -28,6 +28,27 @@ class Settings(BaseSettings):
     DB_MAX_OVERFLOW: int = 20
     DB_POOL_RECYCLE: int = 3600
     
+    # Analysis Configuration
+    ANALYSIS_BATCH_SIZE: int = 5000  # Rows per bulk INSERT when writing scores
+    ANALYSIS_MAX_QUEUED_JOBS: int = 20  # Pending jobs before /analyze returns 503
+    ANALYSIS_JOB_HISTORY: int = 100  # Finished jobs kept for status polling
+    WHAT_IF_PROFILE_CHUNK: int = 16  # Profiles scored per matrix product
+    STATISTICS_BAND_STEP: int = 10  # Score band grid snapshotted per run (0: unfiltered only)
+    STATISTICS_MAX_CONNECTIONS: int = 4  # Pooled connections one request may query on concurrently
+    
+    # Map Clustering and Tile Configuration
+    CLUSTER_MAX_ZOOM: int = 14  # Zoom from which /sites/clusters returns individual sites
+    CLUSTER_MAX_SITES: int = 500  # Individual sites returned per viewport at high zoom
+    TILE_MAX_FEATURES: int = 10000  # Best sites encoded per vector tile
+    TILE_CACHE_TTL: int = 86400  # Vector tiles are keyed by run, so they can live long
+    
+    # Analysis History Retention (0 disables a limit)
+    RETENTION_KEEP_RUNS: int = 20  # Completed runs to keep besides the active one
+    RETENTION_KEEP_DAYS: int = 30  # Drop completed runs older than this many days
+    RETENTION_BATCH_SIZE: int = 5000  # Result rows deleted per transaction
+    RETENTION_STALE_RUN_HOURS: int = 24  # Runs still 'running' after this are failed and reclaimed
+    RETENTION_INTERVAL_SECONDS: int = 3600  # Scheduled compaction interval
+    
     # Redis Configuration
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
@@ -2,8 +2,11 @@
 
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.sql.elements import TextClause
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import time
 
 from app.config import get_settings
 
@@ -53,6 +56,40 @@ async def get_db_context():
             await session.close()
 
 
+async def gather_queries(
+    queries: Sequence[Tuple[str, TextClause, Dict[str, Any]]],
+    max_connections: Optional[int] = None
+) -> List[List[Any]]:
+    """
+    Run independent read queries concurrently, each on its own pooled
+    connection, and return the fetched rows of each in order.
+    
+    Args:
+        queries: (name, query, params) triples; names label debug timings
+        max_connections: Connections the queries may hold at once
+            (default: STATISTICS_MAX_CONNECTIONS)
+    
+    Every query runs in its own transaction, so the results are not guaranteed
+    to come from one snapshot.
+    """
+    semaphore = asyncio.Semaphore(max_connections or settings.STATISTICS_MAX_CONNECTIONS)
+    
+    async def run(name: str, query: TextClause, params: Dict[str, Any]) -> List[Any]:
+        async with semaphore:
+            started = time.perf_counter()
+            async with get_db_context() as session:
+                result = await session.execute(query, params)
+                rows = result.fetchall()
+            if settings.DEBUG:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                print(f"Query '{name}' took {elapsed_ms:.1f} ms ({len(rows)} rows)")
+            return rows
+    
+    return list(await asyncio.gather(*(
+        run(name, query, params) for name, query, params in queries
+    )))
+
+
 async def init_db():
     """Initialize database tables"""
     async with engine.begin() as conn:
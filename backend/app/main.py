@@ -2,12 +2,17 @@
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
+import asyncio
 
 from app.config import get_settings
-from app.database import close_db
+from app.database import close_db, get_db_context
 from app.cache import CacheManager
-from app.routers import sites_router, analysis_router, export_router
+from app.metrics import MetricsRegistry
+from app.services.retention_service import RetentionService
+from app.services.job_service import AnalysisJobManager
+from app.services.site_locator import SiteLocator
+from app.routers import sites_router, analysis_router, export_router, tiles_router
 
 settings = get_settings()
 
@@ -27,10 +32,31 @@ async def lifespan(app: FastAPI):
     else:
         print("Redis caching is disabled")
     
+    # Build the nearest-site index; it is rebuilt on demand after data loads
+    try:
+        async with get_db_context() as db:
+            await SiteLocator.ensure_current(db)
+    except Exception as e:
+        print(f"Site locator not built at startup: {str(e)}")
+    
+    # Start background recalculation workers
+    await AnalysisJobManager.start()
+    
+    # Schedule analysis history compaction
+    retention_task = None
+    if settings.RETENTION_INTERVAL_SECONDS > 0:
+        retention_task = asyncio.create_task(RetentionService.run_periodically())
+        print(f"Retention compaction scheduled every {settings.RETENTION_INTERVAL_SECONDS}s")
+    
     yield
     
     # Shutdown
     print("Shutting down Solar Site Analyzer API...")
+    await AnalysisJobManager.stop()
+    if retention_task:
+        retention_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await retention_task
     await close_db()
     await CacheManager.close_redis()
 
@@ -78,6 +104,7 @@ app.add_middleware(
 app.include_router(sites_router, prefix=settings.API_V1_PREFIX)
 app.include_router(analysis_router, prefix=settings.API_V1_PREFIX)
 app.include_router(export_router, prefix=settings.API_V1_PREFIX)
+app.include_router(tiles_router, prefix=settings.API_V1_PREFIX)
 
 
 @app.get("/", tags=["Root"])
@@ -106,6 +133,14 @@ async def health_check():
     }
 
 
+@app.get("/metrics", tags=["Health"])
+async def metrics():
+    """
+    Process-local application metrics
+    """
+    return MetricsRegistry.snapshot()
+
+
 if __name__ == "__main__":
     import uvicorn
     
@@ -0,0 +1,56 @@
+"""In-process metrics registry for the application"""
+
+import time
+from typing import Any, Dict
+
+
+class MetricsRegistry:
+    """Process-local counters, gauges and last-event records"""
+    
+    _counters: Dict[str, float] = {}
+    _gauges: Dict[str, float] = {}
+    _events: Dict[str, Dict[str, Any]] = {}
+    _started_at: float = time.time()
+    
+    @classmethod
+    def increment(cls, name: str, value: float = 1) -> None:
+        """
+        Increase a monotonically growing counter
+        
+        Args:
+            name: Counter name (e.g., 'retention_rows_deleted_total')
+            value: Amount to add
+        """
+        cls._counters[name] = cls._counters.get(name, 0) + value
+    
+    @classmethod
+    def set_gauge(cls, name: str, value: float) -> None:
+        """
+        Set a gauge to its current value
+        
+        Args:
+            name: Gauge name
+            value: Current value
+        """
+        cls._gauges[name] = value
+    
+    @classmethod
+    def record_event(cls, name: str, **details: Any) -> None:
+        """
+        Remember the details of the most recent occurrence of an event
+        
+        Args:
+            name: Event name (e.g., 'retention_compaction')
+            **details: JSON serializable details of the event
+        """
+        cls._events[name] = {"recorded_at": time.time(), **details}
+    
+    @classmethod
+    def snapshot(cls) -> Dict[str, Any]:
+        """Get a JSON serializable copy of all metrics"""
+        return {
+            "uptime_seconds": round(time.time() - cls._started_at, 3),
+            "counters": dict(cls._counters),
+            "gauges": dict(cls._gauges),
+            "events": {name: dict(details) for name, details in cls._events.items()},
+        }
@@ -5,10 +5,21 @@ from app.models.schemas import (
     SiteResponse,
     SiteDetailResponse,
     SiteListResponse,
+    SiteBatchRequest,
+    SiteBatchResponse,
+    TopSitesResponse,
+    NearestSitesResponse,
+    ClusterResponse,
     AnalysisWeights,
     AnalysisRequest,
     AnalysisResponse,
+    AnalysisJobResponse,
+    WhatIfRequest,
+    WhatIfResponse,
+    CompactionResult,
     StatisticsResponse,
+    PercentilesResponse,
+    CubeResponse,
     ScoreDistribution,
     RegionalStats,
 )
@@ -18,10 +29,21 @@ __all__ = [
     "SiteResponse",
     "SiteDetailResponse",
     "SiteListResponse",
+    "SiteBatchRequest",
+    "SiteBatchResponse",
+    "TopSitesResponse",
+    "NearestSitesResponse",
+    "ClusterResponse",
     "AnalysisWeights",
     "AnalysisRequest",
     "AnalysisResponse",
+    "AnalysisJobResponse",
+    "WhatIfRequest",
+    "WhatIfResponse",
+    "CompactionResult",
     "StatisticsResponse",
+    "PercentilesResponse",
+    "CubeResponse",
     "ScoreDistribution",
     "RegionalStats",
 ]
@@ -1,9 +1,11 @@
 """Pydantic schemas for request/response validation"""
 
 from pydantic import BaseModel, Field, field_validator
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Literal
 from datetime import datetime
 from decimal import Decimal
+import hashlib
+import json
 
 
 class SiteBase(BaseModel):
@@ -40,8 +42,9 @@ class SiteResponse(BaseModel):
     region: str
     land_type: str
     total_suitability_score: Optional[float] = None
+    rank: Optional[int] = Field(default=None, description="Dense rank by score in the active run, 1 = best")
     analysis_timestamp: Optional[datetime] = None
-
+    
     class Config:
         from_attributes = True
 
@@ -54,6 +57,8 @@ class SiteDetailResponse(SiteBase):
     slope_score: Optional[float] = None
     infrastructure_score: Optional[float] = None
     total_suitability_score: Optional[float] = None
+    rank: Optional[int] = Field(default=None, description="Dense rank by score in the active run, 1 = best")
+    ranked_sites: Optional[int] = Field(default=None, description="Number of sites ranked in the active run")
     analysis_timestamp: Optional[datetime] = None
     
     class Config:
@@ -62,12 +67,24 @@ class SiteDetailResponse(SiteBase):
 
 class SiteListResponse(BaseModel):
     """Paginated list of sites"""
-    total: int
+    total: Optional[int] = None
     limit: int
     offset: int
+    next_cursor: Optional[str] = Field(default=None, description="Cursor of the next page, null on the last page")
     sites: List[SiteResponse]
 
 
+class SiteBatchRequest(BaseModel):
+    """Site ids to fetch details for in one request"""
+    site_ids: List[int] = Field(..., min_length=1, max_length=100, description="Site ids, at most 100")
+
+
+class SiteBatchResponse(BaseModel):
+    """Details of several sites"""
+    sites: List[SiteDetailResponse] = Field(..., description="Found sites in request order, duplicates removed")
+    missing: List[int] = Field(default_factory=list, description="Requested ids that do not exist")
+
+
 class AnalysisWeights(BaseModel):
     """Weights for suitability calculation"""
     solar: float = Field(default=0.35, ge=0, le=1, description="Solar irradiance weight")
@@ -88,6 +105,14 @@ class AnalysisWeights(BaseModel):
         """Check if weights sum to approximately 1.0"""
         total = self.solar + self.area + self.grid_distance + self.slope + self.infrastructure
         return abs(total - 1.0) < 0.01
+    
+    def fingerprint(self) -> str:
+        """Canonical hash identifying this weight profile"""
+        canonical = json.dumps(
+            {name: round(value, 6) for name, value in self.model_dump().items()},
+            sort_keys=True
+        )
+        return hashlib.sha256(canonical.encode()).hexdigest()
 
 
 class AnalysisRequest(BaseModel):
@@ -103,6 +128,21 @@ class AnalysisRequest(BaseModel):
         return v
 
 
+class WhatIfRequest(BaseModel):
+    """Request for scoring several weight profiles without persisting results"""
+    profiles: List[AnalysisWeights] = Field(..., min_length=1, max_length=50)
+    top_k: int = Field(default=10, ge=1, le=100, description="Top sites returned per profile")
+    
+    @field_validator('profiles')
+    @classmethod
+    def validate_profiles_sum(cls, v: List[AnalysisWeights]) -> List[AnalysisWeights]:
+        """Ensure every profile's weights sum to 1.0"""
+        for index, weights in enumerate(v):
+            if not weights.validate_sum():
+                raise ValueError(f"Weights of profile {index} must sum to approximately 1.0")
+        return v
+
+
 class AnalysisResponse(BaseModel):
     """Response after analysis recalculation"""
     success: bool
@@ -110,6 +150,137 @@ class AnalysisResponse(BaseModel):
     sites_analyzed: int
     weights_used: AnalysisWeights
     timestamp: datetime
+    run_id: Optional[int] = None
+    components_refreshed: int = 0
+    reused: bool = False
+
+
+class AnalysisJobResponse(BaseModel):
+    """Status of a background recalculation job"""
+    job_id: str
+    status: Literal["queued", "running", "completed", "failed"]
+    weights: AnalysisWeights
+    stage: Optional[str] = None
+    progress: float = 0.0
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    duration_seconds: Optional[float] = None
+    sites_analyzed: Optional[int] = None
+    components_refreshed: Optional[int] = None
+    run_id: Optional[int] = None
+    reused: Optional[bool] = None
+    error: Optional[str] = None
+
+
+class CompactionResult(BaseModel):
+    """Outcome of an analysis history compaction"""
+    runs_deleted: int
+    rows_deleted: int
+    run_ids: List[int]
+    duration_seconds: float
+    timestamp: datetime
+
+
+class TopSitesResponse(BaseModel):
+    """Best sites for a weight vector"""
+    k: int
+    weights: AnalysisWeights
+    total_sites: int
+    sites_examined: int
+    sites: List[SiteResponse]
+
+
+class NearbySiteResponse(SiteResponse):
+    """Site with its great-circle distance from a reference site"""
+    distance_km: float
+
+
+class NearestSitesResponse(BaseModel):
+    """Sites closest to a reference site"""
+    site_id: int
+    k: int
+    sites: List[NearbySiteResponse]
+
+
+class SiteCluster(BaseModel):
+    """Sites aggregated into one map cluster"""
+    latitude: float = Field(..., description="Centroid latitude")
+    longitude: float = Field(..., description="Centroid longitude")
+    site_count: int
+    scored_count: int = Field(..., description="Sites in the cluster with a score")
+    avg_score: Optional[float] = None
+    max_score: Optional[float] = None
+
+
+class ClusterResponse(BaseModel):
+    """Map clusters, or individual sites at high zoom, inside a bounding box"""
+    zoom: int
+    bbox: List[float]
+    clusters: List[SiteCluster]
+    sites: List[SiteResponse] = Field(
+        default_factory=list,
+        description="Individual sites, only from CLUSTER_MAX_ZOOM on"
+    )
+    truncated: bool = Field(
+        default=False,
+        description="More individual sites exist than were returned"
+    )
+
+
+class WhatIfProfileResult(BaseModel):
+    """Summary of all sites scored against one weight profile"""
+    weights: AnalysisWeights
+    average_score: float
+    median_score: float
+    min_score: float
+    max_score: float
+    std_deviation: float
+    top_sites: List[SiteResponse]
+
+
+class WhatIfResponse(BaseModel):
+    """Results of a what-if comparison of weight profiles"""
+    sites_scored: int
+    profiles: List[WhatIfProfileResult]
+
+
+class PercentileValue(BaseModel):
+    """Score at one quantile"""
+    quantile: float
+    score: Optional[float] = None
+
+
+class PercentilesResponse(BaseModel):
+    """Score percentiles, optionally filtered"""
+    sites_analyzed: int
+    region: Optional[str] = None
+    land_type: Optional[str] = None
+    min_score: Optional[float] = None
+    max_score: Optional[float] = None
+    percentiles: List[PercentileValue]
+
+
+class CubeCell(BaseModel):
+    """Aggregated scores of one roll-up group of the aggregate cube"""
+    region: Optional[str] = None
+    land_type: Optional[str] = None
+    score_bucket: Optional[int] = None
+    site_count: int
+    avg_score: float
+    min_score: float
+    max_score: float
+    std_deviation: float
+
+
+class CubeResponse(BaseModel):
+    """Roll-up of the region x land type x score bucket cube"""
+    group_by: List[str]
+    region: Optional[str] = None
+    land_type: Optional[str] = None
+    min_score: Optional[int] = None
+    max_score: Optional[int] = None
+    cells: List[CubeCell]
 
 
 class ScoreDistribution(BaseModel):
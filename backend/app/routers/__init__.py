@@ -3,5 +3,6 @@
 from app.routers.sites import router as sites_router
 from app.routers.analysis import router as analysis_router
 from app.routers.export import router as export_router
+from app.routers.tiles import router as tiles_router
 
-__all__ = ["sites_router", "analysis_router", "export_router"]
+__all__ = ["sites_router", "analysis_router", "export_router", "tiles_router"]
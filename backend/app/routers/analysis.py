@@ -6,25 +6,36 @@ from typing import Optional
 
 from app.database import get_db
 from app.services.analysis_service import AnalysisService
+from app.services.job_service import AnalysisJobManager, JobQueueFullError
 from app.services.site_service import SiteService
-from app.models.schemas import AnalysisRequest, AnalysisResponse, StatisticsResponse
-from app.cache import CacheManager, invalidate_cache
+from app.services.run_summary_service import RunSummaryService
+from app.services.aggregate_cube import AggregateCube, CUBE_DIMENSIONS
+from app.services.filters import SiteFilter
+from app.models.schemas import (
+    AnalysisRequest,
+    AnalysisJobResponse,
+    StatisticsResponse,
+    PercentilesResponse,
+    CubeResponse,
+    WhatIfRequest,
+    WhatIfResponse
+)
+from app.cache import CacheManager
+from app.routers.sites import site_filters
 
 router = APIRouter(tags=["Analysis"])
 
 
 @router.post(
     "/analyze",
-    response_model=AnalysisResponse,
+    response_model=AnalysisJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
     summary="Recalculate scores with custom weights",
-    description="Triggers recalculation of suitability scores for all sites using custom weight values"
+    description="Queues a background recalculation of suitability scores for all sites using custom weight values"
 )
-async def analyze_with_custom_weights(
-    request: AnalysisRequest,
-    db: AsyncSession = Depends(get_db)
-):
+async def analyze_with_custom_weights(request: AnalysisRequest):
     """
-    Recalculate suitability scores for all sites with custom weights.
+    Queue a recalculation of suitability scores for all sites with custom weights.
     
     **Request Body:**
     ```json
@@ -44,32 +55,113 @@ async def analyze_with_custom_weights(
     - Sum of all weights must equal approximately 1.0
     
     **Returns:**
-    - Analysis result with number of sites processed
-    - Weights used in the calculation
-    - Timestamp of the analysis
+    - The queued job; poll `GET /api/analyze/jobs/{job_id}` for its progress.
+      Jobs run one at a time in submission order, so the latest weights
+      submitted are the ones left active. If the latest job has identical
+      weights and is still queued or running, it is returned instead of
+      starting another one.
     """
     try:
-        result = await AnalysisService.recalculate_all_sites(
+        return AnalysisJobManager.submit(request.weights)
+    except JobQueueFullError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to queue analysis: {str(e)}"
+        )
+
+
+@router.get(
+    "/analyze/jobs/{job_id}",
+    response_model=AnalysisJobResponse,
+    summary="Get recalculation job status",
+    description="Returns the status, progress, duration and row counts of a recalculation job"
+)
+async def get_analysis_job(job_id: str):
+    """
+    Retrieve the status of a recalculation job.
+    
+    **Path Parameters:**
+    - **job_id**: Identifier returned by `POST /api/analyze`
+    
+    **Returns:**
+    - Job status (`queued`, `running`, `completed` or `failed`)
+    - Current stage and progress (0-1)
+    - Duration, number of sites analyzed and the resulting run id
+    """
+    job = AnalysisJobManager.get(job_id)
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Analysis job {job_id} not found"
+        )
+    
+    return job
+
+
+@router.post(
+    "/analyze/what-if",
+    response_model=WhatIfResponse,
+    summary="Compare weight profiles without saving results",
+    description=(
+        "Scores all sites against several weight profiles at once and returns "
+        "per-profile top sites and summary statistics. Nothing is persisted."
+    )
+)
+async def analyze_what_if(
+    request: WhatIfRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Score every site against a list of weight profiles in one pass.
+    
+    **Request Body:**
+    ```json
+    {
+        "profiles": [
+            {"solar": 0.35, "area": 0.25, "grid_distance": 0.2, "slope": 0.15, "infrastructure": 0.05},
+            {"solar": 0.5, "area": 0.2, "grid_distance": 0.15, "slope": 0.1, "infrastructure": 0.05}
+        ],
+        "top_k": 10
+    }
+    ```
+    
+    **Returns:**
+    - For each profile: average/median/min/max score, standard deviation
+      and the `top_k` best sites
+    
+    Unlike `POST /api/analyze`, this endpoint writes nothing and does not
+    invalidate any cache.
+    """
+    cache_key = CacheManager.generate_cache_key(
+        "what_if",
+        profiles=[weights.fingerprint() for weights in request.profiles],
+        top_k=request.top_k
+    )
+    
+    cached_result = await CacheManager.get(cache_key)
+    if cached_result:
+        return cached_result
+    
+    try:
+        result = await AnalysisService.score_profiles(
             db=db,
-            weights=request.weights
+            profiles=request.profiles,
+            top_k=request.top_k
         )
         
-        # Invalidate all cached data since scores have been recalculated
-        await invalidate_cache("sites_list")
-        await invalidate_cache("site_detail")
-        await invalidate_cache("statistics")
-        await invalidate_cache("export_data")
+        await CacheManager.set(cache_key, result)
         
         return result
-    except ValueError as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e)
-        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to perform analysis: {str(e)}"
+            detail=f"Failed to score weight profiles: {str(e)}"
         )
 
 
@@ -80,6 +172,79 @@ async def analyze_with_custom_weights(
     description="Returns comprehensive statistics across all sites including distributions and rankings"
 )
 async def get_statistics(
+    filters: SiteFilter = Depends(site_filters),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Retrieve comprehensive statistics across all sites or filtered results.
+    
+    **Query Parameters:**
+    - **min_score** / **max_score**: Suitability score range (optional)
+    - **min_area** / **max_area**, **min_slope** / **max_slope**,
+      **min_irradiance** / **max_irradiance**: Attribute ranges (optional)
+    - **region** / **land_type**: Only these regions or land types (optional, repeatable)
+    - **bbox**: Only sites inside min_lon,min_lat,max_lon,max_lat (optional)
+    - **near** / **radius_km**: Only sites within radius_km of lat,lon (optional)
+    
+    **Returns:**
+    - **Overall metrics**: Total sites, average/median/min/max scores, standard deviation
+    - **Score distribution**: Count and percentage of sites in each score range
+    - **Regional statistics**: Average, max, and min scores by region
+    - **Land type statistics**: Average and max scores by land type
+    - **Top performers**: Top 10 sites by suitability score
+    
+    The unfiltered statistics and score bands whose bounds are multiples of
+    STATISTICS_BAND_STEP are served from the snapshot stored with the active
+    run; other filters are computed on demand.
+    """
+    # Generate cache key
+    cache_key = CacheManager.generate_cache_key(
+        "statistics",
+        **filters.cache_params()
+    )
+    
+    # Try cache first
+    cached_result = await CacheManager.get(cache_key)
+    if cached_result:
+        return cached_result
+    
+    try:
+        statistics = None
+        # Snapshots only cover score bands
+        if filters.score_only():
+            statistics = await RunSummaryService.get_snapshot(
+                db=db,
+                min_score=filters.min_score,
+                max_score=filters.max_score
+            )
+        if statistics is None:
+            statistics = await SiteService.get_statistics(db=db, filters=filters)
+        
+        # Cache the result
+        await CacheManager.set(cache_key, statistics)
+        
+        return statistics
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve statistics: {str(e)}"
+        )
+
+
+@router.get(
+    "/statistics/percentiles",
+    response_model=PercentilesResponse,
+    summary="Get score percentiles",
+    description="Returns score percentiles from per-region and per-land-type quantile sketches"
+)
+async def get_percentiles(
+    q: str = Query(
+        "0.5",
+        description="Comma-separated quantiles between 0 and 1",
+        examples=["0.5,0.9,0.99"]
+    ),
+    region: Optional[str] = Query(None, description="Only include sites in this region"),
+    land_type: Optional[str] = Query(None, description="Only include sites of this land type"),
     min_score: Optional[float] = Query(
         None,
         ge=0,
@@ -95,44 +260,161 @@ async def get_statistics(
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Retrieve comprehensive statistics across all sites or filtered results.
+    Retrieve score percentiles of the active analysis run.
+    
+    A histogram sketch with one counter per 0.01 score is stored per region
+    and land type when a run completes. Matching sketches are merged, so no
+    request reads individual scores and the result is exact.
     
     **Query Parameters:**
-    - **min_score**: Minimum suitability score filter (optional)
-    - **max_score**: Maximum suitability score filter (optional)
+    - **q**: Quantiles, e.g. `0.5,0.9,0.99` (at most 100)
+    - **region** / **land_type**: Optional group filters
+    - **min_score** / **max_score**: Optional score range filter
     
     **Returns:**
-    - **Overall metrics**: Total sites, average/median/min/max scores, standard deviation
-    - **Score distribution**: Count and percentage of sites in each score range
-    - **Regional statistics**: Average, max, and min scores by region
-    - **Land type statistics**: Average and max scores by land type
-    - **Top performers**: Top 10 sites by suitability score
+    - Number of matching sites and the score at every requested quantile
+      (linear interpolation between closest ranks, null if no site matches)
     """
-    # Generate cache key
+    try:
+        quantiles = [float(value) for value in q.split(",")]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="q must be a comma-separated list of numbers"
+        )
+    
+    if not 1 <= len(quantiles) <= 100 or any(not 0 <= value <= 1 for value in quantiles):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="q must contain 1 to 100 quantiles between 0 and 1"
+        )
+    
+    if min_score is not None and max_score is not None and min_score > max_score:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="min_score cannot be greater than max_score"
+        )
+    
     cache_key = CacheManager.generate_cache_key(
         "statistics",
+        endpoint="percentiles",
+        quantiles=quantiles,
+        region=region,
+        land_type=land_type,
         min_score=min_score,
         max_score=max_score
     )
     
-    # Try cache first
     cached_result = await CacheManager.get(cache_key)
     if cached_result:
         return cached_result
     
     try:
-        statistics = await SiteService.get_statistics(
+        result = await RunSummaryService.get_percentiles(
             db=db,
+            quantiles=quantiles,
+            region=region,
+            land_type=land_type,
             min_score=min_score,
             max_score=max_score
         )
         
-        # Cache the result
-        await CacheManager.set(cache_key, statistics)
+        await CacheManager.set(cache_key, result)
         
-        return statistics
+        return result
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to retrieve statistics: {str(e)}"
+            detail=f"Failed to retrieve percentiles: {str(e)}"
+        )
+
+
+@router.get(
+    "/statistics/cube",
+    response_model=CubeResponse,
+    summary="Roll up the aggregate cube",
+    description="Returns score aggregates grouped by any combination of region, land type and score bucket"
+)
+async def get_statistics_cube(
+    group_by: str = Query(
+        "region,land_type",
+        description="Comma-separated dimensions: region, land_type, score_bucket (empty for a grand total)",
+        examples=["region", "region,land_type", "land_type,score_bucket"]
+    ),
+    region: Optional[str] = Query(None, description="Only include sites in this region"),
+    land_type: Optional[str] = Query(None, description="Only include sites of this land type"),
+    min_score: Optional[int] = Query(
+        None,
+        ge=0,
+        le=100,
+        description="Only include scores >= this whole number"
+    ),
+    max_score: Optional[int] = Query(
+        None,
+        ge=0,
+        le=100,
+        description="Only include scores < this whole number (100 includes a perfect score)"
+    ),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Roll up the (region, land_type, score_bucket) cube of the active run.
+    
+    Each cube cell holds the count, sum, sum of squares, min and max score of
+    the sites in one region and land type whose score falls in a 1-point
+    bucket. Any grouping or filter is answered by summing cells.
+    
+    **Query Parameters:**
+    - **group_by**: Dimensions to group by (default: `region,land_type`)
+    - **region** / **land_type**: Optional dimension filters
+    - **min_score** / **max_score**: Whole-number score band `[min_score, max_score)`
+    
+    **Returns:**
+    - One cell per group with site count, average, min, max and standard deviation
+    """
+    dimensions = [value.strip() for value in group_by.split(",") if value.strip()]
+    unknown = [value for value in dimensions if value not in CUBE_DIMENSIONS]
+    if unknown or len(set(dimensions)) != len(dimensions):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"group_by must be distinct values of: {', '.join(CUBE_DIMENSIONS)}"
+        )
+    
+    if min_score is not None and max_score is not None and min_score > max_score:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="min_score cannot be greater than max_score"
+        )
+    
+    cache_key = CacheManager.generate_cache_key(
+        "statistics",
+        endpoint="cube",
+        group_by=dimensions,
+        region=region,
+        land_type=land_type,
+        min_score=min_score,
+        max_score=max_score
+    )
+    
+    cached_result = await CacheManager.get(cache_key)
+    if cached_result:
+        return cached_result
+    
+    try:
+        result = await AggregateCube.rollup(
+            db=db,
+            group_by=dimensions,
+            region=region,
+            land_type=land_type,
+            min_score=min_score,
+            max_score=max_score
+        )
+        
+        await CacheManager.set(cache_key, result)
+        
+        return result
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to roll up statistics cube: {str(e)}"
         )
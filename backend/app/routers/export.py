@@ -3,13 +3,16 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.responses import StreamingResponse, JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional, Literal
+from typing import List, Literal, Optional
 import csv
 import io
 import json
 
 from app.database import get_db
 from app.services.site_service import SiteService
+from app.services.filters import SiteFilter
+from app.services.projection import FieldProjection, EXPORT_FIELDS
+from app.routers.sites import site_filters
 from app.cache import CacheManager
 
 router = APIRouter(tags=["Export"])
@@ -21,35 +24,35 @@ router = APIRouter(tags=["Export"])
     description="Exports filtered site results as CSV or JSON format"
 )
 async def export_sites(
-    format: Literal["csv", "json"] = Query(
+    format: Literal["csv", "json", "columnar"] = Query(
         "json",
-        description="Export format (csv or json)"
+        description="Export format (csv, json or columnar json)"
     ),
-    min_score: Optional[float] = Query(
+    fields: Optional[str] = Query(
         None,
-        ge=0,
-        le=100,
-        description="Minimum suitability score filter"
-    ),
-    max_score: Optional[float] = Query(
-        None,
-        ge=0,
-        le=100,
-        description="Maximum suitability score filter"
+        description=f"Comma-separated fields to export, from {','.join(EXPORT_FIELDS)}"
     ),
+    filters: SiteFilter = Depends(site_filters),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Export filtered site data in CSV or JSON format.
     
     **Query Parameters:**
-    - **format**: Output format - 'csv' or 'json' (default: json)
-    - **min_score**: Minimum suitability score filter (optional)
-    - **max_score**: Maximum suitability score filter (optional)
+    - **format**: Output format - 'csv', 'json' or 'columnar' (default: json)
+    - **fields**: Only read and export these fields (optional, default all)
+    - **min_score** / **max_score**: Suitability score range (optional)
+    - **min_area** / **max_area**, **min_slope** / **max_slope**,
+      **min_irradiance** / **max_irradiance**: Attribute ranges (optional)
+    - **region** / **land_type**: Only these regions or land types (optional, repeatable)
+    - **bbox**: Only sites inside min_lon,min_lat,max_lon,max_lat (optional)
+    - **near** / **radius_km**: Only sites within radius_km of lat,lon (optional)
     
     **Returns:**
     - CSV file download (if format=csv)
     - JSON array (if format=json)
+    - JSON object with `fields` and one array per field under `columns`
+      (if format=columnar)
     
     **Exported Fields:**
     - Site identification and location
@@ -58,11 +61,19 @@ async def export_sites(
     - Total suitability score
     - Analysis timestamp
     """
+    try:
+        selected = FieldProjection.parse(fields, EXPORT_FIELDS)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid fields: {str(e)}"
+        )
+    
     # Generate cache key for the data (not format-specific)
     cache_key = CacheManager.generate_cache_key(
         "export_data",
-        min_score=min_score,
-        max_score=max_score
+        fields=selected,
+        **filters.cache_params()
     )
     
     # Try cache first
@@ -71,21 +82,22 @@ async def export_sites(
     try:
         if cached_data is None:
             # Cache miss - fetch from database
-            sites_data = await SiteService.export_sites(
-                db=db,
-                min_score=min_score,
-                max_score=max_score
-            )
+            sites_data = await SiteService.export_sites(db=db, filters=filters, fields=selected)
             # Cache the data
             await CacheManager.set(cache_key, sites_data)
         else:
             sites_data = cached_data
         
         if format == "csv":
-            return _export_as_csv(sites_data)
+            return _export_as_csv(sites_data, selected)
+        elif format == "columnar":
+            return JSONResponse(content={
+                "fields": selected,
+                "columns": FieldProjection.to_columns(sites_data, selected)
+            })
         else:  # json
             return JSONResponse(content=sites_data)
-            
+    
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -93,34 +105,13 @@ async def export_sites(
         )
 
 
-def _export_as_csv(data: list) -> StreamingResponse:
+def _export_as_csv(data: list, fields: List[str]) -> StreamingResponse:
     """
     Convert data to CSV format and return as streaming response
     """
-    if not data:
-        # Return empty CSV with headers only
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow([
-            "site_id", "site_name", "latitude", "longitude",
-            "area_sqm", "solar_irradiance_kwh", "grid_distance_km",
-            "slope_degrees", "road_distance_km", "elevation_m",
-            "land_type", "region",
-            "solar_irradiance_score", "area_score",
-            "grid_distance_score", "slope_score",
-            "infrastructure_score", "total_suitability_score",
-            "analysis_timestamp"
-        ])
-        output.seek(0)
-        return StreamingResponse(
-            iter([output.getvalue()]),
-            media_type="text/csv",
-            headers={"Content-Disposition": "attachment; filename=sites_export.csv"}
-        )
-    
-    # Create CSV content
+    # Create CSV content; headers only when nothing matched
     output = io.StringIO()
-    writer = csv.DictWriter(output, fieldnames=data[0].keys())
+    writer = csv.DictWriter(output, fieldnames=fields)
     writer.writeheader()
     writer.writerows(data)
     
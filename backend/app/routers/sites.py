@@ -1,24 +1,49 @@
 """Sites API endpoints"""
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional
+from typing import List, Optional, Tuple
 
 from app.database import get_db
 from app.services.site_service import SiteService
-from app.models.schemas import SiteListResponse, SiteDetailResponse
+from app.services.spatial import SpatialFilter, BoundingBox, LatLon
+from app.services.filters import SiteFilter
+from app.services.projection import FieldProjection, LIST_FIELDS
+from app.models.schemas import (
+    SiteListResponse,
+    SiteDetailResponse,
+    SiteBatchRequest,
+    SiteBatchResponse,
+    TopSitesResponse,
+    NearestSitesResponse,
+    ClusterResponse,
+    AnalysisWeights
+)
 from app.cache import CacheManager
 
 router = APIRouter(prefix="/sites", tags=["Sites"])
 
 
-@router.get(
-    "",
-    response_model=SiteListResponse,
-    summary="Get all sites",
-    description="Returns all sites with basic information and optional filtering by score range"
-)
-async def get_sites(
+def parse_spatial_filters(
+    bbox: Optional[str],
+    near: Optional[str],
+    radius_km: Optional[float]
+) -> Tuple[Optional[BoundingBox], Optional[LatLon]]:
+    """
+    Parse the bbox and near/radius_km query parameters shared by the site
+    list and export endpoints
+    """
+    try:
+        return SpatialFilter.parse_bbox(bbox), SpatialFilter.parse_near(near, radius_km)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid spatial filter: {str(e)}"
+        )
+
+
+def site_filters(
     min_score: Optional[float] = Query(
         None,
         ge=0,
@@ -31,6 +56,110 @@ async def get_sites(
         le=100,
         description="Maximum suitability score filter"
     ),
+    min_area: Optional[float] = Query(
+        None,
+        ge=0,
+        description="Minimum site area in square meters"
+    ),
+    max_area: Optional[float] = Query(
+        None,
+        ge=0,
+        description="Maximum site area in square meters"
+    ),
+    min_slope: Optional[float] = Query(
+        None,
+        ge=0,
+        le=90,
+        description="Minimum terrain slope in degrees"
+    ),
+    max_slope: Optional[float] = Query(
+        None,
+        ge=0,
+        le=90,
+        description="Maximum terrain slope in degrees"
+    ),
+    min_irradiance: Optional[float] = Query(
+        None,
+        ge=0,
+        description="Minimum solar irradiance in kWh/m²/day"
+    ),
+    max_irradiance: Optional[float] = Query(
+        None,
+        ge=0,
+        description="Maximum solar irradiance in kWh/m²/day"
+    ),
+    region: Optional[List[str]] = Query(
+        None,
+        description="Only sites in these regions (repeat the parameter for several)"
+    ),
+    land_type: Optional[List[str]] = Query(
+        None,
+        description="Only sites of these land types (repeat the parameter for several)"
+    ),
+    bbox: Optional[str] = Query(
+        None,
+        description=(
+            "Only sites inside min_lon,min_lat,max_lon,max_lat "
+            "(min_lon > max_lon crosses the antimeridian)"
+        ),
+        examples=["76.5,10.5,78.0,11.5"]
+    ),
+    near: Optional[str] = Query(
+        None,
+        description="Center lat,lon of a radius search (requires radius_km)",
+        examples=["11.0244,77.1686"]
+    ),
+    radius_km: Optional[float] = Query(
+        None,
+        gt=0,
+        le=20000,
+        description="Radius around near in kilometers"
+    )
+) -> SiteFilter:
+    """
+    Site filter query parameters shared by the site list, statistics and
+    export endpoints
+    """
+    parsed_bbox, parsed_near = parse_spatial_filters(bbox, near, radius_km)
+    filters = SiteFilter(
+        min_score=min_score,
+        max_score=max_score,
+        min_area=min_area,
+        max_area=max_area,
+        min_slope=min_slope,
+        max_slope=max_slope,
+        min_irradiance=min_irradiance,
+        max_irradiance=max_irradiance,
+        # Sorted and deduplicated, so equivalent filters share cache entries
+        region=sorted(set(region)) if region else None,
+        land_type=sorted(set(land_type)) if land_type else None,
+        bbox=parsed_bbox,
+        near=parsed_near,
+        radius_km=radius_km if parsed_near is not None else None
+    )
+    
+    try:
+        filters.check_ranges()
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return filters
+
+
+@router.get(
+    "",
+    response_model=SiteListResponse,
+    summary="Get all sites",
+    description=(
+        "Returns all sites with basic information and optional filtering by "
+        "score, attributes, region, land type and location"
+    )
+)
+async def get_sites(
+    filters: SiteFilter = Depends(site_filters),
     limit: int = Query(
         50,
         ge=1,
@@ -40,36 +169,64 @@ async def get_sites(
     offset: int = Query(
         0,
         ge=0,
-        description="Number of results to skip"
+        description="Number of results to skip (ignored when a cursor is given)"
+    ),
+    cursor: Optional[str] = Query(
+        None,
+        description="next_cursor of the previous page"
+    ),
+    include_total: bool = Query(
+        True,
+        description="Include the total number of matching sites"
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description=f"Comma-separated fields to return, from {','.join(LIST_FIELDS)}",
+        examples=["site_id,latitude,longitude,total_suitability_score"]
+    ),
+    compact: bool = Query(
+        False,
+        description="Return one array per field under columns instead of one object per site"
     ),
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Retrieve a paginated list of sites with optional score filtering.
+    Retrieve a paginated list of sites with optional filtering.
     
     **Query Parameters:**
-    - **min_score**: Filter sites with score >= this value
-    - **max_score**: Filter sites with score <= this value
+    - **min_score** / **max_score**: Suitability score range
+    - **min_area** / **max_area**, **min_slope** / **max_slope**,
+      **min_irradiance** / **max_irradiance**: Ranges of the site attributes
+    - **region** / **land_type**: Only these regions or land types (repeatable)
+    - **bbox**: Only sites inside this box, e.g. the visible map viewport
+    - **near** / **radius_km**: Only sites within radius_km of a point
     - **limit**: Maximum number of results (1-100)
     - **offset**: Number of results to skip for pagination
+    - **cursor**: Continue after the previous page (keyset pagination, constant
+      cost at any depth; pass the same filters as the first page)
+    - **include_total**: Set to false to skip counting matching sites
+    - **fields**: Only read and return these fields
+    - **compact**: Columnar encoding, `columns` maps each field to an array
     
     **Returns:**
-    - Paginated list of sites with basic information and scores
+    - Paginated list of sites with basic information and scores, best first,
+      and `next_cursor` while more sites follow
+    - With fields or compact, also the `fields` returned; sites hold only those
+      fields (or `columns` replaces `sites`)
     """
-    # Validate score range
-    if min_score is not None and max_score is not None and min_score > max_score:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="min_score cannot be greater than max_score"
+    if fields is not None or compact:
+        return await _get_site_fields(
+            db, filters, fields, compact, limit, offset, cursor, include_total
         )
     
     # Generate cache key
     cache_key = CacheManager.generate_cache_key(
         "sites_list",
-        min_score=min_score,
-        max_score=max_score,
         limit=limit,
-        offset=offset
+        offset=offset,
+        cursor=cursor,
+        include_total=include_total,
+        **filters.cache_params()
     )
     
     # Try cache first
@@ -77,19 +234,302 @@ async def get_sites(
     if cached_result:
         return cached_result
     
+    # The total only depends on the filters, so it is cached once for all pages
+    count_cache_key = CacheManager.generate_cache_key(
+        "sites_list",
+        count=True,
+        **filters.cache_params()
+    )
+    known_total = None
+    if include_total:
+        known_total = await CacheManager.get(count_cache_key)
+    
     try:
         result = await SiteService.get_sites(
             db=db,
-            min_score=min_score,
-            max_score=max_score,
+            filters=filters,
             limit=limit,
-            offset=offset
+            offset=offset,
+            cursor=cursor,
+            include_total=include_total,
+            known_total=known_total
         )
         
         # Cache the result
         await CacheManager.set(cache_key, result)
+        if include_total and known_total is None:
+            await CacheManager.set(count_cache_key, result.total)
         
         return result
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve sites: {str(e)}"
+        )
+
+
+async def _get_site_fields(
+    db: AsyncSession,
+    filters: SiteFilter,
+    fields: Optional[str],
+    compact: bool,
+    limit: int,
+    offset: int,
+    cursor: Optional[str],
+    include_total: bool
+) -> JSONResponse:
+    """
+    Projected or columnar site list; returned as plain JSON, bypassing the
+    per-site response models
+    """
+    try:
+        selected = FieldProjection.parse(fields, LIST_FIELDS)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid fields: {str(e)}"
+        )
+    
+    cache_key = CacheManager.generate_cache_key(
+        "sites_list",
+        fields=selected,
+        compact=compact,
+        limit=limit,
+        offset=offset,
+        cursor=cursor,
+        include_total=include_total,
+        **filters.cache_params()
+    )
+    
+    cached_result = await CacheManager.get(cache_key)
+    if cached_result:
+        return JSONResponse(content=cached_result)
+    
+    # Shared with the full listing, the total does not depend on the fields
+    count_cache_key = CacheManager.generate_cache_key(
+        "sites_list",
+        count=True,
+        **filters.cache_params()
+    )
+    known_total = None
+    if include_total:
+        known_total = await CacheManager.get(count_cache_key)
+    
+    try:
+        result = await SiteService.get_site_fields(
+            db=db,
+            fields=selected,
+            columnar=compact,
+            filters=filters,
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
+            include_total=include_total,
+            known_total=known_total
+        )
+        
+        await CacheManager.set(cache_key, result)
+        if include_total and known_total is None:
+            await CacheManager.set(count_cache_key, result["total"])
+        
+        return JSONResponse(content=result)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve sites: {str(e)}"
+        )
+
+
+def parse_weights(weights: Optional[str]) -> AnalysisWeights:
+    """
+    Parse a comma-separated weight vector in the order
+    solar,area,grid_distance,slope,infrastructure (default weights if omitted)
+    """
+    if weights is None:
+        return AnalysisWeights()
+    
+    try:
+        values = [float(value) for value in weights.split(",")]
+        if len(values) != 5:
+            raise ValueError("exactly 5 weights are required")
+        parsed = AnalysisWeights(
+            solar=values[0],
+            area=values[1],
+            grid_distance=values[2],
+            slope=values[3],
+            infrastructure=values[4]
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid weights: {str(e)}"
+        )
+    
+    if not parsed.validate_sum():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Weights must sum to approximately 1.0"
+        )
+    
+    return parsed
+
+
+@router.get(
+    "/top",
+    response_model=TopSitesResponse,
+    summary="Get the best sites for a weight vector",
+    description="Returns the k highest scoring sites for arbitrary weights without rescoring every site"
+)
+async def get_top_sites(
+    k: int = Query(
+        10,
+        ge=1,
+        le=100,
+        description="Number of sites to return"
+    ),
+    weights: Optional[str] = Query(
+        None,
+        description="Comma-separated weights: solar,area,grid_distance,slope,infrastructure",
+        examples=["0.35,0.25,0.20,0.15,0.05"]
+    ),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Retrieve the k best sites for any weight vector.
+    
+    Uses an in-memory index of the stored component scores, sorted per
+    component, and stops reading as soon as no unseen site can enter the top k.
+    Nothing is written and the active analysis run is not changed.
+    
+    **Query Parameters:**
+    - **k**: Number of sites to return (1-100)
+    - **weights**: Five comma-separated weights summing to 1.0
+      (default: 0.35,0.25,0.20,0.15,0.05)
+    
+    **Returns:**
+    - Best sites first with their score under the given weights, ties broken by site_id
+    """
+    parsed_weights = parse_weights(weights)
+    
+    try:
+        return await SiteService.get_top_sites(db=db, weights=parsed_weights, k=k)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve top sites: {str(e)}"
+        )
+
+
+@router.get(
+    "/clusters",
+    response_model=ClusterResponse,
+    summary="Get map clusters of sites",
+    description="Returns precomputed site clusters for a map viewport and zoom level"
+)
+async def get_site_clusters(
+    bbox: str = Query(
+        ...,
+        description=(
+            "Viewport as min_lon,min_lat,max_lon,max_lat "
+            "(min_lon > max_lon crosses the antimeridian)"
+        ),
+        examples=["68.0,6.0,98.0,36.0"]
+    ),
+    zoom: float = Query(
+        ...,
+        ge=0,
+        le=24,
+        description="Map zoom level"
+    ),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Retrieve site clusters for a map viewport.
+    
+    Clusters come from a grid pyramid precomputed for every zoom level and
+    rebuilt after each analysis run, so the response size depends on the
+    viewport, not on the number of sites.
+    
+    **Query Parameters:**
+    - **bbox**: Visible area as min_lon,min_lat,max_lon,max_lat; min_lon may
+      exceed max_lon when the viewport crosses the antimeridian
+    - **zoom**: Map zoom level (fractional zooms use the level below)
+    
+    **Returns:**
+    - Cluster centroids with site counts and average/max scores, or the best
+      individual sites in the viewport from CLUSTER_MAX_ZOOM on
+    """
+    parsed_bbox, _ = parse_spatial_filters(bbox, None, None)
+    
+    try:
+        return await SiteService.get_clusters(db=db, bbox=parsed_bbox, zoom=zoom)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve clusters: {str(e)}"
+        )
+
+
+@router.post(
+    "/batch",
+    response_model=SiteBatchResponse,
+    summary="Get several sites by ID",
+    description="Returns detailed information for up to 100 sites in one request"
+)
+async def get_sites_batch(
+    request: SiteBatchRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Retrieve detailed information for several sites at once.
+    
+    **Request Body:**
+    - **site_ids**: Site ids (1-100); duplicates are ignored
+    
+    **Returns:**
+    - **sites**: The same details as GET /api/sites/{site_id}, in request order
+    - **missing**: Requested ids that do not exist
+    
+    Cached details are read with a single Redis MGET (shared with the single
+    site endpoint) and the rest with a single query.
+    """
+    site_ids = list(dict.fromkeys(request.site_ids))
+    cache_keys = [
+        CacheManager.generate_cache_key("site_detail", site_id=site_id)
+        for site_id in site_ids
+    ]
+    
+    try:
+        cached = await CacheManager.get_many(cache_keys)
+        sites = {
+            site_id: value
+            for site_id, value in zip(site_ids, cached)
+            if value
+        }
+        
+        misses = [site_id for site_id in site_ids if site_id not in sites]
+        if misses:
+            found = await SiteService.get_sites_by_ids(db=db, site_ids=misses)
+            sites.update(found)
+            await CacheManager.set_many({
+                CacheManager.generate_cache_key("site_detail", site_id=site_id): site
+                for site_id, site in found.items()
+            })
+        
+        return SiteBatchResponse(
+            sites=[sites[site_id] for site_id in site_ids if site_id in sites],
+            missing=[site_id for site_id in site_ids if site_id not in sites]
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -148,3 +588,63 @@ async def get_site_by_id(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to retrieve site: {str(e)}"
         )
+
+
+@router.get(
+    "/{site_id}/nearest",
+    response_model=NearestSitesResponse,
+    summary="Get the sites nearest to a site",
+    description="Returns the k closest sites with their distances and current scores"
+)
+async def get_nearest_sites(
+    site_id: int,
+    k: int = Query(
+        10,
+        ge=1,
+        le=100,
+        description="Number of sites to return"
+    ),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Retrieve the k sites closest to a site.
+    
+    Uses an in-memory spatial grid over all site positions, so the lookup
+    does not scan the sites table.
+    
+    **Path Parameters:**
+    - **site_id**: Unique identifier of the reference site
+    
+    **Query Parameters:**
+    - **k**: Number of sites to return (1-100)
+    
+    **Returns:**
+    - Closest sites first with their great-circle distance in kilometers,
+      ties broken by site_id; the reference site itself is excluded
+    """
+    # Scores change with every run, so the entry is invalidated with site details
+    cache_key = CacheManager.generate_cache_key("site_detail", site_id=site_id, nearest=k)
+    
+    cached_result = await CacheManager.get(cache_key)
+    if cached_result:
+        return cached_result
+    
+    try:
+        result = await SiteService.get_nearest_sites(db=db, site_id=site_id, k=k)
+        
+        if not result:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Site with ID {site_id} not found"
+            )
+        
+        await CacheManager.set(cache_key, result)
+        
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve nearest sites: {str(e)}"
+        )
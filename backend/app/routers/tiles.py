@@ -0,0 +1,53 @@
+"""Vector tile endpoints"""
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.services.tile_service import TileService
+
+router = APIRouter(prefix="/tiles", tags=["Tiles"])
+
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+
+
+@router.get(
+    "/{z}/{x}/{y}.mvt",
+    summary="Get a vector tile of scored sites",
+    description="Returns the sites in a tile as a Mapbox Vector Tile with score and component attributes",
+    response_class=Response,
+    responses={200: {"content": {MVT_MEDIA_TYPE: {}}}}
+)
+async def get_tile(
+    z: int,
+    x: int,
+    y: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Retrieve one vector tile of the active run's sites.
+    
+    **Path Parameters:**
+    - **z**, **x**, **y**: Tile coordinates in the XYZ (Web Mercator) scheme
+    
+    **Returns:**
+    - Protobuf vector tile with one point layer `sites`; features carry
+      site_id, site_name, region, land_type, total_suitability_score, rank
+      and the five component scores
+    
+    Tiles are cached per active run, site data version and tile coordinate.
+    """
+    try:
+        tile = await TileService.get_tile(db=db, z=z, x=x, y=y)
+        return Response(content=tile, media_type=MVT_MEDIA_TYPE)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to build tile: {str(e)}"
+        )
@@ -2,5 +2,16 @@
 
 from app.services.site_service import SiteService
 from app.services.analysis_service import AnalysisService
+from app.services.scoring_engine import ScoringEngine
+from app.services.retention_service import RetentionService
+from app.services.job_service import AnalysisJobManager
+from app.services.run_summary_service import RunSummaryService
 
-__all__ = ["SiteService", "AnalysisService"]
+__all__ = [
+    "SiteService",
+    "AnalysisService",
+    "ScoringEngine",
+    "RetentionService",
+    "AnalysisJobManager",
+    "RunSummaryService",
+]
@@ -0,0 +1,227 @@
+"""Region x land type x score bucket aggregate cube"""
+
+import math
+import unicodedata
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+
+from app.models.schemas import CubeCell, CubeResponse
+
+# One bucket per score point; a score of exactly 100 falls into the last bucket
+CUBE_BUCKETS = 100
+
+# Dimensions a cube query can be grouped by, mapped to their cube column
+CUBE_DIMENSIONS = {
+    "region": "region",
+    "land_type": "land_type",
+    "score_bucket": "score_bucket",
+}
+
+
+class AggregateCube:
+    """
+    Per-run cube of count, sum, sum of squares, min and max score keyed by
+    (region, land_type, score_bucket). Every roll-up by region, land type,
+    score band or any combination of them is answered by summing cube cells,
+    never by reading per-site rows.
+    """
+    
+    @staticmethod
+    def build_cells(rows: Sequence[Any]) -> List[Dict[str, Any]]:
+        """
+        Aggregate site rows into cube cells
+        
+        Args:
+            rows: Rows with region, land_type and total_suitability_score;
+                unscored sites are skipped
+        """
+        scored = [row for row in rows if row.total_suitability_score is not None]
+        if not scored:
+            return []
+        
+        scores = np.array([float(row.total_suitability_score) for row in scored])
+        region_labels, region_codes = AggregateCube.encode_labels(
+            [row.region for row in scored]
+        )
+        land_type_labels, land_type_codes = AggregateCube.encode_labels(
+            [row.land_type for row in scored]
+        )
+        buckets = np.clip(np.floor(scores).astype(np.int64), 0, CUBE_BUCKETS - 1)
+        
+        cell_keys = (region_codes * len(land_type_labels) + land_type_codes) * CUBE_BUCKETS + buckets
+        keys, cells = np.unique(cell_keys, return_inverse=True)
+        counts = np.bincount(cells, minlength=len(keys))
+        sums = np.bincount(cells, weights=scores, minlength=len(keys))
+        sums_of_squares = np.bincount(cells, weights=scores * scores, minlength=len(keys))
+        minima = np.full(len(keys), np.inf)
+        np.minimum.at(minima, cells, scores)
+        maxima = np.full(len(keys), -np.inf)
+        np.maximum.at(maxima, cells, scores)
+        
+        group_keys, bucket_values = np.divmod(keys, CUBE_BUCKETS)
+        region_indices, land_type_indices = np.divmod(group_keys, len(land_type_labels))
+        
+        return [
+            {
+                "region": region_labels[region_indices[index]],
+                "land_type": land_type_labels[land_type_indices[index]],
+                "score_bucket": int(bucket_values[index]),
+                "site_count": int(counts[index]),
+                "score_sum": float(sums[index]),
+                "score_sum_squares": float(sums_of_squares[index]),
+                "min_score": float(minima[index]),
+                "max_score": float(maxima[index])
+            }
+            for index in range(len(keys))
+        ]
+    
+    @staticmethod
+    def collation_key(value: str) -> str:
+        """
+        Key under which the utf8mb4_unicode_ci collation of the cube and sketch
+        primary keys treats labels as equal: case, accents and trailing spaces
+        are ignored
+        """
+        decomposed = unicodedata.normalize("NFKD", value.rstrip(" "))
+        return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+    
+    @staticmethod
+    def encode_labels(values: Sequence[str]) -> Tuple[List[str], np.ndarray]:
+        """
+        Integer code of every value, equal for values with the same
+        collation_key, and the first spelling seen of each code as its label
+        """
+        codes_by_key: Dict[str, int] = {}
+        labels = []
+        codes = np.empty(len(values), dtype=np.int64)
+        for index, value in enumerate(values):
+            key = AggregateCube.collation_key(value)
+            if key not in codes_by_key:
+                codes_by_key[key] = len(labels)
+                labels.append(value)
+            codes[index] = codes_by_key[key]
+        return labels, codes
+    
+    @staticmethod
+    async def store(db: AsyncSession, run_id: int, rows: Sequence[Any]) -> int:
+        """
+        Replace the cube of a run; the caller commits
+        
+        Returns:
+            Number of cells stored
+        """
+        delete_query = text("DELETE FROM analysis_run_cube WHERE run_id = :run_id")
+        await db.execute(delete_query, {"run_id": run_id})
+        
+        cells = AggregateCube.build_cells(rows)
+        if not cells:
+            return 0
+        
+        insert_query = text("""
+            INSERT INTO analysis_run_cube (
+                run_id, region, land_type, score_bucket, site_count,
+                score_sum, score_sum_squares, min_score, max_score
+            ) VALUES (
+                :run_id, :region, :land_type, :score_bucket, :site_count,
+                :score_sum, :score_sum_squares, :min_score, :max_score
+            )
+        """)
+        await db.execute(insert_query, [{"run_id": run_id, **cell} for cell in cells])
+        
+        return len(cells)
+    
+    @staticmethod
+    async def rollup(
+        db: AsyncSession,
+        group_by: List[str],
+        region: Optional[str] = None,
+        land_type: Optional[str] = None,
+        min_score: Optional[int] = None,
+        max_score: Optional[int] = None
+    ) -> CubeResponse:
+        """
+        Aggregate the active run's cube
+        
+        Args:
+            db: Database session
+            group_by: Dimensions from CUBE_DIMENSIONS to group by (may be empty)
+            region: Only include this region
+            land_type: Only include this land type
+            min_score: Only include scores >= this whole number
+            max_score: Only include scores < this whole number (100 includes 100)
+        """
+        conditions = []
+        params = {}
+        
+        if region is not None:
+            conditions.append("cb.region = :region")
+            params["region"] = region
+        if land_type is not None:
+            conditions.append("cb.land_type = :land_type")
+            params["land_type"] = land_type
+        if min_score is not None:
+            conditions.append("cb.score_bucket >= :min_bucket")
+            params["min_bucket"] = min_score
+        if max_score is not None:
+            conditions.append("cb.score_bucket < :max_bucket")
+            params["max_bucket"] = max_score
+        
+        where_clause = "".join(f" AND {condition}" for condition in conditions)
+        group_columns = [f"cb.{CUBE_DIMENSIONS[dimension]}" for dimension in group_by]
+        select_columns = "".join(f"{column}, " for column in group_columns)
+        group_clause = ""
+        if group_columns:
+            group_clause = "GROUP BY " + ", ".join(group_columns)
+        
+        query = text(f"""
+            SELECT {select_columns}
+                SUM(cb.site_count) AS site_count,
+                SUM(cb.score_sum) AS score_sum,
+                SUM(cb.score_sum_squares) AS score_sum_squares,
+                MIN(cb.min_score) AS min_score,
+                MAX(cb.max_score) AS max_score
+            FROM analysis_state st
+            JOIN analysis_run_cube cb ON cb.run_id = st.active_run_id
+            WHERE st.state_id = 1{where_clause}
+            {group_clause}
+        """)
+        result = await db.execute(query, params)
+        
+        cells = [
+            AggregateCube._to_cell(row, group_by)
+            for row in result.fetchall()
+            if row.site_count
+        ]
+        if group_by:
+            cells.sort(key=lambda cell: tuple(
+                getattr(cell, dimension) for dimension in group_by
+            ))
+        
+        return CubeResponse(
+            group_by=group_by,
+            region=region,
+            land_type=land_type,
+            min_score=min_score,
+            max_score=max_score,
+            cells=cells
+        )
+    
+    @staticmethod
+    def _to_cell(row: Any, group_by: List[str]) -> CubeCell:
+        """Turn summed cube columns into count, average and spread"""
+        count = int(row.site_count)
+        average = float(row.score_sum) / count
+        # Population variance from the sums; clamp rounding noise below zero
+        variance = max(float(row.score_sum_squares) / count - average * average, 0.0)
+        
+        return CubeCell(
+            **{dimension: getattr(row, CUBE_DIMENSIONS[dimension]) for dimension in group_by},
+            site_count=count,
+            avg_score=round(average, 2),
+            min_score=round(float(row.min_score), 2),
+            max_score=round(float(row.max_score), 2),
+            std_deviation=round(math.sqrt(variance), 2)
+        )
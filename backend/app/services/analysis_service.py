@@ -1,12 +1,28 @@
 """Analysis service for calculating suitability scores"""
 
-from typing import Tuple
+from typing import Callable, List, Optional, Tuple
 from datetime import datetime
+import json
 
+import numpy as np
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text
+from sqlalchemy import text, bindparam
 
-from app.models.schemas import AnalysisWeights, AnalysisResponse
+from app.config import get_settings
+from app.models.schemas import (
+    AnalysisWeights,
+    AnalysisResponse,
+    SiteResponse,
+    WhatIfProfileResult,
+    WhatIfResponse
+)
+from app.services.scoring_engine import ScoringEngine, COMPONENT_COLUMNS, INPUT_COLUMNS
+from app.services.run_summary_service import RunSummaryService
+
+settings = get_settings()
+
+# Receives the current stage name and the fraction of work completed (0-1)
+ProgressCallback = Callable[[str, float], None]
 
 
 class AnalysisService:
@@ -131,33 +147,699 @@ class AnalysisService:
     @staticmethod
     async def recalculate_all_sites(
         db: AsyncSession,
-        weights: AnalysisWeights
+        weights: AnalysisWeights,
+        progress: Optional[ProgressCallback] = None
     ) -> AnalysisResponse:
         """
-        Recalculate suitability scores for all sites with custom weights using MySQL stored procedure
+        Recalculate suitability scores for all sites with custom weights.
+        
+        Every recalculation is recorded as a new row in analysis_runs and its
+        results are keyed by run_id, so they stay invisible to readers until the
+        run completes and the analysis_state pointer is switched to it in a
+        single transaction. Component scores are weight-independent: only sites
+        whose attributes changed are rescored, and only totals are written.
+        Statistics snapshots are stored with the run before it is activated.
+        
+        Args:
+            db: Database session
+            weights: Weights to apply
+            progress: Optional callback receiving (stage, fraction complete)
         """
-        # First, update the weights in the database
-        await AnalysisService._update_weights(db, weights)
+        report = progress or (lambda stage, fraction: None)
         
-        # Get count of sites before analysis
-        count_query = text("SELECT COUNT(*) as total FROM sites")
-        result = await db.execute(count_query)
-        sites_count = result.scalar()
+        # Bring component scores up to date with the site attributes
+        report("refreshing component scores", 0.0)
+        refreshed_count = await AnalysisService.refresh_component_scores(db)
+        components_version = await AnalysisService.get_components_version(db)
+        sites_version = await AnalysisService.get_sites_version(db)
+        await db.commit()
         
-        # Call the MySQL stored procedure to calculate scores
-        procedure_call = text("CALL calculate_suitability_scores()")
-        await db.execute(procedure_call)
+        # Identical weights over unchanged component scores and site data give
+        # identical results, so a retained run for this profile is simply
+        # reactivated; a deleted site moves sites_version, as its results are
+        # removed by the cascade while the run's snapshots still count it
+        fingerprint = weights.fingerprint()
+        memoized_run = await AnalysisService._find_memoized_run(
+            db, fingerprint, components_version, sites_version
+        )
+        # Retention may claim the run before it is activated; it is then
+        # recomputed as if it had never been stored
+        if memoized_run is not None and await AnalysisService._activate_run(
+            db, memoized_run.run_id, weights
+        ):
+            report("reactivating stored run", 0.9)
+            return AnalysisResponse(
+                success=True,
+                message=(
+                    f"Reused stored scores of run {memoized_run.run_id} "
+                    f"for {memoized_run.sites_analyzed} sites"
+                ),
+                sites_analyzed=memoized_run.sites_analyzed,
+                weights_used=weights,
+                timestamp=datetime.now(),
+                run_id=memoized_run.run_id,
+                components_refreshed=refreshed_count,
+                reused=True
+            )
         
+        report("creating run", 0.1)
+        run_id = await AnalysisService._create_run(
+            db, weights, fingerprint, components_version, sites_version
+        )
+        
+        try:
+            report("scoring sites", 0.3)
+            site_ids, components = await AnalysisService.load_component_scores(db)
+            sites_count = len(site_ids)
+            
+            if sites_count:
+                totals = ScoringEngine.compute_total_scores(components, weights)
+                await AnalysisService._insert_results(
+                    db, run_id, site_ids, totals,
+                    on_batch=lambda written: report(
+                        "writing results", 0.35 + 0.6 * written / sites_count
+                    )
+                )
+            
+            await db.commit()
+            
+            await AnalysisService._complete_run(db, run_id, sites_count)
+            
+            report("computing statistics", 0.95)
+            await RunSummaryService.build_snapshots(db, run_id)
+            
+            report("activating run", 0.98)
+            if not await AnalysisService._activate_run(db, run_id, weights):
+                raise RuntimeError(f"Run {run_id} could not be activated")
+        except Exception:
+            await db.rollback()
+            await AnalysisService._fail_run(db, run_id)
+            raise
+        
+        return AnalysisResponse(
+            success=True,
+            message=(
+                f"Successfully recalculated scores for {sites_count} sites "
+                f"({refreshed_count} with updated component scores)"
+            ),
+            sites_analyzed=sites_count,
+            weights_used=weights,
+            timestamp=datetime.now(),
+            run_id=run_id,
+            components_refreshed=refreshed_count,
+            reused=False
+        )
+    
+    @staticmethod
+    async def rescore_changed_sites(
+        db: AsyncSession,
+        progress: Optional[ProgressCallback] = None
+    ) -> AnalysisResponse:
+        """
+        Incrementally bring the scores up to date with the site attributes.
+        
+        Only sites whose scoring inputs changed since their component scores
+        were computed are rescored, with the weights of the active run. Runs
+        are never modified once completed: the active run's results are copied
+        into a new run with one INSERT ... SELECT, the rescored totals are
+        upserted over the copy, and the new run is activated like any other,
+        so a data refresh costs O(changed sites) in scoring. Results of deleted
+        sites are not part of the copy. A new run is also written when only
+        columns other than the scoring inputs changed (sites_version moved),
+        as its snapshots, sketches and cube group by region and land type.
+        Without an active run this falls back to a full recalculation with
+        default weights.
+        
+        Args:
+            db: Database session
+            progress: Optional callback receiving (stage, fraction complete)
+        """
+        report = progress or (lambda stage, fraction: None)
+        
+        active_run = await AnalysisService._get_active_run(db)
+        if active_run is None:
+            return await AnalysisService.recalculate_all_sites(
+                db, AnalysisWeights(), progress=progress
+            )
+        
+        weights = AnalysisWeights(**json.loads(active_run.weights_snapshot))
+        
+        report("refreshing component scores", 0.0)
+        site_ids, components = await AnalysisService._refresh_components(db)
+        components_version = await AnalysisService.get_components_version(db)
+        sites_version = await AnalysisService.get_sites_version(db)
         await db.commit()
         
+        # Any insert, update or delete of a site moves sites_version
+        if not len(site_ids) and active_run.sites_version == sites_version:
+            report("completed", 1.0)
+            return AnalysisResponse(
+                success=True,
+                message=f"No changed sites; run {active_run.run_id} is up to date",
+                sites_analyzed=0,
+                weights_used=weights,
+                timestamp=datetime.now(),
+                run_id=active_run.run_id,
+                components_refreshed=0,
+                reused=True
+            )
+        
+        report("creating run", 0.1)
+        run_id = await AnalysisService._create_run(
+            db, weights, weights.fingerprint(), components_version, sites_version
+        )
+        
+        try:
+            report("copying unchanged results", 0.2)
+            copy_query = text("""
+                INSERT INTO analysis_results (
+                    run_id, site_id, total_suitability_score, score_rank
+                )
+                SELECT :run_id, site_id, total_suitability_score, score_rank
+                FROM analysis_results
+                WHERE run_id = :active_run_id
+            """)
+            await db.execute(copy_query, {
+                "run_id": run_id,
+                "active_run_id": active_run.run_id
+            })
+            
+            added_count = 0
+            if len(site_ids):
+                report("scoring changed sites", 0.5)
+                totals = ScoringEngine.compute_total_scores(components, weights)
+                added_count = await AnalysisService._upsert_results(
+                    db, run_id, site_ids, totals
+                )
+            
+            report("ranking sites", 0.7)
+            await AnalysisService._rank_results(db, run_id)
+            await db.commit()
+            
+            count_query = text("SELECT COUNT(*) FROM analysis_results WHERE run_id = :run_id")
+            sites_count = (await db.execute(count_query, {"run_id": run_id})).scalar()
+            await AnalysisService._complete_run(db, run_id, sites_count)
+            
+            report("computing statistics", 0.8)
+            await RunSummaryService.build_snapshots(db, run_id)
+            
+            report("activating run", 0.98)
+            if not await AnalysisService._activate_run(db, run_id, weights):
+                raise RuntimeError(f"Run {run_id} could not be activated")
+        except Exception:
+            await db.rollback()
+            await AnalysisService._fail_run(db, run_id)
+            raise
+        
+        report("completed", 1.0)
+        
         return AnalysisResponse(
             success=True,
-            message=f"Successfully recalculated scores for {sites_count} sites using MySQL stored procedure",
+            message=(
+                f"Incrementally rescored {len(site_ids)} changed sites "
+                f"({added_count} new) into run {run_id} of {sites_count} sites"
+            ),
             sites_analyzed=sites_count,
             weights_used=weights,
-            timestamp=datetime.now()
+            timestamp=datetime.now(),
+            run_id=run_id,
+            components_refreshed=len(site_ids),
+            reused=False
         )
     
+    @staticmethod
+    async def score_profiles(
+        db: AsyncSession,
+        profiles: List[AnalysisWeights],
+        top_k: int = 10
+    ) -> WhatIfResponse:
+        """
+        Score every site against several weight profiles without writing
+        anything. The stored component matrix is multiplied by a matrix of
+        profile weights, WHAT_IF_PROFILE_CHUNK profiles at a time to bound memory.
+        """
+        site_ids, components = await AnalysisService.load_component_scores(db)
+        
+        summaries = []
+        top_indices = []
+        chunk_size = settings.WHAT_IF_PROFILE_CHUNK
+        for start in range(0, len(profiles), chunk_size):
+            chunk = profiles[start:start + chunk_size]
+            scores = ScoringEngine.compute_profile_scores(components, chunk)
+            
+            for column in range(len(chunk)):
+                profile_scores = scores[:, column]
+                top_indices.append(
+                    ScoringEngine.top_k_indices(profile_scores, site_ids, top_k)
+                )
+                if len(profile_scores):
+                    summaries.append({
+                        "average_score": float(profile_scores.mean()),
+                        "median_score": float(np.median(profile_scores)),
+                        "min_score": float(profile_scores.min()),
+                        "max_score": float(profile_scores.max()),
+                        "std_deviation": float(profile_scores.std()),
+                        "top_scores": profile_scores[top_indices[-1]].tolist()
+                    })
+                else:
+                    summaries.append({
+                        "average_score": 0.0,
+                        "median_score": 0.0,
+                        "min_score": 0.0,
+                        "max_score": 0.0,
+                        "std_deviation": 0.0,
+                        "top_scores": []
+                    })
+        
+        # Fetch site details once for the union of all top-k lists
+        top_site_ids = sorted({int(site_ids[i]) for indices in top_indices for i in indices})
+        sites_by_id = {}
+        if top_site_ids:
+            sites_query = text("""
+                SELECT site_id, site_name, latitude, longitude, region, land_type
+                FROM sites
+                WHERE site_id IN :site_ids
+            """).bindparams(bindparam("site_ids", expanding=True))
+            result = await db.execute(sites_query, {"site_ids": top_site_ids})
+            sites_by_id = {row.site_id: row for row in result.fetchall()}
+        
+        profile_results = []
+        for weights, summary, indices in zip(profiles, summaries, top_indices):
+            top_sites = []
+            for index, score in zip(indices.tolist(), summary.pop("top_scores")):
+                row = sites_by_id.get(int(site_ids[index]))
+                if row is None:
+                    continue
+                top_sites.append(SiteResponse(
+                    site_id=row.site_id,
+                    site_name=row.site_name,
+                    latitude=float(row.latitude),
+                    longitude=float(row.longitude),
+                    region=row.region,
+                    land_type=row.land_type,
+                    total_suitability_score=round(score, 2)
+                ))
+            
+            profile_results.append(WhatIfProfileResult(
+                weights=weights,
+                **{name: round(value, 2) for name, value in summary.items()},
+                top_sites=top_sites
+            ))
+        
+        return WhatIfResponse(
+            sites_scored=len(site_ids),
+            profiles=profile_results
+        )
+    
+    @staticmethod
+    async def get_active_run_id(db: AsyncSession) -> Optional[int]:
+        """Get the id of the analysis run currently served to readers"""
+        query = text("SELECT active_run_id FROM analysis_state WHERE state_id = 1")
+        result = await db.execute(query)
+        return result.scalar()
+    
+    @staticmethod
+    async def _get_active_run(db: AsyncSession):
+        """Get the run_id, weights_snapshot and sites_version of the active run, if any"""
+        query = text("""
+            SELECT r.run_id, r.weights_snapshot, r.sites_version
+            FROM analysis_state st
+            JOIN analysis_runs r ON r.run_id = st.active_run_id
+            WHERE st.state_id = 1
+        """)
+        result = await db.execute(query)
+        return result.fetchone()
+    
+    @staticmethod
+    async def get_state_version(db: AsyncSession) -> Tuple[Optional[int], int, int]:
+        """
+        Get (active_run_id, components_version, sites_version); the scores and
+        site data served to clients change exactly when one of them changes
+        """
+        query = text("""
+            SELECT active_run_id, components_version, sites_version
+            FROM analysis_state
+            WHERE state_id = 1
+        """)
+        result = await db.execute(query)
+        row = result.fetchone()
+        if row is None:
+            return None, 0, 0
+        return row.active_run_id, row.components_version, row.sites_version
+    
+    @staticmethod
+    async def get_components_version(db: AsyncSession) -> int:
+        """Get the counter that changes whenever stored component scores change"""
+        query = text("SELECT components_version FROM analysis_state WHERE state_id = 1")
+        result = await db.execute(query)
+        return result.scalar() or 0
+    
+    @staticmethod
+    async def get_sites_version(db: AsyncSession) -> int:
+        """
+        Get analysis_state.sites_version, which triggers on sites move on every
+        insert, delete and update that changes a column
+        """
+        query = text("SELECT sites_version FROM analysis_state WHERE state_id = 1")
+        result = await db.execute(query)
+        return result.scalar() or 0
+    
+    @staticmethod
+    async def _find_memoized_run(
+        db: AsyncSession,
+        fingerprint: str,
+        components_version: int,
+        sites_version: int
+    ):
+        """
+        Find a completed run computed from the same weights, component scores
+        and site data
+        """
+        query = text("""
+            SELECT run_id, sites_analyzed
+            FROM analysis_runs
+            WHERE weights_fingerprint = :fingerprint
+              AND components_version = :components_version
+              AND sites_version = :sites_version
+              AND status = 'completed'
+            ORDER BY run_id DESC
+            LIMIT 1
+        """)
+        result = await db.execute(query, {
+            "fingerprint": fingerprint,
+            "components_version": components_version,
+            "sites_version": sites_version
+        })
+        return result.fetchone()
+    
+    @staticmethod
+    async def _create_run(
+        db: AsyncSession,
+        weights: AnalysisWeights,
+        fingerprint: str,
+        components_version: int,
+        sites_version: int
+    ) -> int:
+        """Register a new analysis run in 'running' state and return its id"""
+        query = text("""
+            INSERT INTO analysis_runs (
+                status, weights_snapshot, weights_fingerprint,
+                components_version, sites_version
+            ) VALUES (
+                'running', :weights_snapshot, :fingerprint,
+                :components_version, :sites_version
+            )
+        """)
+        result = await db.execute(query, {
+            "weights_snapshot": json.dumps(weights.model_dump()),
+            "fingerprint": fingerprint,
+            "components_version": components_version,
+            "sites_version": sites_version
+        })
+        await db.commit()
+        return result.lastrowid
+    
+    @staticmethod
+    async def _complete_run(db: AsyncSession, run_id: int, sites_count: int):
+        """
+        Mark a run completed; committed together with its activation. A run
+        retention already failed as stale stays failed and cannot be activated.
+        """
+        query = text("""
+            UPDATE analysis_runs
+            SET status = 'completed',
+                sites_analyzed = :sites_count,
+                completed_at = CURRENT_TIMESTAMP
+            WHERE run_id = :run_id AND status = 'running'
+        """)
+        await db.execute(query, {"run_id": run_id, "sites_count": sites_count})
+    
+    @staticmethod
+    async def _activate_run(db: AsyncSession, run_id: int, weights: AnalysisWeights) -> bool:
+        """
+        Atomically make a completed run the active run. The run row is locked
+        first so retention cannot start deleting it in between.
+        
+        Returns:
+            False if the run is no longer completed (e.g. being deleted)
+        """
+        status_query = text("""
+            SELECT status
+            FROM analysis_runs
+            WHERE run_id = :run_id
+            FOR UPDATE
+        """)
+        result = await db.execute(status_query, {"run_id": run_id})
+        if result.scalar() != "completed":
+            await db.rollback()
+            return False
+        
+        touch_query = text("""
+            UPDATE analysis_runs
+            SET last_used_at = CURRENT_TIMESTAMP
+            WHERE run_id = :run_id
+        """)
+        await db.execute(touch_query, {"run_id": run_id})
+        
+        await AnalysisService._update_weights(db, weights)
+        
+        activate_query = text("""
+            UPDATE analysis_state
+            SET active_run_id = :run_id
+            WHERE state_id = 1
+        """)
+        await db.execute(activate_query, {"run_id": run_id})
+        
+        await db.commit()
+        return True
+    
+    @staticmethod
+    async def _fail_run(db: AsyncSession, run_id: int):
+        """Mark a run as failed so it is never activated"""
+        query = text("""
+            UPDATE analysis_runs
+            SET status = 'failed',
+                completed_at = CURRENT_TIMESTAMP
+            WHERE run_id = :run_id
+        """)
+        await db.execute(query, {"run_id": run_id})
+        await db.commit()
+    
+    @staticmethod
+    async def refresh_component_scores(db: AsyncSession) -> int:
+        """
+        Score sites that have no component scores yet or whose scoring inputs
+        changed since their component scores were computed (their
+        attributes_hash differs), and bump the components version when
+        anything changed.
+        
+        Returns:
+            Number of sites rescored
+        """
+        site_ids, _ = await AnalysisService._refresh_components(db)
+        return len(site_ids)
+    
+    @staticmethod
+    async def _refresh_components(db: AsyncSession) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rescore dirty sites as described in refresh_component_scores
+        
+        Returns:
+            (site_ids, components) of the rescored sites only
+        """
+        dirty_query = text(f"""
+            SELECT s.site_id, {", ".join("s." + column for column in INPUT_COLUMNS)},
+                   s.attributes_hash
+            FROM sites s
+            LEFT JOIN site_component_scores c ON c.site_id = s.site_id
+            WHERE c.site_id IS NULL OR c.attributes_hash <> s.attributes_hash
+        """)
+        result = await db.execute(dirty_query)
+        rows = result.fetchall()
+        
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty((0, len(COMPONENT_COLUMNS)))
+        
+        # The hash read with the attributes is stored, so a site updated in
+        # the meantime stays dirty
+        hashes = [row.attributes_hash for row in rows]
+        data = np.asarray([row[:-1] for row in rows], dtype=np.float64)
+        site_ids = data[:, 0].astype(np.int64)
+        components = ScoringEngine.compute_component_scores(data[:, 1:])
+        
+        upsert_query = text(f"""
+            INSERT INTO site_component_scores (
+                site_id, {", ".join(COMPONENT_COLUMNS)}, attributes_hash
+            ) VALUES (
+                :site_id, {", ".join(":" + column for column in COMPONENT_COLUMNS)}, :attributes_hash
+            ) ON DUPLICATE KEY UPDATE
+                {", ".join(f"{column} = VALUES({column})" for column in COMPONENT_COLUMNS)},
+                attributes_hash = VALUES(attributes_hash),
+                computed_at = CURRENT_TIMESTAMP
+        """)
+        
+        for start, end in AnalysisService._batches(len(site_ids)):
+            batch = [
+                {
+                    "site_id": site_id,
+                    **dict(zip(COMPONENT_COLUMNS, scores)),
+                    "attributes_hash": attributes_hash
+                }
+                for site_id, scores, attributes_hash in zip(
+                    site_ids[start:end].tolist(),
+                    components[start:end].tolist(),
+                    hashes[start:end]
+                )
+            ]
+            await db.execute(upsert_query, batch)
+        
+        # Runs computed from the previous component scores can no longer be reused
+        version_query = text("""
+            UPDATE analysis_state
+            SET components_version = components_version + 1
+            WHERE state_id = 1
+        """)
+        await db.execute(version_query)
+        
+        return site_ids, components
+    
+    @staticmethod
+    async def load_component_scores(db: AsyncSession) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Load the stored component scores of every site
+        
+        Returns:
+            (site_ids, components) where components is an (n, 5) array with
+            columns in COMPONENT_COLUMNS order
+        """
+        query = text(f"""
+            SELECT site_id, {", ".join(COMPONENT_COLUMNS)}
+            FROM site_component_scores
+            ORDER BY site_id
+        """)
+        result = await db.execute(query)
+        rows = result.fetchall()
+        
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty((0, len(COMPONENT_COLUMNS)))
+        
+        data = np.asarray(rows, dtype=np.float64)
+        return data[:, 0].astype(np.int64), data[:, 1:]
+    
+    @staticmethod
+    def _batches(count: int):
+        """Yield (start, end) slices of at most ANALYSIS_BATCH_SIZE rows"""
+        batch_size = settings.ANALYSIS_BATCH_SIZE
+        for start in range(0, count, batch_size):
+            yield start, min(start + batch_size, count)
+    
+    @staticmethod
+    async def _insert_results(
+        db: AsyncSession,
+        run_id: int,
+        site_ids: np.ndarray,
+        totals: np.ndarray,
+        on_batch: Optional[Callable[[int], None]] = None
+    ):
+        """
+        Bulk insert a run's total scores and their dense ranks in batches of
+        ANALYSIS_BATCH_SIZE rows, calling on_batch with the number of rows
+        written so far
+        """
+        insert_query = text("""
+            INSERT INTO analysis_results (
+                run_id, site_id, total_suitability_score, score_rank
+            ) VALUES (
+                :run_id, :site_id, :total_suitability_score, :score_rank
+            )
+        """)
+        
+        ranks = ScoringEngine.dense_ranks(totals)
+        
+        for start, end in AnalysisService._batches(len(site_ids)):
+            batch = [
+                {
+                    "run_id": run_id,
+                    "site_id": site_id,
+                    "total_suitability_score": total,
+                    "score_rank": rank
+                }
+                for site_id, total, rank in zip(
+                    site_ids[start:end].tolist(),
+                    totals[start:end].tolist(),
+                    ranks[start:end].tolist()
+                )
+            ]
+            await db.execute(insert_query, batch)
+            if on_batch:
+                on_batch(end)
+    
+    @staticmethod
+    async def _upsert_results(
+        db: AsyncSession,
+        run_id: int,
+        site_ids: np.ndarray,
+        totals: np.ndarray
+    ) -> int:
+        """
+        Insert or overwrite the total scores of some sites within a run;
+        ranks must be recomputed with _rank_results afterwards
+        
+        Returns:
+            Number of sites that had no result in the run before
+        """
+        existing_query = text("""
+            SELECT COUNT(*)
+            FROM analysis_results
+            WHERE run_id = :run_id AND site_id IN :site_ids
+        """).bindparams(bindparam("site_ids", expanding=True))
+        
+        upsert_query = text("""
+            INSERT INTO analysis_results (
+                run_id, site_id, total_suitability_score
+            ) VALUES (
+                :run_id, :site_id, :total_suitability_score
+            ) ON DUPLICATE KEY UPDATE
+                total_suitability_score = VALUES(total_suitability_score)
+        """)
+        
+        added_count = 0
+        for start, end in AnalysisService._batches(len(site_ids)):
+            batch_site_ids = site_ids[start:end].tolist()
+            result = await db.execute(existing_query, {
+                "run_id": run_id,
+                "site_ids": batch_site_ids
+            })
+            added_count += len(batch_site_ids) - result.scalar()
+            
+            batch = [
+                {
+                    "run_id": run_id,
+                    "site_id": site_id,
+                    "total_suitability_score": total
+                }
+                for site_id, total in zip(batch_site_ids, totals[start:end].tolist())
+            ]
+            await db.execute(upsert_query, batch)
+        
+        return added_count
+    
+    @staticmethod
+    async def _rank_results(db: AsyncSession, run_id: int):
+        """Recompute the dense rank of every result of a run after scores changed"""
+        query = text("""
+            UPDATE analysis_results ar
+            JOIN (
+                SELECT site_id,
+                       DENSE_RANK() OVER (ORDER BY total_suitability_score DESC) AS score_rank
+                FROM analysis_results
+                WHERE run_id = :run_id
+            ) ranked ON ranked.site_id = ar.site_id
+            SET ar.score_rank = ranked.score_rank
+            WHERE ar.run_id = :run_id
+        """)
+        await db.execute(query, {"run_id": run_id})
+    
     @staticmethod
     async def _update_weights(db: AsyncSession, weights: AnalysisWeights):
         """Update weights in the analysis_parameters table"""
@@ -180,5 +862,3 @@ class AnalysisService:
                 "weight_value": weight_value,
                 "param_name": param_name
             })
-        
-        await db.commit()
@@ -0,0 +1,230 @@
+"""Precomputed hierarchical map clusters of sites"""
+
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+
+from app.config import get_settings
+from app.models.schemas import SiteCluster
+from app.services.analysis_service import AnalysisService
+from app.services.spatial import BoundingBox, SpatialFilter
+
+settings = get_settings()
+
+# On-screen size of a cluster cell in pixels (256 px map tiles)
+CLUSTER_CELL_PX = 64
+
+# Web Mercator cannot represent the poles
+MAX_MERCATOR_LAT = 85.05112878
+
+
+class ClusterIndex:
+    """
+    Process-local pyramid of grid clusters in Web Mercator space, one level
+    per zoom below CLUSTER_MAX_ZOOM. Each level aggregates the cells of the
+    level below it (every cell covers four child cells), so the whole pyramid
+    is built bottom-up in one pass and a map request only reads the cells of
+    its zoom level inside the viewport.
+    The pyramid is rebuilt whenever the active run or the site data changes.
+    """
+    
+    # Per level: cell keys (row-major, sorted) and their aggregates
+    _levels: List[Dict[str, np.ndarray]] = []
+    _version: Optional[Tuple[Optional[int], int, int]] = None
+    _lock: asyncio.Lock = asyncio.Lock()
+    
+    @classmethod
+    async def ensure_current(cls, db: AsyncSession):
+        """Rebuild the pyramid if the active run or site data changed"""
+        version = await AnalysisService.get_state_version(db)
+        if version == cls._version:
+            return
+        
+        async with cls._lock:
+            if version == cls._version:
+                return
+            query = text("""
+                SELECT latitude, longitude, total_suitability_score
+                FROM sites_with_scores
+            """)
+            result = await db.execute(query)
+            rows = result.fetchall()
+            cls.build(
+                np.array([float(row.latitude) for row in rows]),
+                np.array([float(row.longitude) for row in rows]),
+                np.array([
+                    np.nan if row.total_suitability_score is None
+                    else float(row.total_suitability_score)
+                    for row in rows
+                ]),
+                version
+            )
+            print(f"Cluster index rebuilt for {len(rows)} sites (version {version})")
+    
+    @classmethod
+    def build(
+        cls,
+        latitudes: np.ndarray,
+        longitudes: np.ndarray,
+        scores: np.ndarray,
+        version: Optional[Tuple[Optional[int], int, int]] = None
+    ):
+        """
+        Replace the pyramid contents
+        
+        Args:
+            latitudes: Latitudes in degrees
+            longitudes: Longitudes in degrees
+            scores: Scores aligned with the coordinates, NaN for unscored sites
+            version: (active_run_id, components_version, sites_version) the
+                data was loaded at
+        """
+        levels = max(settings.CLUSTER_MAX_ZOOM, 1)
+        x, y = cls.to_mercator(latitudes, longitudes)
+        scored = ~np.isnan(scores)
+        
+        # Finest level straight from the sites
+        side = cls._cells_per_side(levels - 1)
+        cx = np.minimum((x * side).astype(np.int64), side - 1)
+        cy = np.minimum((y * side).astype(np.int64), side - 1)
+        level = cls._aggregate(
+            cy * side + cx,
+            np.ones(len(x), dtype=np.int64),
+            scored.astype(np.int64),
+            np.where(scored, scores, 0.0),
+            np.where(scored, scores, -np.inf),
+            x,
+            y
+        )
+        
+        pyramid = [level]
+        for zoom in range(levels - 2, -1, -1):
+            child_side = cls._cells_per_side(zoom + 1)
+            parent_side = cls._cells_per_side(zoom)
+            child = pyramid[-1]
+            parent_keys = (child["keys"] // child_side // 2) * parent_side + (child["keys"] % child_side) // 2
+            pyramid.append(cls._aggregate(
+                parent_keys,
+                child["count"],
+                child["scored"],
+                child["score_sum"],
+                child["max_score"],
+                child["x_sum"],
+                child["y_sum"]
+            ))
+        
+        cls._levels = pyramid[::-1]
+        cls._version = version
+    
+    @classmethod
+    def clusters(cls, bbox: BoundingBox, zoom: int) -> List[SiteCluster]:
+        """
+        Clusters of one zoom level whose cells intersect a bounding box
+        
+        Args:
+            bbox: (min_lon, min_lat, max_lon, max_lat)
+            zoom: Level below CLUSTER_MAX_ZOOM
+        """
+        if not cls._levels:
+            return []
+        
+        zoom = min(max(zoom, 0), len(cls._levels) - 1)
+        level = cls._levels[zoom]
+        side = cls._cells_per_side(zoom)
+        
+        # A viewport crossing the antimeridian is looked up on both sides; at
+        # low zooms both halves can share a cell
+        indices = np.unique(np.concatenate([
+            cls._cell_range(level, side, part) for part in SpatialFilter.split_bbox(bbox)
+        ]))
+        
+        latitudes, longitudes = cls.from_mercator(
+            level["x_sum"][indices] / level["count"][indices],
+            level["y_sum"][indices] / level["count"][indices]
+        )
+        
+        clusters = []
+        for position, index in enumerate(indices.tolist()):
+            scored = int(level["scored"][index])
+            clusters.append(SiteCluster(
+                latitude=round(float(latitudes[position]), 6),
+                longitude=round(float(longitudes[position]), 6),
+                site_count=int(level["count"][index]),
+                scored_count=scored,
+                avg_score=round(float(level["score_sum"][index]) / scored, 2) if scored else None,
+                max_score=round(float(level["max_score"][index]), 2) if scored else None
+            ))
+        
+        return clusters
+    
+    @classmethod
+    def _cell_range(cls, level: Dict[str, np.ndarray], side: int, bbox: BoundingBox) -> np.ndarray:
+        """Indices of a level's cells intersecting a non-wrapping box"""
+        min_lon, min_lat, max_lon, max_lat = bbox
+        # Mercator y grows southwards
+        x0, y1 = cls.to_mercator(np.array([min_lat]), np.array([min_lon]))
+        x1, y0 = cls.to_mercator(np.array([max_lat]), np.array([max_lon]))
+        cx0, cx1 = [min(int(value * side), side - 1) for value in (x0[0], x1[0])]
+        cy0, cy1 = [min(int(value * side), side - 1) for value in (y0[0], y1[0])]
+        
+        # One contiguous key range per visible grid row
+        rows = np.arange(cy0, cy1 + 1, dtype=np.int64)
+        starts = np.searchsorted(level["keys"], rows * side + cx0, side="left")
+        ends = np.searchsorted(level["keys"], rows * side + cx1, side="right")
+        return np.concatenate(
+            [np.arange(start, end) for start, end in zip(starts.tolist(), ends.tolist())]
+            or [np.empty(0, dtype=np.int64)]
+        )
+    
+    @classmethod
+    def size(cls) -> int:
+        """Number of indexed sites"""
+        return int(cls._levels[0]["count"].sum()) if cls._levels else 0
+    
+    @staticmethod
+    def to_mercator(latitudes: np.ndarray, longitudes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Normalized Web Mercator coordinates in [0, 1], y growing southwards"""
+        lat = np.radians(np.clip(latitudes, -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT))
+        x = (np.asarray(longitudes, dtype=np.float64) + 180.0) / 360.0
+        y = 0.5 - np.log(np.tan(np.pi / 4 + lat / 2)) / (2 * np.pi)
+        return np.clip(x, 0.0, 1.0), np.clip(y, 0.0, 1.0)
+    
+    @staticmethod
+    def from_mercator(x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Latitudes and longitudes of normalized Web Mercator coordinates"""
+        latitudes = np.degrees(2 * np.arctan(np.exp((0.5 - y) * 2 * np.pi)) - np.pi / 2)
+        return latitudes, x * 360.0 - 180.0
+    
+    @staticmethod
+    def _cells_per_side(zoom: int) -> int:
+        """Grid cells along each axis of the world at a zoom level"""
+        return (2 ** zoom) * 256 // CLUSTER_CELL_PX
+    
+    @staticmethod
+    def _aggregate(
+        keys: np.ndarray,
+        count: np.ndarray,
+        scored: np.ndarray,
+        score_sum: np.ndarray,
+        max_score: np.ndarray,
+        x_sum: np.ndarray,
+        y_sum: np.ndarray
+    ) -> Dict[str, np.ndarray]:
+        """Combine entries sharing a cell key; centroids are count-weighted"""
+        cell_keys, cells = np.unique(keys, return_inverse=True)
+        size = len(cell_keys)
+        maxima = np.full(size, -np.inf)
+        np.maximum.at(maxima, cells, max_score)
+        
+        return {
+            "keys": cell_keys,
+            "count": np.bincount(cells, weights=count, minlength=size).astype(np.int64),
+            "scored": np.bincount(cells, weights=scored, minlength=size).astype(np.int64),
+            "score_sum": np.bincount(cells, weights=score_sum, minlength=size),
+            "max_score": maxima,
+            "x_sum": np.bincount(cells, weights=x_sum, minlength=size),
+            "y_sum": np.bincount(cells, weights=y_sum, minlength=size)
+        }
@@ -0,0 +1,125 @@
+"""In-memory index of component scores for top-k queries"""
+
+import asyncio
+from typing import Optional, Tuple
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.schemas import AnalysisWeights
+from app.services.analysis_service import AnalysisService
+from app.services.scoring_engine import ScoringEngine, COMPONENT_COLUMNS
+
+# Number of rows read from every sorted list in the first round of a query;
+# the depth doubles on every following round
+INITIAL_DEPTH = 64
+
+
+class ComponentIndex:
+    """
+    Process-local copy of site_component_scores with every component column
+    pre-sorted, so the best sites for any weight vector can be found with the
+    threshold algorithm instead of scoring and sorting every site.
+    The copy is reloaded whenever analysis_state.components_version changes.
+    """
+    
+    _site_ids: np.ndarray = np.empty(0, dtype=np.int64)
+    _components: np.ndarray = np.empty((0, len(COMPONENT_COLUMNS)))
+    _sorted_lists: np.ndarray = np.empty((len(COMPONENT_COLUMNS), 0), dtype=np.int64)
+    _version: Optional[int] = None
+    _lock: asyncio.Lock = asyncio.Lock()
+    
+    @classmethod
+    async def ensure_current(cls, db: AsyncSession):
+        """Reload the index if stored component scores changed since it was built"""
+        version = await AnalysisService.get_components_version(db)
+        if version == cls._version:
+            return
+        
+        async with cls._lock:
+            if version == cls._version:
+                return
+            site_ids, components = await AnalysisService.load_component_scores(db)
+            cls.build(site_ids, components, version)
+            print(f"Component index rebuilt for {len(site_ids)} sites (version {version})")
+    
+    @classmethod
+    def build(cls, site_ids: np.ndarray, components: np.ndarray, version: Optional[int] = None):
+        """
+        Replace the index contents
+        
+        Args:
+            site_ids: Site ids in ascending order
+            components: (n, 5) component matrix aligned with site_ids
+            version: components_version the matrix was loaded at
+        """
+        # Stable sort keeps equal scores in site_id order
+        order = np.argsort(-components, axis=0, kind="stable")
+        cls._site_ids = site_ids
+        cls._components = components
+        cls._sorted_lists = np.ascontiguousarray(order.T)
+        cls._version = version
+    
+    @classmethod
+    def size(cls) -> int:
+        """Number of indexed sites"""
+        return len(cls._site_ids)
+    
+    @classmethod
+    def top_k(
+        cls,
+        weights: AnalysisWeights,
+        k: int
+    ) -> Tuple[np.ndarray, np.ndarray, int]:
+        """
+        Find the k best sites for a weight vector, ties broken by site_id.
+        
+        Reads the per-component sorted lists in rounds of doubling depth,
+        scores only sites seen so far and stops as soon as the k-th best score
+        beats the threshold, the best score any unseen site could still reach.
+        
+        Returns:
+            (site_ids, scores, sites_examined) with the best site first
+        """
+        site_ids = cls._site_ids
+        components = cls._components
+        count = len(site_ids)
+        k = min(k, count)
+        if k == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0), 0
+        
+        weight_vector = ScoringEngine.weights_vector(weights)
+        lists = np.flatnonzero(weight_vector > 0)
+        if lists.size == 0:
+            # Every site scores 0, so the lowest site ids win
+            return site_ids[:k], np.zeros(k), k
+        
+        seen = np.zeros(count, dtype=bool)
+        best = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0)
+        depth = 0
+        round_size = max(k, INITIAL_DEPTH)
+        
+        while depth < count:
+            end = min(depth + round_size, count)
+            new = np.unique(cls._sorted_lists[lists, depth:end])
+            new = new[~seen[new]]
+            seen[new] = True
+            
+            candidates = np.concatenate([best, new])
+            scores = ScoringEngine.round_scores(components[candidates] @ weight_vector)
+            selected = ScoringEngine.top_k_indices(scores, site_ids[candidates], k)
+            best = candidates[selected]
+            best_scores = scores[selected]
+            
+            depth = end
+            round_size *= 2
+            
+            if depth < count and len(best) == k:
+                # Unseen sites score at most the last value read from each list
+                last_read = components[cls._sorted_lists[lists, depth - 1], lists]
+                threshold = ScoringEngine.round_scores(last_read @ weight_vector[lists])
+                if best_scores[-1] > threshold:
+                    break
+        
+        return site_ids[best], best_scores, int(seen.sum())
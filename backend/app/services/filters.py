@@ -0,0 +1,116 @@
+"""Declarative site filters compiled into parameterized SQL"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from app.services.spatial import SpatialFilter
+
+# Sites with their result in the run :run_id (NULL columns when unscored);
+# the filter conditions are written against its aliases
+FILTER_FROM = """
+    sites s
+    LEFT JOIN analysis_results ar
+        ON ar.run_id = :run_id AND ar.site_id = s.site_id
+"""
+
+# Range filters: name -> column of FILTER_FROM, bounded by the
+# min_<name> and max_<name> fields of SiteFilter (both inclusive)
+RANGE_FILTERS: Dict[str, str] = {
+    "score": "ar.total_suitability_score",
+    "area": "s.area_sqm",
+    "slope": "s.slope_degrees",
+    "irradiance": "s.solar_irradiance_kwh",
+}
+
+# Value filters: field of SiteFilter -> column matching any of its values
+VALUE_FILTERS: Dict[str, str] = {
+    "region": "s.region",
+    "land_type": "s.land_type",
+}
+
+
+class SiteFilter(BaseModel):
+    """
+    Filter over FILTER_FROM shared by the site list, statistics and export
+    queries. Every set field becomes one parameterized condition, and the
+    conditions are AND-ed together. Score filters read analysis_results of
+    the given run directly, so they use its (run_id, total_suitability_score,
+    site_id) index; the other range and value filters map to the composite
+    indexes on sites and spatial filters use the sites.location spatial index.
+    """
+    min_score: Optional[float] = None
+    max_score: Optional[float] = None
+    min_area: Optional[float] = None
+    max_area: Optional[float] = None
+    min_slope: Optional[float] = None
+    max_slope: Optional[float] = None
+    min_irradiance: Optional[float] = None
+    max_irradiance: Optional[float] = None
+    region: Optional[List[str]] = None
+    land_type: Optional[List[str]] = None
+    bbox: Optional[Tuple[float, float, float, float]] = None
+    near: Optional[Tuple[float, float]] = None
+    radius_km: Optional[float] = None
+    
+    def check_ranges(self):
+        """
+        Raises:
+            ValueError: If a range has its minimum above its maximum
+        """
+        for name in RANGE_FILTERS:
+            low = getattr(self, f"min_{name}")
+            high = getattr(self, f"max_{name}")
+            if low is not None and high is not None and low > high:
+                raise ValueError(f"min_{name} cannot be greater than max_{name}")
+    
+    def conditions(self, params: Dict[str, Any]) -> List[str]:
+        """
+        SQL conditions of the set fields; their parameters are added to params
+        """
+        conditions = []
+        
+        for name, column in RANGE_FILTERS.items():
+            low = getattr(self, f"min_{name}")
+            high = getattr(self, f"max_{name}")
+            if low is not None:
+                conditions.append(f"{column} >= :min_{name}")
+                params[f"min_{name}"] = low
+            if high is not None:
+                conditions.append(f"{column} <= :max_{name}")
+                params[f"max_{name}"] = high
+        
+        for name, column in VALUE_FILTERS.items():
+            values = getattr(self, name)
+            if not values:
+                continue
+            placeholders = []
+            for index, value in enumerate(values):
+                params[f"{name}_{index}"] = value
+                placeholders.append(f":{name}_{index}")
+            conditions.append(f"{column} IN ({', '.join(placeholders)})")
+        
+        conditions += SpatialFilter.conditions(
+            params, self.bbox, self.near, self.radius_km, column="s.location"
+        )
+        
+        return conditions
+    
+    def where_clause(self, params: Dict[str, Any]) -> str:
+        """WHERE clause of the set fields, or an empty string"""
+        conditions = self.conditions(params)
+        if not conditions:
+            return ""
+        return "WHERE " + " AND ".join(conditions)
+    
+    def has_score_range(self) -> bool:
+        """Whether min_score or max_score is set, which excludes unscored sites"""
+        return self.min_score is not None or self.max_score is not None
+    
+    def score_only(self) -> bool:
+        """Whether no filter other than min_score/max_score is set"""
+        return not self.model_dump(exclude_none=True, exclude={"min_score", "max_score"})
+    
+    def cache_params(self) -> Dict[str, Any]:
+        """Set fields in a stable form for cache keys"""
+        return self.model_dump(exclude_none=True)
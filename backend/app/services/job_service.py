@@ -0,0 +1,201 @@
+"""Background job manager for score recalculations"""
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from app.cache import invalidate_score_caches
+from app.config import get_settings
+from app.database import get_db_context
+from app.metrics import MetricsRegistry
+from app.models.schemas import AnalysisWeights, AnalysisJobResponse
+from app.services.analysis_service import AnalysisService
+from app.services.cluster_index import ClusterIndex
+from app.services.retention_service import RetentionService
+
+settings = get_settings()
+
+
+class JobQueueFullError(Exception):
+    """Raised when no more recalculation jobs can be queued"""
+
+
+class AnalysisJobManager:
+    """
+    Runs recalculations on a single in-process worker task, one job at a
+    time in submission order. Every job activates its run, so concurrent jobs
+    would race on the component score refresh and let a slower, older job
+    replace the scores of a newer one; in order, the most recently submitted
+    weights are always activated last. Job state lives in this process only.
+    """
+    
+    _queue: Optional[asyncio.Queue] = None
+    _workers: List[asyncio.Task] = []
+    _jobs: "OrderedDict[str, AnalysisJobResponse]" = OrderedDict()
+    _pending_by_fingerprint: Dict[str, str] = {}
+    _last_job_id: Optional[str] = None
+    
+    @classmethod
+    async def start(cls):
+        """Start the worker"""
+        if cls._workers:
+            return
+        
+        cls._queue = asyncio.Queue(maxsize=settings.ANALYSIS_MAX_QUEUED_JOBS)
+        cls._workers = [asyncio.create_task(cls._worker())]
+        print("Started analysis worker")
+    
+    @classmethod
+    async def stop(cls):
+        """Cancel the worker"""
+        for worker in cls._workers:
+            worker.cancel()
+        await asyncio.gather(*cls._workers, return_exceptions=True)
+        cls._workers = []
+        print("Analysis workers stopped")
+    
+    @classmethod
+    def submit(cls, weights: AnalysisWeights) -> AnalysisJobResponse:
+        """
+        Queue a recalculation job
+        
+        If the most recently submitted job has identical weights and is still
+        queued or running, that job is returned instead of queueing a second
+        one. An older job is never reused, as it would activate its run before
+        the jobs submitted after it.
+        
+        Raises:
+            JobQueueFullError: If ANALYSIS_MAX_QUEUED_JOBS jobs are already waiting
+        """
+        fingerprint = weights.fingerprint()
+        pending_job_id = cls._pending_by_fingerprint.get(fingerprint)
+        if pending_job_id is not None and pending_job_id == cls._last_job_id:
+            MetricsRegistry.increment("analysis_jobs_deduplicated_total")
+            return cls._jobs[pending_job_id]
+        
+        if cls._queue is None:
+            raise RuntimeError("Analysis worker is not running")
+        
+        job = AnalysisJobResponse(
+            job_id=uuid.uuid4().hex,
+            status="queued",
+            weights=weights,
+            created_at=datetime.now()
+        )
+        
+        try:
+            cls._queue.put_nowait(job.job_id)
+        except asyncio.QueueFull:
+            raise JobQueueFullError(
+                f"Too many pending analysis jobs (limit {settings.ANALYSIS_MAX_QUEUED_JOBS})"
+            )
+        
+        cls._jobs[job.job_id] = job
+        cls._pending_by_fingerprint[fingerprint] = job.job_id
+        cls._last_job_id = job.job_id
+        cls._prune_history()
+        MetricsRegistry.increment("analysis_jobs_submitted_total")
+        
+        return job
+    
+    @classmethod
+    def get(cls, job_id: str) -> Optional[AnalysisJobResponse]:
+        """Get a job by id"""
+        return cls._jobs.get(job_id)
+    
+    @classmethod
+    async def _worker(cls):
+        """Take jobs off the queue until cancelled"""
+        while True:
+            job_id = await cls._queue.get()
+            try:
+                await cls._run(cls._jobs[job_id])
+            finally:
+                cls._queue.task_done()
+    
+    @classmethod
+    async def _run(cls, job: AnalysisJobResponse):
+        """Execute one job and record its outcome"""
+        job.status = "running"
+        job.started_at = datetime.now()
+        started = time.perf_counter()
+        
+        def on_progress(stage: str, fraction: float):
+            job.stage = stage
+            job.progress = round(fraction, 3)
+        
+        try:
+            async with get_db_context() as db:
+                result = await AnalysisService.recalculate_all_sites(
+                    db=db,
+                    weights=job.weights,
+                    progress=on_progress
+                )
+            
+            await invalidate_score_caches()
+            await cls._rebuild_clusters()
+            
+            job.sites_analyzed = result.sites_analyzed
+            job.components_refreshed = result.components_refreshed
+            job.run_id = result.run_id
+            job.reused = result.reused
+            job.stage = "completed"
+            job.progress = 1.0
+            job.status = "completed"
+            MetricsRegistry.increment("analysis_jobs_completed_total")
+            if result.reused:
+                MetricsRegistry.increment("analysis_runs_reused_total")
+            else:
+                await cls._evict_runs()
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            MetricsRegistry.increment("analysis_jobs_failed_total")
+            print(f"Analysis job {job.job_id} failed: {e}")
+        finally:
+            job.completed_at = datetime.now()
+            job.duration_seconds = round(time.perf_counter() - started, 3)
+            cls._pending_by_fingerprint.pop(job.weights.fingerprint(), None)
+            MetricsRegistry.record_event(
+                "analysis_job",
+                job_id=job.job_id,
+                status=job.status,
+                duration_seconds=job.duration_seconds,
+                sites_analyzed=job.sites_analyzed
+            )
+    
+    @classmethod
+    async def _rebuild_clusters(cls):
+        """Rebuild the map cluster pyramid for the newly active run"""
+        try:
+            async with get_db_context() as db:
+                await ClusterIndex.ensure_current(db)
+        except Exception as e:
+            print(f"Cluster index rebuild failed: {e}")
+    
+    @classmethod
+    async def _evict_runs(cls):
+        """
+        Apply the retention policy right after a new run was stored, so the
+        number of retained weight profiles stays bounded by RETENTION_KEEP_RUNS
+        with the least recently used runs evicted first
+        """
+        try:
+            async with get_db_context() as db:
+                await RetentionService.compact(db)
+        except Exception as e:
+            MetricsRegistry.increment("retention_failures_total")
+            print(f"Run eviction failed: {e}")
+    
+    @classmethod
+    def _prune_history(cls):
+        """Forget the oldest finished jobs beyond ANALYSIS_JOB_HISTORY"""
+        finished = [
+            job_id for job_id, job in cls._jobs.items()
+            if job.status in ("completed", "failed")
+        ]
+        for job_id in finished[:max(0, len(finished) - settings.ANALYSIS_JOB_HISTORY)]:
+            del cls._jobs[job_id]
@@ -0,0 +1,97 @@
+"""Sparse fieldsets pushed down into site queries"""
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+# Fields of the site list, in response order
+LIST_FIELDS = (
+    "site_id", "site_name", "latitude", "longitude",
+    "region", "land_type", "total_suitability_score",
+    "rank", "analysis_timestamp"
+)
+
+# Fields of the export, in response order
+EXPORT_FIELDS = (
+    "site_id", "site_name", "latitude", "longitude",
+    "area_sqm", "solar_irradiance_kwh", "grid_distance_km",
+    "slope_degrees", "road_distance_km", "elevation_m",
+    "land_type", "region",
+    "solar_irradiance_score", "area_score",
+    "grid_distance_score", "slope_score",
+    "infrastructure_score", "total_suitability_score",
+    "analysis_timestamp"
+)
+
+# Fields whose sites_with_scores column has another name
+FIELD_COLUMNS = {"rank": "score_rank"}
+
+
+class FieldProjection:
+    """
+    Selects only the requested fields in SQL and turns the rows into plain
+    JSON values, either one object per site or one array per field
+    (columnar). Both skip building a Pydantic model per row.
+    """
+    
+    @staticmethod
+    def parse(value: Optional[str], allowed: Sequence[str]) -> List[str]:
+        """
+        Parse a comma-separated field list, all allowed fields if omitted
+        
+        Raises:
+            ValueError: If the list is empty or names an unknown field
+        """
+        if value is None:
+            return list(allowed)
+        
+        fields = []
+        for name in value.split(","):
+            name = name.strip()
+            if name and name not in fields:
+                fields.append(name)
+        
+        if not fields:
+            raise ValueError("fields cannot be empty")
+        unknown = [name for name in fields if name not in allowed]
+        if unknown:
+            raise ValueError(
+                f"Unknown fields: {', '.join(unknown)} (allowed: {', '.join(allowed)})"
+            )
+        return fields
+    
+    @staticmethod
+    def select_list(fields: Iterable[str]) -> str:
+        """SELECT list of the fields, aliased to their field names"""
+        columns = []
+        for name in fields:
+            column = FIELD_COLUMNS.get(name, name)
+            # Quoted, as RANK is a reserved word in MySQL 8
+            columns.append(column if column == name else f"{column} AS `{name}`")
+        return ", ".join(columns)
+    
+    @staticmethod
+    def to_objects(rows: Sequence[Any], fields: Sequence[str]) -> List[Dict[str, Any]]:
+        """One object per row holding the fields"""
+        return [
+            {name: FieldProjection.json_value(row._mapping[name]) for name in fields}
+            for row in rows
+        ]
+    
+    @staticmethod
+    def to_columns(rows: Sequence[Dict[str, Any]], fields: Sequence[str]) -> Dict[str, List[Any]]:
+        """One array per field, aligned by position, from objects or rows"""
+        mappings = [getattr(row, "_mapping", row) for row in rows]
+        return {
+            name: [FieldProjection.json_value(mapping[name]) for mapping in mappings]
+            for name in fields
+        }
+    
+    @staticmethod
+    def json_value(value: Any) -> Any:
+        """Database values as JSON values"""
+        if isinstance(value, Decimal):
+            return float(value)
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return value
@@ -0,0 +1,92 @@
+"""Mergeable quantile sketch for suitability scores"""
+
+import zlib
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# Scores are stored as DECIMAL(5, 2) in [0, 100]: one bin per 0.01
+SKETCH_RESOLUTION = 100
+SKETCH_BINS = 100 * SKETCH_RESOLUTION + 1
+
+
+class QuantileSketch:
+    """
+    Histogram of scores with one bin per representable score value.
+    
+    Because scores have a fixed precision and a bounded domain, the histogram
+    has a constant size (SKETCH_BINS counters) however many sites it covers,
+    merges by adding counters and answers quantile queries exactly, unlike
+    approximate sketches such as t-digest or KLL.
+    """
+    
+    def __init__(self, counts: Optional[np.ndarray] = None):
+        if counts is None:
+            counts = np.zeros(SKETCH_BINS, dtype=np.int64)
+        self.counts = counts
+    
+    @classmethod
+    def from_scores(cls, scores: np.ndarray) -> "QuantileSketch":
+        """Build a sketch from an array of scores"""
+        bins = np.rint(np.clip(scores, 0, 100) * SKETCH_RESOLUTION).astype(np.int64)
+        return cls(np.bincount(bins, minlength=SKETCH_BINS).astype(np.int64))
+    
+    @classmethod
+    def merge_all(cls, sketches: Iterable["QuantileSketch"]) -> "QuantileSketch":
+        """Combine several sketches into a new one"""
+        merged = cls()
+        for sketch in sketches:
+            merged.merge(sketch)
+        return merged
+    
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """Add another sketch's counts to this one"""
+        self.counts += other.counts
+        return self
+    
+    def count(self) -> int:
+        """Number of scores in the sketch"""
+        return int(self.counts.sum())
+    
+    def restrict(
+        self,
+        min_score: Optional[float] = None,
+        max_score: Optional[float] = None
+    ) -> "QuantileSketch":
+        """Sketch of only the scores within [min_score, max_score]"""
+        counts = self.counts.copy()
+        if min_score is not None:
+            counts[:max(0, int(np.ceil(min_score * SKETCH_RESOLUTION - 1e-9)))] = 0
+        if max_score is not None:
+            counts[int(np.floor(max_score * SKETCH_RESOLUTION + 1e-9)) + 1:] = 0
+        return QuantileSketch(counts)
+    
+    def quantiles(self, qs: Sequence[float]) -> List[Optional[float]]:
+        """
+        Scores at the requested quantiles, interpolating linearly between the
+        closest ranks like numpy.quantile; None for an empty sketch
+        """
+        cumulative = np.cumsum(self.counts)
+        total = int(cumulative[-1])
+        if total == 0:
+            return [None for _ in qs]
+        
+        positions = np.asarray(qs, dtype=np.float64) * (total - 1)
+        lower_ranks = np.floor(positions).astype(np.int64)
+        upper_ranks = np.ceil(positions).astype(np.int64)
+        # Bin holding the score of a 0-based rank
+        lower = np.searchsorted(cumulative, lower_ranks, side="right") / SKETCH_RESOLUTION
+        upper = np.searchsorted(cumulative, upper_ranks, side="right") / SKETCH_RESOLUTION
+        values = lower + (upper - lower) * (positions - lower_ranks)
+        
+        return [round(float(value), 2) for value in values]
+    
+    def to_bytes(self) -> bytes:
+        """Compact serialized form for storage"""
+        return zlib.compress(self.counts.astype("<u4").tobytes())
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "QuantileSketch":
+        """Restore a sketch serialized with to_bytes"""
+        counts = np.frombuffer(zlib.decompress(data), dtype="<u4")
+        return cls(counts.astype(np.int64))
@@ -0,0 +1,223 @@
+"""Retention service for compacting analysis history"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+
+from app.config import get_settings
+from app.database import get_db_context
+from app.metrics import MetricsRegistry
+from app.models.schemas import CompactionResult
+from app.services.analysis_service import AnalysisService
+
+settings = get_settings()
+
+
+class RetentionService:
+    """Service for enforcing the analysis history retention policy"""
+    
+    @staticmethod
+    async def find_expired_runs(
+        db: AsyncSession,
+        keep_runs: int,
+        keep_days: int
+    ) -> List[int]:
+        """
+        Find runs that fall outside the retention policy.
+        
+        The active run and runs still in progress are always kept; the active
+        run does not count towards `keep_runs`. Failed runs and runs left
+        half-deleted by an interrupted compaction are always expired. A
+        completed run is expired when it is not among the `keep_runs` most
+        recently used other completed runs or was last used more than
+        `keep_days` ago; a limit of 0 disables that rule. Completed runs are
+        memoized by weight fingerprint, so this also bounds the number of weight
+        profiles that can be reactivated without rescoring (LRU eviction).
+        """
+        active_run_id = await AnalysisService.get_active_run_id(db)
+        
+        query = text("""
+            SELECT run_id, status,
+                   COALESCE(last_used_at, completed_at)
+                       < CURRENT_TIMESTAMP - INTERVAL :keep_days DAY AS is_aged_out
+            FROM analysis_runs
+            ORDER BY COALESCE(last_used_at, completed_at) DESC, run_id DESC
+        """)
+        result = await db.execute(query, {"keep_days": keep_days})
+        
+        expired = []
+        completed_seen = 0
+        
+        for row in result.fetchall():
+            if row.run_id == active_run_id or row.status == "running":
+                continue
+            
+            if row.status in ("failed", "deleting"):
+                expired.append(row.run_id)
+                continue
+            
+            completed_seen += 1
+            if keep_runs > 0 and completed_seen > keep_runs:
+                expired.append(row.run_id)
+            elif keep_days > 0 and row.is_aged_out:
+                expired.append(row.run_id)
+        
+        return expired
+    
+    @staticmethod
+    async def fail_stale_runs(db: AsyncSession, stale_hours: int) -> int:
+        """
+        Mark runs still 'running' after `stale_hours` as failed, so runs
+        abandoned by a crash or restart are expired like any failed run;
+        0 disables this. The caller commits.
+        
+        Returns:
+            Number of runs marked failed
+        """
+        if stale_hours <= 0:
+            return 0
+        
+        query = text("""
+            UPDATE analysis_runs
+            SET status = 'failed',
+                completed_at = CURRENT_TIMESTAMP
+            WHERE status = 'running'
+              AND started_at < CURRENT_TIMESTAMP - INTERVAL :stale_hours HOUR
+        """)
+        result = await db.execute(query, {"stale_hours": stale_hours})
+        return result.rowcount
+    
+    @staticmethod
+    async def delete_run(db: AsyncSession, run_id: int, batch_size: int) -> Optional[int]:
+        """
+        Delete a run and its results, committing after every batch so no
+        single transaction holds row locks on more than `batch_size` rows.
+        
+        The run is first moved to 'deleting' in its own transaction, which only
+        succeeds while it is not the active run. From then on it can no longer
+        be memoized or activated, so no reader ever sees a partially deleted
+        run. The run is skipped when it was activated since it was found.
+        
+        Returns:
+            Number of analysis_results rows deleted, or None if the run was skipped
+        """
+        # NOT EXISTS rather than NOT IN, as active_run_id may be NULL
+        mark_query = text("""
+            UPDATE analysis_runs
+            SET status = 'deleting'
+            WHERE run_id = :run_id
+              AND status IN ('completed', 'failed', 'deleting')
+              AND NOT EXISTS (
+                  SELECT 1
+                  FROM analysis_state
+                  WHERE state_id = 1 AND active_run_id = :run_id
+              )
+        """)
+        result = await db.execute(mark_query, {"run_id": run_id})
+        await db.commit()
+        if result.rowcount == 0:
+            return None
+        
+        delete_results_query = text("""
+            DELETE FROM analysis_results
+            WHERE run_id = :run_id
+            LIMIT :batch_size
+        """)
+        
+        rows_deleted = 0
+        while True:
+            result = await db.execute(delete_results_query, {
+                "run_id": run_id,
+                "batch_size": batch_size
+            })
+            await db.commit()
+            rows_deleted += result.rowcount
+            if result.rowcount < batch_size:
+                break
+        
+        delete_run_query = text("DELETE FROM analysis_runs WHERE run_id = :run_id")
+        await db.execute(delete_run_query, {"run_id": run_id})
+        await db.commit()
+        
+        return rows_deleted
+    
+    @staticmethod
+    async def compact(
+        db: AsyncSession,
+        keep_runs: Optional[int] = None,
+        keep_days: Optional[int] = None,
+        batch_size: Optional[int] = None
+    ) -> CompactionResult:
+        """
+        Delete every run outside the retention policy and record the
+        compaction in the metrics registry
+        
+        Args:
+            db: Database session
+            keep_runs: Number of completed runs to keep (default: from settings)
+            keep_days: Age in days after which runs are dropped (default: from settings)
+            batch_size: Rows deleted per transaction (default: from settings)
+        """
+        keep_runs = settings.RETENTION_KEEP_RUNS if keep_runs is None else keep_runs
+        keep_days = settings.RETENTION_KEEP_DAYS if keep_days is None else keep_days
+        batch_size = batch_size or settings.RETENTION_BATCH_SIZE
+        
+        started = time.perf_counter()
+        await RetentionService.fail_stale_runs(db, settings.RETENTION_STALE_RUN_HOURS)
+        expired_runs = await RetentionService.find_expired_runs(db, keep_runs, keep_days)
+        # Release the snapshot taken by the lookup before deleting
+        await db.commit()
+        
+        rows_deleted = 0
+        deleted_runs = []
+        for run_id in expired_runs:
+            run_rows = await RetentionService.delete_run(db, run_id, batch_size)
+            if run_rows is None:
+                continue
+            rows_deleted += run_rows
+            deleted_runs.append(run_id)
+        
+        duration = time.perf_counter() - started
+        
+        MetricsRegistry.increment("retention_compactions_total")
+        MetricsRegistry.increment("retention_runs_deleted_total", len(deleted_runs))
+        MetricsRegistry.increment("retention_rows_deleted_total", rows_deleted)
+        MetricsRegistry.record_event(
+            "retention_compaction",
+            runs_deleted=len(deleted_runs),
+            rows_deleted=rows_deleted,
+            duration_seconds=round(duration, 3)
+        )
+        
+        return CompactionResult(
+            runs_deleted=len(deleted_runs),
+            rows_deleted=rows_deleted,
+            run_ids=deleted_runs,
+            duration_seconds=round(duration, 3),
+            timestamp=datetime.now()
+        )
+    
+    @staticmethod
+    async def run_periodically(interval_seconds: Optional[int] = None):
+        """
+        Compact the analysis history every `interval_seconds` until cancelled.
+        Meant to be started as a background task from the application lifespan.
+        """
+        interval_seconds = interval_seconds or settings.RETENTION_INTERVAL_SECONDS
+        
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                async with get_db_context() as db:
+                    result = await RetentionService.compact(db)
+                print(
+                    f"Retention compaction removed {result.runs_deleted} runs "
+                    f"({result.rows_deleted} result rows) in {result.duration_seconds}s"
+                )
+            except Exception as e:
+                MetricsRegistry.increment("retention_failures_total")
+                print(f"Retention compaction failed: {e}")
@@ -0,0 +1,248 @@
+"""Precomputed per-run statistics snapshots"""
+
+import json
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+
+from app.config import get_settings
+from app.models.schemas import StatisticsResponse, PercentileValue, PercentilesResponse
+from app.services.statistics_engine import StatisticsEngine, ScoreBand
+from app.services.quantile_sketch import QuantileSketch, SKETCH_RESOLUTION
+from app.services.aggregate_cube import AggregateCube
+
+settings = get_settings()
+
+
+class RunSummaryService:
+    """
+    Stores the StatisticsResponse of every run for the unfiltered case and a
+    grid of min_score/max_score bands, so /api/statistics can be served with a
+    single primary key lookup, plus a quantile sketch per region and land type
+    that percentile queries merge instead of reading every score
+    """
+    
+    @staticmethod
+    def band_grid() -> List[ScoreBand]:
+        """
+        Every score band snapshotted for a run: the unfiltered case plus all
+        combinations of multiples of STATISTICS_BAND_STEP as bounds
+        """
+        step = settings.STATISTICS_BAND_STEP
+        bounds = [None]
+        if step > 0:
+            bounds += [float(value) for value in range(0, 101, step)]
+        
+        return [
+            (min_score, max_score)
+            for min_score in bounds
+            for max_score in bounds
+            if min_score is None or max_score is None or min_score <= max_score
+        ]
+    
+    @staticmethod
+    def band_key(min_score: Optional[float], max_score: Optional[float]) -> str:
+        """Canonical key of a score band, e.g. '60:*'"""
+        def format_bound(value: Optional[float]) -> str:
+            return "*" if value is None else f"{value:g}"
+        
+        return f"{format_bound(min_score)}:{format_bound(max_score)}"
+    
+    @staticmethod
+    async def build_snapshots(db: AsyncSession, run_id: int) -> int:
+        """
+        Compute and store the statistics of every band in the grid, the
+        quantile sketches and the aggregate cube for a run. Must be called
+        after the run's results are written and it is marked completed;
+        the caller commits.
+        
+        Returns:
+            Number of snapshots stored
+        """
+        rows_query = text("""
+            SELECT
+                s.site_id, s.site_name, s.latitude, s.longitude,
+                s.region, s.land_type, ar.total_suitability_score,
+                r.completed_at AS analysis_timestamp
+            FROM sites s
+            LEFT JOIN analysis_results ar
+                ON ar.site_id = s.site_id AND ar.run_id = :run_id
+            LEFT JOIN analysis_runs r ON r.run_id = ar.run_id
+        """)
+        result = await db.execute(rows_query, {"run_id": run_id})
+        rows = result.fetchall()
+        
+        bands = RunSummaryService.band_grid()
+        responses = StatisticsEngine.build_bands(rows, bands)
+        
+        await RunSummaryService._store_sketches(db, run_id, rows)
+        await AggregateCube.store(db, run_id, rows)
+        
+        delete_query = text("DELETE FROM analysis_run_statistics WHERE run_id = :run_id")
+        await db.execute(delete_query, {"run_id": run_id})
+        
+        insert_query = text("""
+            INSERT INTO analysis_run_statistics (
+                run_id, band_key, statistics
+            ) VALUES (
+                :run_id, :band_key, :statistics
+            )
+        """)
+        await db.execute(insert_query, [
+            {
+                "run_id": run_id,
+                "band_key": RunSummaryService.band_key(*band),
+                "statistics": response.model_dump_json()
+            }
+            for band, response in zip(bands, responses)
+        ])
+        
+        return len(bands)
+    
+    @staticmethod
+    async def get_snapshot(
+        db: AsyncSession,
+        min_score: Optional[float] = None,
+        max_score: Optional[float] = None
+    ) -> Optional[StatisticsResponse]:
+        """
+        Get the stored statistics of the active run for a score band, or None
+        if the band is not in the grid or the run has no snapshot
+        """
+        query = text("""
+            SELECT rs.statistics
+            FROM analysis_state st
+            JOIN analysis_run_statistics rs
+                ON rs.run_id = st.active_run_id AND rs.band_key = :band_key
+            WHERE st.state_id = 1
+        """)
+        result = await db.execute(query, {
+            "band_key": RunSummaryService.band_key(min_score, max_score)
+        })
+        snapshot = result.scalar()
+        
+        if snapshot is None:
+            return None
+        
+        return StatisticsResponse.model_validate(json.loads(snapshot))
+    
+    @staticmethod
+    async def _store_sketches(db: AsyncSession, run_id: int, rows: Sequence):
+        """
+        Store one quantile sketch per (region, land_type) of a run's scores;
+        labels the primary key collation treats as equal share a sketch
+        """
+        scores_by_cell: Dict[Tuple[str, str], List[float]] = defaultdict(list)
+        labels: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        for row in rows:
+            if row.total_suitability_score is not None:
+                cell = (
+                    AggregateCube.collation_key(row.region),
+                    AggregateCube.collation_key(row.land_type)
+                )
+                labels.setdefault(cell, (row.region, row.land_type))
+                scores_by_cell[cell].append(float(row.total_suitability_score))
+        
+        delete_query = text("DELETE FROM analysis_run_sketches WHERE run_id = :run_id")
+        await db.execute(delete_query, {"run_id": run_id})
+        
+        if not scores_by_cell:
+            return
+        
+        insert_query = text("""
+            INSERT INTO analysis_run_sketches (
+                run_id, region, land_type, site_count, histogram
+            ) VALUES (
+                :run_id, :region, :land_type, :site_count, :histogram
+            )
+        """)
+        await db.execute(insert_query, [
+            {
+                "run_id": run_id,
+                "region": labels[cell][0],
+                "land_type": labels[cell][1],
+                "site_count": len(scores),
+                "histogram": QuantileSketch.from_scores(np.array(scores)).to_bytes()
+            }
+            for cell, scores in scores_by_cell.items()
+        ])
+    
+    @staticmethod
+    async def get_percentiles(
+        db: AsyncSession,
+        quantiles: List[float],
+        region: Optional[str] = None,
+        land_type: Optional[str] = None,
+        min_score: Optional[float] = None,
+        max_score: Optional[float] = None
+    ) -> PercentilesResponse:
+        """
+        Score percentiles of the active run, merging the stored sketches of the
+        matching region/land type cells; the score range is applied to the
+        merged sketch. Falls back to a grouped histogram query when the active
+        run has no sketches.
+        """
+        conditions = []
+        params = {}
+        if region is not None:
+            conditions.append("region = :region")
+            params["region"] = region
+        if land_type is not None:
+            conditions.append("land_type = :land_type")
+            params["land_type"] = land_type
+        
+        sketch_where = "".join(f" AND sk.{condition}" for condition in conditions)
+        sketch_query = text(f"""
+            SELECT sk.histogram
+            FROM analysis_state st
+            JOIN analysis_run_sketches sk ON sk.run_id = st.active_run_id
+            WHERE st.state_id = 1{sketch_where}
+        """)
+        result = await db.execute(sketch_query, params)
+        histograms = [row.histogram for row in result.fetchall()]
+        
+        if histograms:
+            sketch = QuantileSketch.merge_all(
+                QuantileSketch.from_bytes(histogram) for histogram in histograms
+            )
+        else:
+            sketch = await RunSummaryService._histogram_from_scores(db, conditions, params)
+        
+        sketch = sketch.restrict(min_score, max_score)
+        
+        return PercentilesResponse(
+            sites_analyzed=sketch.count(),
+            region=region,
+            land_type=land_type,
+            min_score=min_score,
+            max_score=max_score,
+            percentiles=[
+                PercentileValue(quantile=quantile, score=score)
+                for quantile, score in zip(quantiles, sketch.quantiles(quantiles))
+            ]
+        )
+    
+    @staticmethod
+    async def _histogram_from_scores(
+        db: AsyncSession,
+        conditions: List[str],
+        params: Dict[str, str]
+    ) -> QuantileSketch:
+        """Build a sketch with a grouped count query instead of reading every score"""
+        where_clause = "".join(f" AND {condition}" for condition in conditions)
+        query = text(f"""
+            SELECT ROUND(total_suitability_score * {SKETCH_RESOLUTION}) AS score_bin,
+                   COUNT(*) AS site_count
+            FROM sites_with_scores
+            WHERE total_suitability_score IS NOT NULL{where_clause}
+            GROUP BY score_bin
+        """)
+        result = await db.execute(query, params)
+        
+        sketch = QuantileSketch()
+        for row in result.fetchall():
+            sketch.counts[int(row.score_bin)] += row.site_count
+        return sketch
@@ -0,0 +1,155 @@
+"""Vectorized scoring engine for bulk suitability calculations"""
+
+from typing import Sequence, Tuple
+
+import numpy as np
+
+from app.models.schemas import AnalysisWeights
+
+
+# Order of the component score columns in every score matrix produced here
+COMPONENT_COLUMNS: Tuple[str, ...] = (
+    "solar_irradiance_score",
+    "area_score",
+    "grid_distance_score",
+    "slope_score",
+    "infrastructure_score",
+)
+
+# Order of the site attribute columns consumed by compute_component_scores;
+# sites.attributes_hash in databaseschema.sql hashes the same columns
+INPUT_COLUMNS: Tuple[str, ...] = (
+    "solar_irradiance_kwh",
+    "area_sqm",
+    "grid_distance_km",
+    "slope_degrees",
+    "road_distance_km",
+)
+
+
+class ScoringEngine:
+    """
+    Columnar counterpart of the per-site AnalysisService.calculate_*_score
+    functions. Every method operates on whole NumPy arrays at once.
+    """
+
+    @staticmethod
+    def round_scores(values: np.ndarray) -> np.ndarray:
+        """Round to 2 decimals, half away from zero, like MySQL DECIMAL(5, 2)"""
+        return np.floor(values * 100 + 0.5) / 100
+
+    @staticmethod
+    def calculate_solar_scores(solar_irradiance: np.ndarray) -> np.ndarray:
+        """Solar irradiance scores: 0 below 3.0, 100 at or above 5.5 kWh/m²/day"""
+        return np.clip((solar_irradiance - 3.0) / 2.5 * 100, 0.0, 100.0)
+
+    @staticmethod
+    def calculate_area_scores(area: np.ndarray) -> np.ndarray:
+        """Area scores: 0 below 5,000 m², 100 at or above 50,000 m²"""
+        return np.clip((area - 5000) / 45000 * 100, 0.0, 100.0)
+
+    @staticmethod
+    def calculate_grid_distance_scores(distance: np.ndarray) -> np.ndarray:
+        """Grid distance scores: 100 within 1 km, 0 at or beyond 20 km"""
+        return np.clip(100 - (distance - 1) / 19 * 100, 0.0, 100.0)
+
+    @staticmethod
+    def calculate_slope_scores(slope: np.ndarray) -> np.ndarray:
+        """Slope scores: 100 up to 5°, 50 at 15°, 0 beyond 20°"""
+        scores = np.where(
+            slope <= 15,
+            100 - (slope - 5) / 10 * 50,
+            50 - (slope - 15) / 5 * 50
+        )
+        return np.clip(scores, 0.0, 100.0)
+
+    @staticmethod
+    def calculate_infrastructure_scores(road_distance: np.ndarray) -> np.ndarray:
+        """Infrastructure scores: 100 within 0.5 km of a road, 0 at or beyond 5 km"""
+        return np.clip(100 - (road_distance - 0.5) / 4.5 * 100, 0.0, 100.0)
+
+    @staticmethod
+    def compute_component_scores(attributes: np.ndarray) -> np.ndarray:
+        """
+        Calculate all five component scores
+
+        Args:
+            attributes: (n, 5) array with columns in INPUT_COLUMNS order
+
+        Returns:
+            (n, 5) array with columns in COMPONENT_COLUMNS order,
+            rounded to the stored precision
+        """
+        attributes = np.asarray(attributes, dtype=np.float64).reshape(-1, len(INPUT_COLUMNS))
+        components = np.column_stack([
+            ScoringEngine.calculate_solar_scores(attributes[:, 0]),
+            ScoringEngine.calculate_area_scores(attributes[:, 1]),
+            ScoringEngine.calculate_grid_distance_scores(attributes[:, 2]),
+            ScoringEngine.calculate_slope_scores(attributes[:, 3]),
+            ScoringEngine.calculate_infrastructure_scores(attributes[:, 4]),
+        ])
+        return ScoringEngine.round_scores(components)
+
+    @staticmethod
+    def weights_vector(weights: AnalysisWeights) -> np.ndarray:
+        """Weights as a vector aligned with COMPONENT_COLUMNS"""
+        return np.array([
+            weights.solar,
+            weights.area,
+            weights.grid_distance,
+            weights.slope,
+            weights.infrastructure,
+        ], dtype=np.float64)
+
+    @staticmethod
+    def compute_total_scores(components: np.ndarray, weights: AnalysisWeights) -> np.ndarray:
+        """Weighted total suitability scores for an (n, 5) component matrix"""
+        totals = components @ ScoringEngine.weights_vector(weights)
+        return ScoringEngine.round_scores(totals)
+    
+    @staticmethod
+    def compute_profile_scores(
+        components: np.ndarray,
+        profiles: Sequence[AnalysisWeights]
+    ) -> np.ndarray:
+        """
+        Score every site against several weight profiles at once
+        
+        Args:
+            components: (n, 5) component matrix
+            profiles: p weight profiles
+        
+        Returns:
+            (n, p) matrix of rounded total scores, one column per profile
+        """
+        # One matrix-vector product per profile, summed in the same order as
+        # compute_total_scores so a what-if score equals the persisted one; a
+        # single matrix product may round a half-cent differently
+        return np.column_stack([
+            ScoringEngine.compute_total_scores(components, weights) for weights in profiles
+        ]).reshape(len(components), len(profiles))
+    
+    @staticmethod
+    def top_k_indices(scores: np.ndarray, site_ids: np.ndarray, k: int) -> np.ndarray:
+        """
+        Indices of the k highest scores, best first, ties broken by site_id,
+        using partial selection instead of a full sort
+        """
+        k = min(k, len(scores))
+        if k == 0:
+            return np.empty(0, dtype=np.int64)
+        
+        # Everything scoring at least the k-th best value, including ties
+        kth_score = np.partition(scores, len(scores) - k)[len(scores) - k]
+        candidates = np.flatnonzero(scores >= kth_score)
+        order = np.lexsort((site_ids[candidates], -scores[candidates]))
+        return candidates[order[:k]]
+    
+    @staticmethod
+    def dense_ranks(scores: np.ndarray) -> np.ndarray:
+        """
+        Dense rank of every score, 1 for the highest; equal scores share a
+        rank and the next lower score gets the next rank
+        """
+        distinct = np.unique(scores)
+        return len(distinct) - np.searchsorted(distinct, scores)
@@ -0,0 +1,247 @@
+"""In-memory spatial index for nearest-neighbour site lookups"""
+
+import asyncio
+import math
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+
+from app.services.analysis_service import AnalysisService
+from app.services.spatial import EARTH_RADIUS_KM
+
+# Average number of sites per occupied grid cell the cell size aims for
+SITES_PER_CELL = 8
+
+# Shells up to this ring keep their cell offsets for later queries
+CACHED_SHELL_RINGS = 16
+
+
+class SiteLocator:
+    """
+    Process-local uniform grid over the sites' positions on the unit sphere.
+    
+    Sites are projected to 3D unit vectors, where straight-line (chord)
+    distance grows monotonically with great-circle distance, so the grid
+    answers exact k-nearest queries by visiting cells in growing shells
+    around the query site and stopping once no unvisited cell can hold a
+    closer site. A shell with more cells than there are sites (isolated
+    sites, large k) is not enumerated; all sites are scanned instead. The grid is built at startup and rebuilt whenever
+    analysis_state.sites_version changes, which triggers on sites move on
+    every insert, delete and changing update of a site.
+    """
+    
+    _site_ids: np.ndarray = np.empty(0, dtype=np.int64)
+    _points: np.ndarray = np.empty((0, 3))
+    _positions: Dict[int, int] = {}
+    _origin: np.ndarray = np.zeros(3)
+    _cell_size: float = 1.0
+    _shape: np.ndarray = np.ones(3, dtype=np.int64)
+    _cell_keys: np.ndarray = np.empty(0, dtype=np.int64)
+    _cell_starts: np.ndarray = np.zeros(1, dtype=np.int64)
+    _order: np.ndarray = np.empty(0, dtype=np.int64)
+    _shells: Dict[int, np.ndarray] = {}
+    _version: Optional[int] = None
+    _lock: asyncio.Lock = asyncio.Lock()
+    
+    @classmethod
+    async def ensure_current(cls, db: AsyncSession):
+        """Rebuild the grid if site data changed since it was built"""
+        version = await AnalysisService.get_sites_version(db)
+        if version == cls._version:
+            return
+        
+        async with cls._lock:
+            if version == cls._version:
+                return
+            query = text("SELECT site_id, latitude, longitude FROM sites ORDER BY site_id")
+            result = await db.execute(query)
+            rows = result.fetchall()
+            cls.build(
+                np.array([row.site_id for row in rows], dtype=np.int64),
+                np.array([float(row.latitude) for row in rows]),
+                np.array([float(row.longitude) for row in rows]),
+                version
+            )
+            print(f"Site locator rebuilt for {len(rows)} sites (version {version})")
+    
+    @classmethod
+    def build(
+        cls,
+        site_ids: np.ndarray,
+        latitudes: np.ndarray,
+        longitudes: np.ndarray,
+        version: Optional[int] = None
+    ):
+        """
+        Replace the grid contents
+        
+        Args:
+            site_ids: Site ids
+            latitudes: Latitudes in degrees aligned with site_ids
+            longitudes: Longitudes in degrees aligned with site_ids
+            version: sites_version the sites were loaded at
+        """
+        points = cls.to_unit_vectors(latitudes, longitudes)
+        count = len(site_ids)
+        
+        if count:
+            origin = points.min(axis=0)
+            extent = float((points.max(axis=0) - origin).max())
+        else:
+            origin = np.zeros(3)
+            extent = 0.0
+        
+        # Sites lie on a surface, so occupied cells grow with the square of
+        # the cells per axis
+        cells_per_axis = max(1, math.ceil(math.sqrt(count / SITES_PER_CELL)))
+        cell_size = extent / cells_per_axis if extent > 0 else 1.0
+        
+        cells = np.floor((points - origin) / cell_size).astype(np.int64)
+        shape = cells.max(axis=0) + 1 if count else np.ones(3, dtype=np.int64)
+        keys = cls._cell_key(cells, shape)
+        order = np.argsort(keys, kind="stable")
+        cell_keys, cell_starts = np.unique(keys[order], return_index=True)
+        
+        cls._site_ids = site_ids
+        cls._points = points
+        cls._positions = {site_id: index for index, site_id in enumerate(site_ids.tolist())}
+        cls._origin = origin
+        cls._cell_size = cell_size
+        cls._shape = shape
+        cls._cell_keys = cell_keys
+        cls._cell_starts = np.append(cell_starts, count)
+        cls._order = order
+        cls._shells = {}
+        cls._version = version
+    
+    @classmethod
+    def contains(cls, site_id: int) -> bool:
+        """Whether a site is in the grid"""
+        return site_id in cls._positions
+    
+    @classmethod
+    def nearest(cls, site_id: int, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the k sites closest to a site, ties broken by site_id
+        
+        Returns:
+            (site_ids, distances_km), closest first; the site itself is excluded
+        
+        Raises:
+            KeyError: If the site is not in the grid
+        """
+        position = cls._positions[site_id]
+        k = min(k, len(cls._site_ids) - 1)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        
+        point = cls._points[position]
+        center = np.floor((point - cls._origin) / cls._cell_size).astype(np.int64)
+        
+        candidates = []
+        ring = 0
+        max_ring = int(cls._shape.max())
+        while True:
+            if cls._shell_cell_count(ring) > len(cls._site_ids):
+                indices = np.delete(np.arange(len(cls._site_ids)), position)
+                chords = np.linalg.norm(cls._points[indices] - point, axis=1)
+                order = np.lexsort((cls._site_ids[indices], chords))[:k]
+                break
+            
+            candidates.append(cls._sites_in_shell(center, ring))
+            indices = np.concatenate(candidates)
+            indices = indices[indices != position]
+            
+            if len(indices) >= k or ring >= max_ring:
+                chords = np.linalg.norm(cls._points[indices] - point, axis=1)
+                order = np.lexsort((cls._site_ids[indices], chords))[:k]
+                # Any site outside the visited cells is at least ring cells away
+                if ring >= max_ring or chords[order[-1]] <= ring * cls._cell_size:
+                    break
+            ring += 1
+        
+        distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(chords[order] / 2, 1.0))
+        return cls._site_ids[indices[order]], distances
+    
+    @classmethod
+    def size(cls) -> int:
+        """Number of indexed sites"""
+        return len(cls._site_ids)
+    
+    @staticmethod
+    def to_unit_vectors(latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+        """Project latitude/longitude in degrees onto the unit sphere"""
+        lat = np.radians(latitudes)
+        lon = np.radians(longitudes)
+        return np.column_stack([
+            np.cos(lat) * np.cos(lon),
+            np.cos(lat) * np.sin(lon),
+            np.sin(lat)
+        ])
+    
+    @classmethod
+    def _sites_in_shell(cls, center: np.ndarray, ring: int) -> np.ndarray:
+        """Indices of the sites in cells exactly ring cells from center"""
+        cells = center + cls._shell_offsets(ring)
+        inside = np.all((cells >= 0) & (cells < cls._shape), axis=1)
+        keys = cls._cell_key(cells[inside], cls._shape)
+        
+        # Keep only the cells that hold sites
+        slots = np.searchsorted(cls._cell_keys, keys)
+        found = slots < len(cls._cell_keys)
+        found[found] = cls._cell_keys[slots[found]] == keys[found]
+        slots = slots[found]
+        if len(slots) == 0:
+            return np.empty(0, dtype=np.int64)
+        
+        return np.concatenate([
+            cls._order[cls._cell_starts[slot]:cls._cell_starts[slot + 1]]
+            for slot in slots.tolist()
+        ])
+    
+    @staticmethod
+    def _shell_cell_count(ring: int) -> int:
+        """Number of cells exactly ring cells from a cell"""
+        return 24 * ring * ring + 2 if ring else 1
+    
+    @classmethod
+    def _shell_offsets(cls, ring: int) -> np.ndarray:
+        """
+        Cell offsets whose largest coordinate is exactly ring, built face by
+        face so only the shell itself is allocated
+        """
+        offsets = cls._shells.get(ring)
+        if offsets is not None:
+            return offsets
+        
+        if ring == 0:
+            offsets = np.zeros((1, 3), dtype=np.int64)
+        else:
+            full = np.arange(-ring, ring + 1)
+            inner = np.arange(-ring + 1, ring)
+            # x = +-ring faces are whole, the y and z faces skip their shared edges
+            x_face = SiteLocator._plane(full, full)
+            y_face = SiteLocator._plane(inner, full)
+            z_face = SiteLocator._plane(inner, inner)
+            faces = []
+            for side in (-ring, ring):
+                faces.append(np.insert(x_face, 0, side, axis=1))
+                faces.append(np.insert(y_face, 1, side, axis=1))
+                faces.append(np.insert(z_face, 2, side, axis=1))
+            offsets = np.concatenate(faces)
+        
+        if ring <= CACHED_SHELL_RINGS:
+            cls._shells[ring] = offsets
+        return offsets
+    
+    @staticmethod
+    def _plane(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+        """Every (first, second) pair as an (n, 2) array"""
+        return np.stack(np.meshgrid(first, second, indexing="ij"), axis=-1).reshape(-1, 2)
+    
+    @staticmethod
+    def _cell_key(cells: np.ndarray, shape: np.ndarray) -> np.ndarray:
+        """Flatten 3D cell coordinates into one sortable key"""
+        return (cells[:, 0] * shape[1] + cells[:, 1]) * shape[2] + cells[:, 2]
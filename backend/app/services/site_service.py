@@ -1,19 +1,51 @@
 """Site service for database operations"""
 
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Sequence, Tuple
+import base64
+import json
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text
-import statistics
+from sqlalchemy import text, bindparam
+from sqlalchemy.sql.elements import TextClause
+import numpy as np
 
+from app.config import get_settings
+from app.database import gather_queries
 from app.models.schemas import (
     SiteResponse,
     SiteDetailResponse,
     SiteListResponse,
-    StatisticsResponse,
-    ScoreDistribution,
-    RegionalStats,
-    LandTypeStats
+    TopSitesResponse,
+    NearbySiteResponse,
+    NearestSitesResponse,
+    ClusterResponse,
+    AnalysisWeights,
+    StatisticsResponse
 )
+from app.services.component_index import ComponentIndex
+from app.services.site_locator import SiteLocator
+from app.services.cluster_index import ClusterIndex
+from app.services.statistics_engine import StatisticsEngine
+from app.services.spatial import SpatialFilter, BoundingBox
+from app.services.filters import SiteFilter, FILTER_FROM
+from app.services.analysis_service import AnalysisService
+from app.services.projection import FieldProjection, LIST_FIELDS, EXPORT_FIELDS
+
+settings = get_settings()
+
+# Columns of a site detail
+DETAIL_COLUMNS = """
+    site_id, site_name, latitude, longitude,
+    area_sqm, solar_irradiance_kwh, grid_distance_km,
+    slope_degrees, road_distance_km, elevation_m,
+    land_type, region,
+    solar_irradiance_score, area_score,
+    grid_distance_score, slope_score,
+    infrastructure_score, total_suitability_score,
+    score_rank, ranked_sites, analysis_timestamp
+"""
+
+# Smallest site_id range worth its own connection when scanning for statistics
+MIN_SHARD_SITES = 50000
 
 
 class SiteService:
@@ -22,53 +54,405 @@ class SiteService:
     @staticmethod
     async def get_sites(
         db: AsyncSession,
-        min_score: Optional[float] = None,
-        max_score: Optional[float] = None,
+        filters: Optional[SiteFilter] = None,
         limit: int = 50,
-        offset: int = 0
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
+        known_total: Optional[int] = None
     ) -> SiteListResponse:
         """
         Get all sites with optional filtering and pagination
+        
+        Sites are ordered by score (best first, unscored last) and site_id.
+        With a cursor from a previous page's next_cursor, the page starts right
+        after that page's last site (keyset pagination), so deep pages cost
+        the same as the first one; offset is ignored then.
+        
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        rows, total, next_cursor = await SiteService._fetch_page(
+            db, FieldProjection.select_list(LIST_FIELDS), filters,
+            limit, offset, cursor, include_total, known_total
+        )
+        
+        sites = [
+            SiteResponse(
+                site_id=row.site_id,
+                site_name=row.site_name,
+                latitude=float(row.latitude),
+                longitude=float(row.longitude),
+                region=row.region,
+                land_type=row.land_type,
+                total_suitability_score=float(row.total_suitability_score) if row.total_suitability_score else None,
+                rank=row.rank,
+                analysis_timestamp=row.analysis_timestamp
+            )
+            for row in rows
+        ]
+        
+        return SiteListResponse(
+            total=total if include_total else None,
+            limit=limit,
+            offset=offset if cursor is None else 0,
+            next_cursor=next_cursor,
+            sites=sites
+        )
+    
+    @staticmethod
+    async def get_site_fields(
+        db: AsyncSession,
+        fields: List[str],
+        columnar: bool = False,
+        filters: Optional[SiteFilter] = None,
+        limit: int = 50,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
+        known_total: Optional[int] = None
+    ) -> Dict[str, Any]:
         """
-        # Build WHERE clause
-        where_conditions = []
-        params = {"limit": limit, "offset": offset}
+        Same page as get_sites, reading only the requested fields and returned
+        as plain JSON: "sites" holds one object per site, or with columnar
+        "columns" holds one array per field
         
-        if min_score is not None:
-            where_conditions.append("total_suitability_score >= :min_score")
-            params["min_score"] = min_score
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        # The cursor is built from the sort keys, so they are always read
+        selected = list(fields) + [
+            name for name in ("total_suitability_score", "site_id") if name not in fields
+        ]
+        rows, total, next_cursor = await SiteService._fetch_page(
+            db, FieldProjection.select_list(selected), filters,
+            limit, offset, cursor, include_total, known_total
+        )
+        
+        result = {
+            "total": total if include_total else None,
+            "limit": limit,
+            "offset": offset if cursor is None else 0,
+            "next_cursor": next_cursor,
+            "fields": fields
+        }
+        if columnar:
+            result["columns"] = FieldProjection.to_columns(rows, fields)
+        else:
+            result["sites"] = FieldProjection.to_objects(rows, fields)
+        return result
+    
+    @staticmethod
+    async def _fetch_page(
+        db: AsyncSession,
+        select_list: str,
+        filters: Optional[SiteFilter],
+        limit: int,
+        offset: int,
+        cursor: Optional[str],
+        include_total: bool,
+        known_total: Optional[int]
+    ) -> Tuple[List[Any], Optional[int], Optional[str]]:
+        """
+        Rows of one page of sites_with_scores, the total if requested and the
+        next page's cursor; select_list must include the sort keys
+        
+        Scored sites are paged straight from the active run's results in the
+        order of its (run_id, total_suitability_score, site_id) index, and
+        only the sites on the page are joined with the other tables. Unscored
+        sites follow as a separate segment ordered by site_id, read only once
+        the scored sites are exhausted and never with a score filter.
+        """
+        filters = filters or SiteFilter()
+        run_id = await AnalysisService.get_active_run_id(db)
+        params = {"run_id": run_id}
+        where_conditions = filters.conditions(params)
         
-        if max_score is not None:
-            where_conditions.append("total_suitability_score <= :max_score")
-            params["max_score"] = max_score
+        last_score, last_site_id = None, None
+        if cursor is not None:
+            last_score, last_site_id = SiteService._decode_cursor(cursor)
         
-        where_clause = ""
+        count_where_clause = ""
         if where_conditions:
-            where_clause = "WHERE " + " AND ".join(where_conditions)
+            count_where_clause = "WHERE " + " AND ".join(where_conditions)
         
         # Count query
         count_query = text(f"""
             SELECT COUNT(*) as total
-            FROM sites_with_scores
-            {where_clause}
+            FROM {FILTER_FROM}
+            {count_where_clause}
+        """)
+        
+        total = known_total
+        rows = []
+        
+        # Scored segment; one extra row tells whether another page follows
+        if run_id is not None and (cursor is None or last_score is not None):
+            scored_params = {**params, "limit": limit + 1, "offset": offset}
+            scored_conditions = ["ar.run_id = :run_id"] + where_conditions
+            if cursor is not None:
+                scored_params.update(offset=0, last_score=last_score, last_site_id=last_site_id)
+                scored_conditions.append("""(
+                    ar.total_suitability_score < :last_score
+                    OR (ar.total_suitability_score = :last_score AND ar.site_id > :last_site_id)
+                )""")
+            
+            scored_query = text(f"""
+                SELECT {select_list}
+                FROM (
+                    SELECT ar.site_id AS page_site_id, ar.total_suitability_score AS page_score
+                    FROM analysis_results ar
+                    JOIN sites s ON s.site_id = ar.site_id
+                    WHERE {" AND ".join(scored_conditions)}
+                    ORDER BY ar.total_suitability_score DESC, ar.site_id ASC
+                    LIMIT :limit OFFSET :offset
+                ) page
+                JOIN sites_with_scores ON sites_with_scores.site_id = page.page_site_id
+                ORDER BY page.page_score DESC, page.page_site_id ASC
+            """)
+            rows, total = await SiteService._fetch_with_total(
+                db, "sites_page", scored_query, scored_params,
+                count_query, params, include_total, total
+            )
+        
+        # Unscored segment, once the page is not filled by scored sites
+        if len(rows) <= limit and not filters.has_score_range():
+            tail_params = {**params, "limit": limit + 1 - len(rows), "offset": 0}
+            tail_conditions = ["ar.site_id IS NULL"] + where_conditions
+            if cursor is not None and last_score is None:
+                tail_params["last_site_id"] = last_site_id
+                tail_conditions.append("s.site_id > :last_site_id")
+            elif cursor is None and not rows and offset > 0:
+                # The offset reaches past every scored site
+                tail_params["offset"] = max(
+                    offset - await SiteService._count_scored(db, run_id, where_conditions, params), 0
+                )
+            
+            tail_query = text(f"""
+                SELECT {select_list}
+                FROM (
+                    SELECT s.site_id AS page_site_id
+                    FROM {FILTER_FROM}
+                    WHERE {" AND ".join(tail_conditions)}
+                    ORDER BY s.site_id ASC
+                    LIMIT :limit OFFSET :offset
+                ) page
+                JOIN sites_with_scores ON sites_with_scores.site_id = page.page_site_id
+                ORDER BY page.page_site_id ASC
+            """)
+            tail_rows, total = await SiteService._fetch_with_total(
+                db, "sites_page_unscored", tail_query, tail_params,
+                count_query, params, include_total, total
+            )
+            rows = list(rows) + list(tail_rows)
+        
+        if include_total and total is None:
+            total = (await db.execute(count_query, params)).scalar() or 0
+        
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        next_cursor = None
+        if has_more:
+            last_row = rows[-1]
+            next_cursor = SiteService._encode_cursor(
+                last_row.total_suitability_score, last_row.site_id
+            )
+        
+        return rows, total, next_cursor
+    
+    @staticmethod
+    async def _fetch_with_total(
+        db: AsyncSession,
+        name: str,
+        query: TextClause,
+        query_params: Dict[str, Any],
+        count_query: TextClause,
+        count_params: Dict[str, Any],
+        include_total: bool,
+        total: Optional[int]
+    ) -> Tuple[List[Any], Optional[int]]:
+        """
+        Rows of a page query and the total; the count runs concurrently with
+        it when requested and not known yet
+        """
+        if include_total and total is None:
+            count_rows, rows = await gather_queries([
+                ("sites_count", count_query, count_params),
+                (name, query, query_params),
+            ])
+            return rows, count_rows[0].total or 0
+        
+        return (await db.execute(query, query_params)).fetchall(), total
+    
+    @staticmethod
+    async def _count_scored(
+        db: AsyncSession,
+        run_id: Optional[int],
+        where_conditions: List[str],
+        params: Dict[str, Any]
+    ) -> int:
+        """Number of sites matching the conditions that the run scored"""
+        if run_id is None:
+            return 0
+        
+        query = text(f"""
+            SELECT COUNT(*) AS scored
+            FROM analysis_results ar
+            JOIN sites s ON s.site_id = ar.site_id
+            WHERE {" AND ".join(["ar.run_id = :run_id"] + where_conditions)}
         """)
+        return (await db.execute(query, params)).scalar() or 0
+    
+    @staticmethod
+    def _encode_cursor(score: Optional[Any], site_id: int) -> str:
+        """Opaque cursor pointing just after a (score, site_id) position"""
+        position = [None if score is None else str(score), site_id]
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode().rstrip("=")
+    
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[Optional[float], int]:
+        """
+        Decode a cursor created by _encode_cursor
+        
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            score, site_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            return (None if score is None else float(score)), int(site_id)
+        except Exception:
+            raise ValueError("Invalid cursor")
+    
+    @staticmethod
+    async def get_top_sites(
+        db: AsyncSession,
+        weights: AnalysisWeights,
+        k: int = 10
+    ) -> TopSitesResponse:
+        """
+        Get the k best sites for any weight vector from the in-memory
+        component index, without scoring or sorting every site
+        """
+        await ComponentIndex.ensure_current(db)
+        site_ids, scores, sites_examined = ComponentIndex.top_k(weights, k)
+        
+        sites_by_id = {}
+        if len(site_ids):
+            query = text("""
+                SELECT site_id, site_name, latitude, longitude, region, land_type
+                FROM sites
+                WHERE site_id IN :site_ids
+            """).bindparams(bindparam("site_ids", expanding=True))
+            result = await db.execute(query, {"site_ids": site_ids.tolist()})
+            sites_by_id = {row.site_id: row for row in result.fetchall()}
+        
+        sites = []
+        for site_id, score in zip(site_ids.tolist(), scores.tolist()):
+            row = sites_by_id.get(site_id)
+            if row is None:
+                continue
+            sites.append(SiteResponse(
+                site_id=row.site_id,
+                site_name=row.site_name,
+                latitude=float(row.latitude),
+                longitude=float(row.longitude),
+                region=row.region,
+                land_type=row.land_type,
+                total_suitability_score=round(score, 2)
+            ))
+        
+        return TopSitesResponse(
+            k=k,
+            weights=weights,
+            total_sites=ComponentIndex.size(),
+            sites_examined=sites_examined,
+            sites=sites
+        )
+    
+    @staticmethod
+    async def get_nearest_sites(
+        db: AsyncSession,
+        site_id: int,
+        k: int = 10
+    ) -> Optional[NearestSitesResponse]:
+        """
+        Get the k sites closest to a site from the in-memory site locator,
+        with their current scores; None if the site does not exist
+        """
+        await SiteLocator.ensure_current(db)
+        if not SiteLocator.contains(site_id):
+            return None
+        
+        site_ids, distances = SiteLocator.nearest(site_id, k)
+        
+        sites_by_id = {}
+        if len(site_ids):
+            query = text("""
+                SELECT 
+                    site_id, site_name, latitude, longitude,
+                    region, land_type, total_suitability_score,
+                    score_rank, analysis_timestamp
+                FROM sites_with_scores
+                WHERE site_id IN :site_ids
+            """).bindparams(bindparam("site_ids", expanding=True))
+            result = await db.execute(query, {"site_ids": site_ids.tolist()})
+            sites_by_id = {row.site_id: row for row in result.fetchall()}
+        
+        sites = []
+        for nearby_id, distance in zip(site_ids.tolist(), distances.tolist()):
+            row = sites_by_id.get(nearby_id)
+            if row is None:
+                continue
+            sites.append(NearbySiteResponse(
+                site_id=row.site_id,
+                site_name=row.site_name,
+                latitude=float(row.latitude),
+                longitude=float(row.longitude),
+                region=row.region,
+                land_type=row.land_type,
+                total_suitability_score=float(row.total_suitability_score) if row.total_suitability_score else None,
+                rank=row.score_rank,
+                analysis_timestamp=row.analysis_timestamp,
+                distance_km=round(distance, 3)
+            ))
         
-        count_result = await db.execute(count_query, params)
-        total = count_result.scalar() or 0
+        return NearestSitesResponse(site_id=site_id, k=k, sites=sites)
+    
+    @staticmethod
+    async def get_clusters(
+        db: AsyncSession,
+        bbox: BoundingBox,
+        zoom: float
+    ) -> ClusterResponse:
+        """
+        Get the map clusters inside a bounding box at a zoom level, or the best
+        individual sites in it from CLUSTER_MAX_ZOOM on
+        """
+        level = int(zoom)
+        
+        if level < settings.CLUSTER_MAX_ZOOM:
+            await ClusterIndex.ensure_current(db)
+            return ClusterResponse(
+                zoom=level,
+                bbox=list(bbox),
+                clusters=ClusterIndex.clusters(bbox, level)
+            )
         
-        # Data query
-        data_query = text(f"""
+        params = {"limit": settings.CLUSTER_MAX_SITES + 1}
+        conditions = SpatialFilter.conditions(params, bbox=bbox)
+        query = text(f"""
             SELECT 
-                site_id, site_name, latitude, longitude, 
-                region, land_type, total_suitability_score, 
-                analysis_timestamp
+                site_id, site_name, latitude, longitude,
+                region, land_type, total_suitability_score,
+                score_rank, analysis_timestamp
             FROM sites_with_scores
-            {where_clause}
-            ORDER BY total_suitability_score DESC
-            LIMIT :limit OFFSET :offset
+            WHERE {" AND ".join(conditions)}
+            ORDER BY total_suitability_score DESC, site_id ASC
+            LIMIT :limit
         """)
-        
-        result = await db.execute(data_query, params)
+        result = await db.execute(query, params)
         rows = result.fetchall()
         
         sites = [
@@ -80,16 +464,18 @@ class SiteService:
                 region=row.region,
                 land_type=row.land_type,
                 total_suitability_score=float(row.total_suitability_score) if row.total_suitability_score else None,
+                rank=row.score_rank,
                 analysis_timestamp=row.analysis_timestamp
             )
-            for row in rows
+            for row in rows[:settings.CLUSTER_MAX_SITES]
         ]
         
-        return SiteListResponse(
-            total=total,
-            limit=limit,
-            offset=offset,
-            sites=sites
+        return ClusterResponse(
+            zoom=level,
+            bbox=list(bbox),
+            clusters=[],
+            sites=sites,
+            truncated=len(rows) > settings.CLUSTER_MAX_SITES
         )
     
     @staticmethod
@@ -99,26 +485,16 @@ class SiteService:
     ) -> Optional[SiteDetailResponse]:
         """
         Get detailed information for a specific site
+        
+        Every table behind sites_with_scores is read by primary key; the score
+        is the active run's (run_id, site_id) row of analysis_results. The
+        lookup therefore touches one row per table however many runs are
+        stored (see scripts/benchmark_site_detail.py).
         """
-        query = text("""
-            SELECT 
-                s.site_id, s.site_name, s.latitude, s.longitude,
-                s.area_sqm, s.solar_irradiance_kwh, s.grid_distance_km,
-                s.slope_degrees, s.road_distance_km, s.elevation_m,
-                s.land_type, s.region,
-                ar.solar_irradiance_score, ar.area_score,
-                ar.grid_distance_score, ar.slope_score,
-                ar.infrastructure_score, ar.total_suitability_score,
-                ar.analysis_timestamp
-            FROM sites s
-            LEFT JOIN (
-                SELECT site_id, solar_irradiance_score, area_score,
-                       grid_distance_score, slope_score, infrastructure_score,
-                       total_suitability_score, analysis_timestamp,
-                       ROW_NUMBER() OVER (PARTITION BY site_id ORDER BY analysis_timestamp DESC) as rn
-                FROM analysis_results
-            ) ar ON s.site_id = ar.site_id AND ar.rn = 1
-            WHERE s.site_id = :site_id
+        query = text(f"""
+            SELECT {DETAIL_COLUMNS}
+            FROM sites_with_scores
+            WHERE site_id = :site_id
         """)
         
         result = await db.execute(query, {"site_id": site_id})
@@ -127,6 +503,32 @@ class SiteService:
         if not row:
             return None
         
+        return SiteService._detail_from_row(row)
+    
+    @staticmethod
+    async def get_sites_by_ids(
+        db: AsyncSession,
+        site_ids: List[int]
+    ) -> Dict[int, SiteDetailResponse]:
+        """
+        Get detailed information for several sites in one query; ids that
+        do not exist are left out
+        """
+        if not site_ids:
+            return {}
+        
+        query = text(f"""
+            SELECT {DETAIL_COLUMNS}
+            FROM sites_with_scores
+            WHERE site_id IN :site_ids
+        """).bindparams(bindparam("site_ids", expanding=True))
+        
+        result = await db.execute(query, {"site_ids": list(site_ids)})
+        return {row.site_id: SiteService._detail_from_row(row) for row in result.fetchall()}
+    
+    @staticmethod
+    def _detail_from_row(row: Any) -> SiteDetailResponse:
+        """Build a site detail from a DETAIL_COLUMNS row"""
         return SiteDetailResponse(
             site_id=row.site_id,
             site_name=row.site_name,
@@ -146,252 +548,93 @@ class SiteService:
             slope_score=float(row.slope_score) if row.slope_score else None,
             infrastructure_score=float(row.infrastructure_score) if row.infrastructure_score else None,
             total_suitability_score=float(row.total_suitability_score) if row.total_suitability_score else None,
+            rank=row.score_rank,
+            ranked_sites=row.ranked_sites if row.score_rank is not None else None,
             analysis_timestamp=row.analysis_timestamp
         )
     
     @staticmethod
     async def get_statistics(
         db: AsyncSession,
-        min_score: Optional[float] = None,
-        max_score: Optional[float] = None
+        filters: Optional[SiteFilter] = None
     ) -> StatisticsResponse:
         """
         Get comprehensive statistics across all sites with optional filtering
         """
-        # Build WHERE clause for filtering
-        where_conditions = []
-        params = {}
-        
-        if min_score is not None:
-            where_conditions.append("total_suitability_score >= :min_score")
-            params["min_score"] = min_score
-        
-        if max_score is not None:
-            where_conditions.append("total_suitability_score <= :max_score")
-            params["max_score"] = max_score
-        
-        where_clause = ""
-        if where_conditions:
-            where_clause = "WHERE " + " AND ".join(where_conditions)
-        
-        # Overall stats
-        overall_query = text(f"""
-            SELECT 
-                COUNT(*) as total_sites,
-                COUNT(total_suitability_score) as sites_analyzed,
-                AVG(total_suitability_score) as avg_score,
-                MIN(total_suitability_score) as min_score,
-                MAX(total_suitability_score) as max_score,
-                STDDEV(total_suitability_score) as std_dev
-            FROM sites_with_scores
-            {where_clause}
-        """)
-        
-        result = await db.execute(overall_query, params)
-        overall = result.fetchone()
-        
-        # Build WHERE for scores with NOT NULL
-        score_where_conditions = ["total_suitability_score IS NOT NULL"]
-        if min_score is not None:
-            score_where_conditions.append("total_suitability_score >= :min_score")
-        if max_score is not None:
-            score_where_conditions.append("total_suitability_score <= :max_score")
-        score_where_clause = "WHERE " + " AND ".join(score_where_conditions)
-        
-        # Get all scores for median calculation
-        scores_query = text(f"""
-            SELECT total_suitability_score 
-            FROM sites_with_scores 
-            {score_where_clause}
-            ORDER BY total_suitability_score
-        """)
-        
-        scores_result = await db.execute(scores_query, params)
-        scores = [float(row.total_suitability_score) for row in scores_result.fetchall()]
-        median_score = statistics.median(scores) if scores else 0.0
-        
-        # Score distribution
-        distribution_query = text(f"""
-            SELECT 
-                CASE 
-                    WHEN total_suitability_score >= 80 THEN '80-100 (Excellent)'
-                    WHEN total_suitability_score >= 60 THEN '60-79 (Good)'
-                    WHEN total_suitability_score >= 40 THEN '40-59 (Fair)'
-                    WHEN total_suitability_score >= 20 THEN '20-39 (Poor)'
-                    ELSE '0-19 (Very Poor)'
-                END as range_label,
-                COUNT(*) as count
-            FROM sites_with_scores
-            {score_where_clause}
-            GROUP BY range_label
-            ORDER BY MIN(total_suitability_score) DESC
-        """)
-        
-        dist_result = await db.execute(distribution_query, params)
-        total_analyzed = overall.sites_analyzed or 1
-        score_distribution = [
-            ScoreDistribution(
-                range_label=row.range_label,
-                count=row.count,
-                percentage=round((row.count / total_analyzed) * 100, 2)
-            )
-            for row in dist_result.fetchall()
-        ]
+        filters = filters or SiteFilter()
+        params = {"run_id": await AnalysisService.get_active_run_id(db)}
+        where_conditions = filters.conditions(params)
         
-        # Regional stats
-        regional_query = text(f"""
-            SELECT 
-                region,
-                COUNT(*) as site_count,
-                AVG(total_suitability_score) as avg_score,
-                MAX(total_suitability_score) as max_score,
-                MIN(total_suitability_score) as min_score
-            FROM sites_with_scores
-            {score_where_clause}
-            GROUP BY region
-            ORDER BY avg_score DESC
-        """)
-        
-        regional_result = await db.execute(regional_query, params)
-        regional_stats = [
-            RegionalStats(
-                region=row.region,
-                site_count=row.site_count,
-                avg_score=round(float(row.avg_score), 2),
-                max_score=round(float(row.max_score), 2),
-                min_score=round(float(row.min_score), 2)
-            )
-            for row in regional_result.fetchall()
-        ]
-        
-        # Land type stats
-        landtype_query = text(f"""
-            SELECT 
-                land_type,
-                COUNT(*) as site_count,
-                AVG(total_suitability_score) as avg_score,
-                MAX(total_suitability_score) as max_score
-            FROM sites_with_scores
-            {score_where_clause}
-            GROUP BY land_type
-            ORDER BY avg_score DESC
-        """)
-        
-        landtype_result = await db.execute(landtype_query, params)
-        land_type_stats = [
-            LandTypeStats(
-                land_type=row.land_type,
-                site_count=row.site_count,
-                avg_score=round(float(row.avg_score), 2),
-                max_score=round(float(row.max_score), 2)
-            )
-            for row in landtype_result.fetchall()
-        ]
+        # One scan, split into site_id ranges read concurrently on separate
+        # connections; every statistic is computed from the combined rows
+        range_query = text("SELECT MIN(site_id) AS first_id, MAX(site_id) AS last_id FROM sites")
+        id_range = (await db.execute(range_query)).fetchone()
         
-        # Top performing sites
-        top_sites_query = text(f"""
+        shard_conditions = where_conditions + ["s.site_id BETWEEN :first_id AND :last_id"]
+        shard_query = text(f"""
             SELECT 
-                site_id, site_name, latitude, longitude,
-                region, land_type, total_suitability_score,
-                analysis_timestamp
-            FROM sites_with_scores
-            {score_where_clause}
-            ORDER BY total_suitability_score DESC
-            LIMIT 10
+                s.site_id, s.site_name, s.latitude, s.longitude,
+                s.region, s.land_type, ar.total_suitability_score,
+                r.completed_at AS analysis_timestamp
+            FROM {FILTER_FROM}
+            LEFT JOIN analysis_runs r ON r.run_id = ar.run_id
+            WHERE {" AND ".join(shard_conditions)}
         """)
         
-        top_result = await db.execute(top_sites_query, params)
-        top_sites = [
-            SiteResponse(
-                site_id=row.site_id,
-                site_name=row.site_name,
-                latitude=float(row.latitude),
-                longitude=float(row.longitude),
-                region=row.region,
-                land_type=row.land_type,
-                total_suitability_score=round(float(row.total_suitability_score), 2),
-                analysis_timestamp=row.analysis_timestamp
-            )
-            for row in top_result.fetchall()
+        shards = []
+        if id_range.first_id is not None:
+            for index, (first_id, last_id) in enumerate(
+                SiteService._id_shards(id_range.first_id, id_range.last_id)
+            ):
+                shards.append((
+                    f"statistics_shard_{index}",
+                    shard_query,
+                    {**params, "first_id": first_id, "last_id": last_id}
+                ))
+        
+        rows = []
+        for shard_rows in await gather_queries(shards):
+            rows.extend(shard_rows)
+        
+        return StatisticsEngine.build(rows, filters.min_score, filters.max_score)
+    
+    @staticmethod
+    def _id_shards(first_id: int, last_id: int) -> List[Tuple[int, int]]:
+        """
+        Split a site_id range into at most STATISTICS_MAX_CONNECTIONS
+        contiguous ranges of at least MIN_SHARD_SITES ids
+        """
+        span = last_id - first_id + 1
+        shard_count = max(1, min(settings.STATISTICS_MAX_CONNECTIONS, span // MIN_SHARD_SITES))
+        bounds = np.linspace(first_id, last_id + 1, shard_count + 1).astype(np.int64)
+        return [
+            (int(bounds[index]), int(bounds[index + 1]) - 1)
+            for index in range(shard_count)
         ]
-        
-        return StatisticsResponse(
-            total_sites=overall.total_sites,
-            sites_analyzed=overall.sites_analyzed,
-            average_score=round(float(overall.avg_score or 0), 2),
-            median_score=round(median_score, 2),
-            min_score=round(float(overall.min_score or 0), 2),
-            max_score=round(float(overall.max_score or 0), 2),
-            std_deviation=round(float(overall.std_dev or 0), 2),
-            score_distribution=score_distribution,
-            regional_stats=regional_stats,
-            land_type_stats=land_type_stats,
-            top_performing_sites=top_sites
-        )
     
     @staticmethod
     async def export_sites(
         db: AsyncSession,
-        min_score: Optional[float] = None,
-        max_score: Optional[float] = None
+        filters: Optional[SiteFilter] = None,
+        fields: Sequence[str] = EXPORT_FIELDS
     ) -> List[Dict[str, Any]]:
         """
-        Export sites data with optional filtering
+        Export sites data with optional filtering, reading only the requested
+        fields
         """
-        where_conditions = []
-        params = {}
-        
-        if min_score is not None:
-            where_conditions.append("total_suitability_score >= :min_score")
-            params["min_score"] = min_score
-        
-        if max_score is not None:
-            where_conditions.append("total_suitability_score <= :max_score")
-            params["max_score"] = max_score
-        
-        where_clause = ""
-        if where_conditions:
-            where_clause = "WHERE " + " AND ".join(where_conditions)
+        params = {"run_id": await AnalysisService.get_active_run_id(db)}
+        where_clause = (filters or SiteFilter()).where_clause(params)
         
         query = text(f"""
-            SELECT 
-                site_id, site_name, latitude, longitude,
-                area_sqm, solar_irradiance_kwh, grid_distance_km,
-                slope_degrees, road_distance_km, elevation_m,
-                land_type, region,
-                solar_irradiance_score, area_score,
-                grid_distance_score, slope_score,
-                infrastructure_score, total_suitability_score,
-                analysis_timestamp
-            FROM sites_with_scores
-            {where_clause}
+            SELECT {FieldProjection.select_list(fields)}
+            FROM (
+                SELECT s.site_id AS match_id
+                FROM {FILTER_FROM}
+                {where_clause}
+            ) matched
+            JOIN sites_with_scores ON sites_with_scores.site_id = matched.match_id
             ORDER BY total_suitability_score DESC
         """)
         
         result = await db.execute(query, params)
-        rows = result.fetchall()
-        
-        return [
-            {
-                "site_id": row.site_id,
-                "site_name": row.site_name,
-                "latitude": float(row.latitude),
-                "longitude": float(row.longitude),
-                "area_sqm": row.area_sqm,
-                "solar_irradiance_kwh": float(row.solar_irradiance_kwh),
-                "grid_distance_km": float(row.grid_distance_km),
-                "slope_degrees": float(row.slope_degrees),
-                "road_distance_km": float(row.road_distance_km),
-                "elevation_m": row.elevation_m,
-                "land_type": row.land_type,
-                "region": row.region,
-                "solar_irradiance_score": float(row.solar_irradiance_score) if row.solar_irradiance_score else None,
-                "area_score": float(row.area_score) if row.area_score else None,
-                "grid_distance_score": float(row.grid_distance_score) if row.grid_distance_score else None,
-                "slope_score": float(row.slope_score) if row.slope_score else None,
-                "infrastructure_score": float(row.infrastructure_score) if row.infrastructure_score else None,
-                "total_suitability_score": float(row.total_suitability_score) if row.total_suitability_score else None,
-                "analysis_timestamp": row.analysis_timestamp.isoformat() if row.analysis_timestamp else None
-            }
-            for row in rows
-        ]
+        return FieldProjection.to_objects(result.fetchall(), fields)
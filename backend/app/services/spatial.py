@@ -0,0 +1,171 @@
+"""Bounding-box and radius filters on the sites spatial index"""
+
+import math
+from typing import Dict, List, Optional, Tuple, Any
+
+# (min_lon, min_lat, max_lon, max_lat)
+BoundingBox = Tuple[float, float, float, float]
+
+# (lat, lon)
+LatLon = Tuple[float, float]
+
+# Earth radius used by MySQL's ST_Distance_Sphere, in kilometers
+EARTH_RADIUS_KM = 6370.986
+
+
+class SpatialFilter:
+    """
+    Parses bbox/near query parameters and turns them into conditions on the
+    indexed sites.location POINT column (x = longitude, y = latitude).
+    Radius searches are first narrowed to the circle's bounding box, so the
+    spatial index does the pruning and ST_Distance_Sphere only checks the
+    sites inside it. A box whose min_lon exceeds its max_lon crosses the
+    antimeridian and is searched as two envelopes, one on each side.
+    """
+    
+    @staticmethod
+    def parse_bbox(value: Optional[str]) -> Optional[BoundingBox]:
+        """
+        Parse 'min_lon,min_lat,max_lon,max_lat'
+        
+        min_lon may exceed max_lon for a viewport crossing the antimeridian.
+        
+        Raises:
+            ValueError: If the box is malformed or out of range
+        """
+        if value is None:
+            return None
+        
+        try:
+            min_lon, min_lat, max_lon, max_lat = [float(part) for part in value.split(",")]
+        except ValueError:
+            raise ValueError("bbox must be min_lon,min_lat,max_lon,max_lat")
+        
+        SpatialFilter._check_coordinates(min_lat, min_lon)
+        SpatialFilter._check_coordinates(max_lat, max_lon)
+        if min_lat > max_lat:
+            raise ValueError("bbox min_lat must not exceed max_lat")
+        
+        return min_lon, min_lat, max_lon, max_lat
+    
+    @staticmethod
+    def split_bbox(bbox: BoundingBox) -> List[BoundingBox]:
+        """Non-wrapping boxes covering bbox: two if it crosses the antimeridian"""
+        min_lon, min_lat, max_lon, max_lat = bbox
+        if min_lon <= max_lon:
+            return [bbox]
+        return [(min_lon, min_lat, 180.0, max_lat), (-180.0, min_lat, max_lon, max_lat)]
+    
+    @staticmethod
+    def parse_near(value: Optional[str], radius_km: Optional[float]) -> Optional[LatLon]:
+        """
+        Parse 'lat,lon'; near and radius_km must be given together
+        
+        Raises:
+            ValueError: If the point is malformed or radius_km is missing
+        """
+        if value is None:
+            if radius_km is not None:
+                raise ValueError("radius_km requires near")
+            return None
+        
+        if radius_km is None:
+            raise ValueError("near requires radius_km")
+        
+        try:
+            lat, lon = [float(part) for part in value.split(",")]
+        except ValueError:
+            raise ValueError("near must be lat,lon")
+        
+        SpatialFilter._check_coordinates(lat, lon)
+        return lat, lon
+    
+    @staticmethod
+    def radius_bbox(near: LatLon, radius_km: float) -> BoundingBox:
+        """Bounding box enclosing every point within radius_km of near"""
+        lat, lon = near
+        lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+        min_lat = max(lat - lat_delta, -90.0)
+        max_lat = min(lat + lat_delta, 90.0)
+        
+        # Longitude degrees shrink towards the poles; when the circle reaches a
+        # pole or wraps around the antimeridian the box spans every longitude
+        widest_lat = max(abs(min_lat), abs(max_lat))
+        cos_lat = math.cos(math.radians(widest_lat))
+        if cos_lat < 1e-9:
+            return -180.0, min_lat, 180.0, max_lat
+        
+        lon_delta = lat_delta / cos_lat
+        if lon - lon_delta < -180 or lon + lon_delta > 180:
+            return -180.0, min_lat, 180.0, max_lat
+        
+        return lon - lon_delta, min_lat, lon + lon_delta, max_lat
+    
+    @staticmethod
+    def conditions(
+        params: Dict[str, Any],
+        bbox: Optional[BoundingBox] = None,
+        near: Optional[LatLon] = None,
+        radius_km: Optional[float] = None,
+        column: str = "location"
+    ) -> List[str]:
+        """
+        SQL conditions for the given filters; their parameters are added to params
+        
+        Args:
+            params: Query parameters to extend
+            bbox: Only sites inside this box (edges included); it may cross
+                the antimeridian
+            near: Center of a radius search, used with radius_km
+            radius_km: Great-circle distance limit around near
+            column: POINT column to filter
+        """
+        conditions = []
+        
+        if bbox is not None:
+            envelopes = [
+                SpatialFilter._envelope_condition(params, prefix, part, column)
+                for prefix, part in zip(("bbox", "bbox_wrap"), SpatialFilter.split_bbox(bbox))
+            ]
+            conditions.append(
+                envelopes[0] if len(envelopes) == 1 else f"({' OR '.join(envelopes)})"
+            )
+        
+        if near is not None and radius_km is not None:
+            conditions.append(SpatialFilter._envelope_condition(
+                params, "near", SpatialFilter.radius_bbox(near, radius_km), column
+            ))
+            conditions.append(
+                f"ST_Distance_Sphere({column}, POINT(:near_lon, :near_lat)) <= :near_radius_m"
+            )
+            params["near_lat"], params["near_lon"] = near
+            params["near_radius_m"] = radius_km * 1000
+        
+        return conditions
+    
+    @staticmethod
+    def _envelope_condition(
+        params: Dict[str, Any],
+        prefix: str,
+        bbox: BoundingBox,
+        column: str
+    ) -> str:
+        """Index-assisted containment test of column in a box"""
+        (
+            params[f"{prefix}_min_lon"],
+            params[f"{prefix}_min_lat"],
+            params[f"{prefix}_max_lon"],
+            params[f"{prefix}_max_lat"]
+        ) = bbox
+        # MBRCovers keeps points on the edges; a spatial index serves it
+        return (
+            f"MBRCovers(ST_MakeEnvelope("
+            f"POINT(:{prefix}_min_lon, :{prefix}_min_lat), "
+            f"POINT(:{prefix}_max_lon, :{prefix}_max_lat)), {column})"
+        )
+    
+    @staticmethod
+    def _check_coordinates(lat: float, lon: float):
+        """Reject coordinates outside the valid latitude/longitude range"""
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise ValueError("coordinates out of range")
@@ -0,0 +1,214 @@
+"""Single-pass statistics computation over site scores"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.models.schemas import (
+    SiteResponse,
+    StatisticsResponse,
+    ScoreDistribution,
+    RegionalStats,
+    LandTypeStats
+)
+from app.services.scoring_engine import ScoringEngine
+from app.services.aggregate_cube import AggregateCube
+
+# Lower bound and label of every distribution bucket, best bucket first
+DISTRIBUTION_BUCKETS: Tuple[Tuple[float, str], ...] = (
+    (80, "80-100 (Excellent)"),
+    (60, "60-79 (Good)"),
+    (40, "40-59 (Fair)"),
+    (20, "20-39 (Poor)"),
+    (-np.inf, "0-19 (Very Poor)"),
+)
+
+# Number of sites listed in top_performing_sites
+TOP_SITES_COUNT = 10
+
+# (min_score, max_score) filter, None meaning unbounded
+ScoreBand = Tuple[Optional[float], Optional[float]]
+
+
+class StatisticsEngine:
+    """
+    Builds a complete StatisticsResponse from one scan of site rows.
+    Rows are turned into column arrays once and every aggregate is computed
+    from those arrays, so no statistic needs a query of its own.
+    """
+    
+    @staticmethod
+    def build(
+        rows: Sequence[Any],
+        min_score: Optional[float] = None,
+        max_score: Optional[float] = None
+    ) -> StatisticsResponse:
+        """
+        Compute all statistics
+        
+        Args:
+            rows: Rows with site_id, site_name, latitude, longitude, region,
+                land_type, total_suitability_score and analysis_timestamp;
+                sites without a score are counted in total_sites only
+            min_score: Only include sites scoring at least this much
+            max_score: Only include sites scoring at most this much
+        """
+        return StatisticsEngine.build_bands(rows, [(min_score, max_score)])[0]
+    
+    @staticmethod
+    def build_bands(
+        rows: Sequence[Any],
+        bands: Sequence[ScoreBand]
+    ) -> List[StatisticsResponse]:
+        """
+        Compute the statistics of several score bands from the same rows,
+        converting them to column arrays only once
+        
+        Args:
+            rows: Rows as described in build
+            bands: (min_score, max_score) pairs, None meaning unbounded
+        
+        Returns:
+            One response per band, in the order of bands
+        """
+        scored = [row for row in rows if row.total_suitability_score is not None]
+        scores = np.array([float(row.total_suitability_score) for row in scored])
+        site_ids = np.array([row.site_id for row in scored], dtype=np.int64)
+        regions = np.array([row.region for row in scored], dtype=object)
+        land_types = np.array([row.land_type for row in scored], dtype=object)
+        
+        responses = []
+        for min_score, max_score in bands:
+            mask = np.ones(len(scores), dtype=bool)
+            if min_score is not None:
+                mask &= scores >= min_score
+            if max_score is not None:
+                mask &= scores <= max_score
+            
+            # Unscored sites never satisfy a score filter
+            unfiltered = min_score is None and max_score is None
+            total_sites = len(rows) if unfiltered else int(mask.sum())
+            
+            band_scores = scores[mask]
+            band_rows = np.flatnonzero(mask)
+            
+            regional_stats = [
+                RegionalStats(
+                    region=group["key"],
+                    site_count=group["count"],
+                    avg_score=group["avg_score"],
+                    max_score=group["max_score"],
+                    min_score=group["min_score"]
+                )
+                for group in StatisticsEngine.group_stats(regions[mask], band_scores)
+            ]
+            
+            land_type_stats = [
+                LandTypeStats(
+                    land_type=group["key"],
+                    site_count=group["count"],
+                    avg_score=group["avg_score"],
+                    max_score=group["max_score"]
+                )
+                for group in StatisticsEngine.group_stats(land_types[mask], band_scores)
+            ]
+            
+            top_sites = []
+            top_indices = ScoringEngine.top_k_indices(
+                band_scores, site_ids[mask], TOP_SITES_COUNT
+            )
+            for index in band_rows[top_indices].tolist():
+                row = scored[index]
+                top_sites.append(SiteResponse(
+                    site_id=row.site_id,
+                    site_name=row.site_name,
+                    latitude=float(row.latitude),
+                    longitude=float(row.longitude),
+                    region=row.region,
+                    land_type=row.land_type,
+                    total_suitability_score=round(float(row.total_suitability_score), 2),
+                    analysis_timestamp=row.analysis_timestamp
+                ))
+            
+            responses.append(StatisticsResponse(
+                total_sites=total_sites,
+                sites_analyzed=len(band_scores),
+                **StatisticsEngine.summarize(band_scores),
+                score_distribution=StatisticsEngine.distribution(band_scores),
+                regional_stats=regional_stats,
+                land_type_stats=land_type_stats,
+                top_performing_sites=top_sites
+            ))
+        
+        return responses
+    
+    @staticmethod
+    def summarize(scores: np.ndarray) -> Dict[str, float]:
+        """Average, median, min, max and population standard deviation"""
+        if len(scores) == 0:
+            return {
+                "average_score": 0.0,
+                "median_score": 0.0,
+                "min_score": 0.0,
+                "max_score": 0.0,
+                "std_deviation": 0.0
+            }
+        
+        return {
+            "average_score": round(float(scores.mean()), 2),
+            "median_score": round(float(np.median(scores)), 2),
+            "min_score": round(float(scores.min()), 2),
+            "max_score": round(float(scores.max()), 2),
+            "std_deviation": round(float(scores.std()), 2)
+        }
+    
+    @staticmethod
+    def distribution(scores: np.ndarray) -> List[ScoreDistribution]:
+        """Non-empty score buckets, best bucket first"""
+        lower_bounds = np.array([bound for bound, _ in DISTRIBUTION_BUCKETS])
+        # Index of the first bucket whose lower bound the score reaches
+        bucket_indices = np.argmax(scores[:, None] >= lower_bounds[None, :], axis=1)
+        counts = np.bincount(bucket_indices, minlength=len(DISTRIBUTION_BUCKETS))
+        total = len(scores) or 1
+        
+        return [
+            ScoreDistribution(
+                range_label=label,
+                count=int(count),
+                percentage=round((int(count) / total) * 100, 2)
+            )
+            for (_, label), count in zip(DISTRIBUTION_BUCKETS, counts)
+            if count
+        ]
+    
+    @staticmethod
+    def group_stats(keys: np.ndarray, scores: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Count, average, max and min score per key, highest average first.
+        Keys equal under the database collation (AggregateCube.collation_key)
+        form one group, as in the cube and the quantile sketches.
+        """
+        if len(scores) == 0:
+            return []
+        
+        labels, inverse = AggregateCube.encode_labels(keys.tolist())
+        counts = np.bincount(inverse, minlength=len(labels))
+        averages = np.bincount(inverse, weights=scores, minlength=len(labels)) / counts
+        maxima = np.full(len(labels), -np.inf)
+        np.maximum.at(maxima, inverse, scores)
+        minima = np.full(len(labels), np.inf)
+        np.minimum.at(minima, inverse, scores)
+        
+        order = sorted(range(len(labels)), key=lambda index: (
+            -averages[index], AggregateCube.collation_key(labels[index])
+        ))
+        return [
+            {
+                "key": labels[index],
+                "count": int(counts[index]),
+                "avg_score": round(float(averages[index]), 2),
+                "max_score": round(float(maxima[index]), 2),
+                "min_score": round(float(minima[index]), 2)
+            }
+            for index in order
+        ]
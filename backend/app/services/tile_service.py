@@ -0,0 +1,135 @@
+"""Vector tiles of the scored site layer"""
+
+import base64
+import math
+from typing import Optional, Tuple
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+
+from app.cache import CacheManager
+from app.config import get_settings
+from app.services.analysis_service import AnalysisService
+from app.services.cluster_index import ClusterIndex
+from app.services.scoring_engine import COMPONENT_COLUMNS
+from app.services.spatial import SpatialFilter, BoundingBox
+from app.services.vector_tile import VectorTileEncoder, PointFeature, TILE_EXTENT
+
+settings = get_settings()
+
+# Name of the site layer inside every tile
+SITES_LAYER = "sites"
+
+# Points this many tile units beyond the edges are included, so symbols
+# straddling a tile boundary render on both tiles
+TILE_BUFFER = 64
+
+# Deepest zoom level tiles are served for
+MAX_TILE_ZOOM = 22
+
+
+class TileService:
+    """
+    Serves the active run's sites as Mapbox Vector Tiles. Encoded tiles are
+    cached under the active run, components_version and sites_version, so a
+    tile is only recomputed after the scores or sites it shows changed; tiles
+    of earlier versions simply expire.
+    """
+    
+    @staticmethod
+    def tile_bounds(z: int, x: int, y: int, buffer: int = 0) -> BoundingBox:
+        """
+        (min_lon, min_lat, max_lon, max_lat) of a tile, grown by buffer tile units
+        
+        Raises:
+            ValueError: If the tile does not exist
+        """
+        tiles = 2 ** z
+        if not (0 <= z <= MAX_TILE_ZOOM and 0 <= x < tiles and 0 <= y < tiles):
+            raise ValueError(f"Tile {z}/{x}/{y} does not exist")
+        
+        margin = buffer / TILE_EXTENT
+        west, north = TileService._tile_to_lon_lat(x - margin, y - margin, tiles)
+        east, south = TileService._tile_to_lon_lat(x + 1 + margin, y + 1 + margin, tiles)
+        return max(west, -180.0), max(south, -90.0), min(east, 180.0), min(north, 90.0)
+    
+    @staticmethod
+    async def get_tile(db: AsyncSession, z: int, x: int, y: int) -> bytes:
+        """
+        Encoded vector tile of the sites in a tile
+        
+        Raises:
+            ValueError: If the tile does not exist
+        """
+        bbox = TileService.tile_bounds(z, x, y, TILE_BUFFER)
+        
+        run_id, components_version, sites_version = await AnalysisService.get_state_version(db)
+        cache_key = f"tiles:{run_id}:{components_version}:{sites_version}:{z}/{x}/{y}"
+        
+        cached_tile = await CacheManager.get(cache_key)
+        if cached_tile is not None:
+            return base64.b64decode(cached_tile)
+        
+        tile = await TileService._build_tile(db, z, x, y, bbox)
+        await CacheManager.set(
+            cache_key, base64.b64encode(tile).decode("ascii"), ttl=settings.TILE_CACHE_TTL
+        )
+        return tile
+    
+    @staticmethod
+    async def _build_tile(db: AsyncSession, z: int, x: int, y: int, bbox: BoundingBox) -> bytes:
+        """Query the sites of a tile and encode them"""
+        params = {"limit": settings.TILE_MAX_FEATURES}
+        conditions = SpatialFilter.conditions(params, bbox=bbox)
+        # Best sites first, so a capped low-zoom tile keeps the most relevant ones
+        query = text(f"""
+            SELECT
+                site_id, site_name, latitude, longitude,
+                region, land_type, total_suitability_score, score_rank,
+                {", ".join(COMPONENT_COLUMNS)}
+            FROM sites_with_scores
+            WHERE {" AND ".join(conditions)}
+            ORDER BY total_suitability_score DESC, site_id ASC
+            LIMIT :limit
+        """)
+        result = await db.execute(query, params)
+        rows = result.fetchall()
+        
+        mercator_x, mercator_y = ClusterIndex.to_mercator(
+            np.array([float(row.latitude) for row in rows]),
+            np.array([float(row.longitude) for row in rows])
+        )
+        tiles = 2 ** z
+        tile_x = np.rint((mercator_x * tiles - x) * TILE_EXTENT).astype(np.int64)
+        tile_y = np.rint((mercator_y * tiles - y) * TILE_EXTENT).astype(np.int64)
+        
+        features = []
+        for row, point_x, point_y in zip(rows, tile_x.tolist(), tile_y.tolist()):
+            properties = {
+                "site_id": row.site_id,
+                "site_name": row.site_name,
+                "region": row.region,
+                "land_type": row.land_type,
+                "total_suitability_score": TileService._score(row.total_suitability_score),
+                "rank": row.score_rank
+            }
+            for column in COMPONENT_COLUMNS:
+                properties[column] = TileService._score(getattr(row, column))
+            features.append(PointFeature(point_x, point_y, properties, feature_id=row.site_id))
+        
+        return VectorTileEncoder.encode([(SITES_LAYER, features)])
+    
+    @staticmethod
+    def _score(value) -> Optional[float]:
+        """Scores as plain floats, None when missing"""
+        return None if value is None else round(float(value), 2)
+    
+    @staticmethod
+    def _tile_to_lon_lat(x: float, y: float, tiles: int) -> Tuple[float, float]:
+        """Longitude and latitude of a (fractional) tile corner"""
+        lon = x / tiles * 360.0 - 180.0
+        # Corners beyond the poles clamp to the Mercator limits
+        y = min(max(y, 0.0), float(tiles))
+        lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / tiles))))
+        return lon, lat
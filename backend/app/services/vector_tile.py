@@ -0,0 +1,166 @@
+"""Minimal Mapbox Vector Tile (MVT 2.1) encoder for point layers"""
+
+import struct
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Tile coordinate space of every layer
+TILE_EXTENT = 4096
+
+# Protobuf wire types
+WIRE_VARINT = 0
+WIRE_FIXED64 = 1
+WIRE_LENGTH_DELIMITED = 2
+
+# vector_tile.proto field numbers
+TILE_LAYERS = 3
+LAYER_NAME = 1
+LAYER_FEATURES = 2
+LAYER_KEYS = 3
+LAYER_VALUES = 4
+LAYER_EXTENT = 5
+LAYER_VERSION = 15
+FEATURE_ID = 1
+FEATURE_TAGS = 2
+FEATURE_TYPE = 3
+FEATURE_GEOMETRY = 4
+VALUE_STRING = 1
+VALUE_DOUBLE = 3
+VALUE_UINT = 5
+VALUE_SINT = 6
+VALUE_BOOL = 7
+
+GEOM_POINT = 1
+COMMAND_MOVE_TO = 1
+
+
+class PointFeature:
+    """A point in tile coordinates with its attributes"""
+    
+    def __init__(self, x: int, y: int, properties: Dict[str, Any], feature_id: Optional[int] = None):
+        self.x = x
+        self.y = y
+        self.properties = properties
+        self.feature_id = feature_id
+
+
+class VectorTileEncoder:
+    """
+    Encodes point layers as a vector tile protobuf without a protobuf
+    dependency: the format only needs varints, zigzag integers and
+    length-delimited fields. Keys and values are deduplicated per layer as
+    the specification requires; None attributes are left out.
+    """
+    
+    @staticmethod
+    def encode(layers: Sequence[Tuple[str, Sequence[PointFeature]]], extent: int = TILE_EXTENT) -> bytes:
+        """
+        Encode a tile
+        
+        Args:
+            layers: (layer name, features) pairs
+            extent: Tile coordinate space of the layers
+        """
+        tile = bytearray()
+        for name, features in layers:
+            VectorTileEncoder._bytes_field(
+                tile, TILE_LAYERS, VectorTileEncoder._encode_layer(name, features, extent)
+            )
+        return bytes(tile)
+    
+    @staticmethod
+    def _encode_layer(name: str, features: Sequence[PointFeature], extent: int) -> bytes:
+        """Encode one layer with its shared key and value tables"""
+        keys: Dict[str, int] = {}
+        values: Dict[Tuple[type, Any], int] = {}
+        encoded_features = bytearray()
+        
+        for feature in features:
+            tags = []
+            for key, value in feature.properties.items():
+                if value is None:
+                    continue
+                key_index = keys.setdefault(key, len(keys))
+                value_index = values.setdefault((type(value), value), len(values))
+                tags += [key_index, value_index]
+            
+            encoded = bytearray()
+            if feature.feature_id is not None:
+                VectorTileEncoder._varint_field(encoded, FEATURE_ID, feature.feature_id)
+            VectorTileEncoder._packed_field(encoded, FEATURE_TAGS, tags)
+            VectorTileEncoder._varint_field(encoded, FEATURE_TYPE, GEOM_POINT)
+            VectorTileEncoder._packed_field(encoded, FEATURE_GEOMETRY, [
+                (COMMAND_MOVE_TO & 0x7) | (1 << 3),
+                VectorTileEncoder._zigzag(feature.x),
+                VectorTileEncoder._zigzag(feature.y)
+            ])
+            VectorTileEncoder._bytes_field(encoded_features, LAYER_FEATURES, encoded)
+        
+        layer = bytearray()
+        VectorTileEncoder._varint_field(layer, LAYER_VERSION, 2)
+        VectorTileEncoder._bytes_field(layer, LAYER_NAME, name.encode("utf-8"))
+        layer += encoded_features
+        for key in keys:
+            VectorTileEncoder._bytes_field(layer, LAYER_KEYS, key.encode("utf-8"))
+        for value_type, value in values:
+            VectorTileEncoder._bytes_field(layer, LAYER_VALUES, VectorTileEncoder._encode_value(value))
+        VectorTileEncoder._varint_field(layer, LAYER_EXTENT, extent)
+        return bytes(layer)
+    
+    @staticmethod
+    def _encode_value(value: Any) -> bytes:
+        """Encode an attribute value message"""
+        encoded = bytearray()
+        if isinstance(value, bool):
+            VectorTileEncoder._varint_field(encoded, VALUE_BOOL, int(value))
+        elif isinstance(value, int):
+            if value >= 0:
+                VectorTileEncoder._varint_field(encoded, VALUE_UINT, value)
+            else:
+                VectorTileEncoder._varint_field(encoded, VALUE_SINT, VectorTileEncoder._zigzag(value))
+        elif isinstance(value, float):
+            VectorTileEncoder._key(encoded, VALUE_DOUBLE, WIRE_FIXED64)
+            encoded += struct.pack("<d", value)
+        else:
+            VectorTileEncoder._bytes_field(encoded, VALUE_STRING, str(value).encode("utf-8"))
+        return bytes(encoded)
+    
+    @staticmethod
+    def _zigzag(value: int) -> int:
+        """Map signed integers to unsigned ones, small magnitudes first"""
+        return (value << 1) ^ (value >> 63)
+    
+    @staticmethod
+    def _varint(buffer: bytearray, value: int):
+        """Append a base-128 varint"""
+        while value > 0x7F:
+            buffer.append((value & 0x7F) | 0x80)
+            value >>= 7
+        buffer.append(value)
+    
+    @staticmethod
+    def _key(buffer: bytearray, field: int, wire_type: int):
+        """Append a field key"""
+        VectorTileEncoder._varint(buffer, (field << 3) | wire_type)
+    
+    @staticmethod
+    def _varint_field(buffer: bytearray, field: int, value: int):
+        """Append a varint field"""
+        VectorTileEncoder._key(buffer, field, WIRE_VARINT)
+        VectorTileEncoder._varint(buffer, value)
+    
+    @staticmethod
+    def _bytes_field(buffer: bytearray, field: int, value: bytes):
+        """Append a length-delimited field"""
+        VectorTileEncoder._key(buffer, field, WIRE_LENGTH_DELIMITED)
+        VectorTileEncoder._varint(buffer, len(value))
+        buffer += value
+    
+    @staticmethod
+    def _packed_field(buffer: bytearray, field: int, values: List[int]):
+        """Append a packed repeated varint field"""
+        if not values:
+            return
+        packed = bytearray()
+        for value in values:
+            VectorTileEncoder._varint(packed, value)
+        VectorTileEncoder._bytes_field(buffer, field, packed)
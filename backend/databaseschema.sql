@@ -6,7 +6,13 @@ CREATE DATABASE IF NOT EXISTS solar_site_analyzer;
 USE solar_site_analyzer;
 
 -- Drop tables if they exist (for clean setup)
+DROP TABLE IF EXISTS analysis_state;
+DROP TABLE IF EXISTS analysis_run_statistics;
+DROP TABLE IF EXISTS analysis_run_sketches;
+DROP TABLE IF EXISTS analysis_run_cube;
 DROP TABLE IF EXISTS analysis_results;
+DROP TABLE IF EXISTS analysis_runs;
+DROP TABLE IF EXISTS site_component_scores;
 DROP TABLE IF EXISTS sites;
 DROP TABLE IF EXISTS analysis_parameters;
 
@@ -24,12 +30,22 @@ CREATE TABLE sites (
     elevation_m INT NOT NULL COMMENT 'Elevation above sea level in meters',
     land_type VARCHAR(50) NOT NULL,
     region VARCHAR(100) NOT NULL,
+    location POINT SRID 0 GENERATED ALWAYS AS (POINT(longitude, latitude)) STORED NOT NULL COMMENT 'x = longitude, y = latitude; kept in sync by MySQL',
+    -- Must hash the columns of INPUT_COLUMNS in app/services/scoring_engine.py
+    attributes_hash CHAR(32) GENERATED ALWAYS AS (MD5(CONCAT_WS('|',
+        solar_irradiance_kwh, area_sqm, grid_distance_km, slope_degrees, road_distance_km
+    ))) STORED NOT NULL COMMENT 'Fingerprint of the scoring inputs; kept in sync by MySQL',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-    INDEX idx_latitude (latitude),
-    INDEX idx_longitude (longitude),
-    INDEX idx_region (region),
-    INDEX idx_land_type (land_type)
+    SPATIAL INDEX idx_location (location),
+    -- Site filters (app/services/filters.py): region and land_type equality
+    -- lead, the common attribute range follows; area, slope and irradiance
+    -- ranges alone use their own indexes
+    INDEX idx_region_land_type_area (region, land_type, area_sqm),
+    INDEX idx_land_type_area (land_type, area_sqm),
+    INDEX idx_area (area_sqm),
+    INDEX idx_slope (slope_degrees),
+    INDEX idx_irradiance (solar_irradiance_kwh)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Analysis Parameters table: Stores configurable weights for suitability calculation
@@ -44,24 +60,132 @@ CREATE TABLE analysis_parameters (
     CHECK (weight_value >= 0 AND weight_value <= 1)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
--- Analysis Results table: Stores calculated suitability scores
-CREATE TABLE analysis_results (
-    result_id INT PRIMARY KEY AUTO_INCREMENT,
-    site_id INT NOT NULL,
+-- Site Component Scores table: Weight-independent component scores, one row per site.
+-- Rows are refreshed by the application whenever sites.attributes_hash no longer matches.
+CREATE TABLE site_component_scores (
+    site_id INT PRIMARY KEY,
     solar_irradiance_score DECIMAL(5, 2) NOT NULL,
     area_score DECIMAL(5, 2) NOT NULL,
     grid_distance_score DECIMAL(5, 2) NOT NULL,
     slope_score DECIMAL(5, 2) NOT NULL,
     infrastructure_score DECIMAL(5, 2) NOT NULL,
+    attributes_hash CHAR(32) NOT NULL COMMENT 'sites.attributes_hash the scores were computed from',
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (site_id) REFERENCES sites(site_id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Analysis Runs table: One row per recalculation with the weights it used
+CREATE TABLE analysis_runs (
+    run_id INT PRIMARY KEY AUTO_INCREMENT,
+    status ENUM('running', 'completed', 'failed', 'deleting') NOT NULL DEFAULT 'running',
+    weights_snapshot JSON NOT NULL COMMENT 'JSON snapshot of weights used for this run',
+    weights_fingerprint CHAR(64) NOT NULL COMMENT 'SHA-256 of the canonical weights',
+    components_version INT NOT NULL DEFAULT 0 COMMENT 'analysis_state.components_version the run was scored from',
+    sites_version INT NOT NULL DEFAULT 0 COMMENT 'analysis_state.sites_version its snapshots were built from',
+    sites_analyzed INT NOT NULL DEFAULT 0,
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    completed_at TIMESTAMP NULL DEFAULT NULL,
+    last_used_at TIMESTAMP NULL DEFAULT NULL COMMENT 'Last time the run was made active',
+    INDEX idx_status (status),
+    INDEX idx_fingerprint (weights_fingerprint, components_version, sites_version, status),
+    INDEX idx_last_used (last_used_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Analysis Results table: Stores weighted total scores, keyed by run
+CREATE TABLE analysis_results (
+    run_id INT NOT NULL,
+    site_id INT NOT NULL,
     total_suitability_score DECIMAL(5, 2) NOT NULL COMMENT 'Final weighted score out of 100',
-    analysis_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    parameters_snapshot JSON COMMENT 'JSON snapshot of weights used for this analysis',
+    score_rank INT NOT NULL DEFAULT 0 COMMENT 'Dense rank of the score within the run, 1 = best',
+    PRIMARY KEY (run_id, site_id),
+    FOREIGN KEY (run_id) REFERENCES analysis_runs(run_id) ON DELETE CASCADE,
     FOREIGN KEY (site_id) REFERENCES sites(site_id) ON DELETE CASCADE,
-    INDEX idx_total_score (total_suitability_score),
-    INDEX idx_site_id (site_id),
-    INDEX idx_analysis_timestamp (analysis_timestamp)
+    INDEX idx_run_total_score (run_id, total_suitability_score DESC, site_id),
+    -- Per-site history; InnoDB appends the primary key, so this is (site_id, run_id).
+    -- Site detail does not need it: it reads the active run's row by primary key
+    INDEX idx_site_id (site_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Analysis Run Statistics table: StatisticsResponse snapshots computed when a
+-- run completes, for the unfiltered case and a grid of min/max score bands
+CREATE TABLE analysis_run_statistics (
+    run_id INT NOT NULL,
+    band_key VARCHAR(16) NOT NULL COMMENT 'min:max score band, * for an open bound',
+    statistics JSON NOT NULL COMMENT 'Serialized StatisticsResponse',
+    PRIMARY KEY (run_id, band_key),
+    FOREIGN KEY (run_id) REFERENCES analysis_runs(run_id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Analysis Run Sketches table: Score histogram (one counter per 0.01 point) of
+-- every region/land type cell of a run; cells are merged for percentile queries
+CREATE TABLE analysis_run_sketches (
+    run_id INT NOT NULL,
+    region VARCHAR(100) NOT NULL,
+    land_type VARCHAR(50) NOT NULL,
+    site_count INT NOT NULL,
+    histogram MEDIUMBLOB NOT NULL COMMENT 'zlib-compressed little-endian uint32 counts',
+    PRIMARY KEY (run_id, region, land_type),
+    FOREIGN KEY (run_id) REFERENCES analysis_runs(run_id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Analysis Run Cube table: Score aggregates of a run per region, land type and
+-- 1-point score bucket; every roll-up sums these cells
+CREATE TABLE analysis_run_cube (
+    run_id INT NOT NULL,
+    region VARCHAR(100) NOT NULL,
+    land_type VARCHAR(50) NOT NULL,
+    score_bucket TINYINT UNSIGNED NOT NULL COMMENT 'FLOOR(score), 100 counted in bucket 99',
+    site_count INT NOT NULL,
+    score_sum DOUBLE NOT NULL,
+    score_sum_squares DOUBLE NOT NULL,
+    min_score DECIMAL(5, 2) NOT NULL,
+    max_score DECIMAL(5, 2) NOT NULL,
+    PRIMARY KEY (run_id, region, land_type, score_bucket),
+    INDEX idx_run_land_type (run_id, land_type),
+    FOREIGN KEY (run_id) REFERENCES analysis_runs(run_id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Analysis State table: Single row pointing at the run served to readers.
+-- A run only becomes visible when this pointer is switched to it.
+CREATE TABLE analysis_state (
+    state_id TINYINT PRIMARY KEY DEFAULT 1,
+    active_run_id INT NULL,
+    components_version INT NOT NULL DEFAULT 0 COMMENT 'Incremented whenever site_component_scores change',
+    sites_version INT NOT NULL DEFAULT 0 COMMENT 'Incremented by triggers whenever a row of sites changes',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (active_run_id) REFERENCES analysis_runs(run_id),
+    CHECK (state_id = 1)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+INSERT INTO analysis_state (state_id, active_run_id) VALUES (1, NULL);
+
+-- Site data version: every insert and delete of a site, and every update that
+-- changes one of its columns, invalidates the runs' snapshots, the in-process
+-- indexes and the tile cache built from the previous site data
+CREATE TRIGGER sites_after_insert AFTER INSERT ON sites FOR EACH ROW
+    UPDATE analysis_state SET sites_version = sites_version + 1 WHERE state_id = 1;
+
+CREATE TRIGGER sites_after_delete AFTER DELETE ON sites FOR EACH ROW
+    UPDATE analysis_state SET sites_version = sites_version + 1 WHERE state_id = 1;
+
+-- ON DUPLICATE KEY UPDATE fires this for unchanged rows too, hence the comparison
+CREATE TRIGGER sites_after_update AFTER UPDATE ON sites FOR EACH ROW
+    UPDATE analysis_state SET sites_version = sites_version + 1
+    WHERE state_id = 1
+      AND NOT (
+          NEW.site_name <=> OLD.site_name
+          AND NEW.latitude <=> OLD.latitude
+          AND NEW.longitude <=> OLD.longitude
+          AND NEW.area_sqm <=> OLD.area_sqm
+          AND NEW.solar_irradiance_kwh <=> OLD.solar_irradiance_kwh
+          AND NEW.grid_distance_km <=> OLD.grid_distance_km
+          AND NEW.slope_degrees <=> OLD.slope_degrees
+          AND NEW.road_distance_km <=> OLD.road_distance_km
+          AND NEW.elevation_m <=> OLD.elevation_m
+          AND NEW.land_type <=> OLD.land_type
+          AND NEW.region <=> OLD.region
+      );
+
 -- Insert default analysis parameters (weights)
 INSERT INTO analysis_parameters (parameter_name, weight_value, description, is_active) VALUES
 ('solar_irradiance_weight', 0.35, 'Weight for solar irradiance in suitability calculation', TRUE),
@@ -70,7 +194,7 @@ INSERT INTO analysis_parameters (parameter_name, weight_value, description, is_a
 ('slope_weight', 0.15, 'Weight for terrain slope in suitability calculation', TRUE),
 ('infrastructure_weight', 0.05, 'Weight for road/infrastructure proximity in suitability calculation', TRUE);
 
--- Create a view for easy access to sites with latest analysis results
+-- Create a view for easy access to sites with the active run's analysis results
 CREATE OR REPLACE VIEW sites_with_scores AS
 SELECT 
     s.site_id,
@@ -85,181 +209,36 @@ SELECT
     s.elevation_m,
     s.land_type,
     s.region,
-    ar.solar_irradiance_score,
-    ar.area_score,
-    ar.grid_distance_score,
-    ar.slope_score,
-    ar.infrastructure_score,
+    s.location,
+    c.solar_irradiance_score,
+    c.area_score,
+    c.grid_distance_score,
+    c.slope_score,
+    c.infrastructure_score,
     ar.total_suitability_score,
-    ar.analysis_timestamp
+    ar.score_rank,
+    r.sites_analyzed AS ranked_sites,
+    r.completed_at AS analysis_timestamp
 FROM sites s
-LEFT JOIN (
-    SELECT site_id, 
-           solar_irradiance_score,
-           area_score,
-           grid_distance_score,
-           slope_score,
-           infrastructure_score,
-           total_suitability_score,
-           analysis_timestamp,
-           ROW_NUMBER() OVER (PARTITION BY site_id ORDER BY analysis_timestamp DESC) as rn
-    FROM analysis_results
-) ar ON s.site_id = ar.site_id AND ar.rn = 1;
-
--- Create stored procedure for calculating individual scores
-DELIMITER //
-
-CREATE PROCEDURE calculate_suitability_scores()
-BEGIN
-    DECLARE done INT DEFAULT FALSE;
-    DECLARE v_site_id INT;
-    DECLARE v_solar_irr DECIMAL(4, 2);
-    DECLARE v_area INT;
-    DECLARE v_grid_dist DECIMAL(5, 2);
-    DECLARE v_slope DECIMAL(4, 2);
-    DECLARE v_road_dist DECIMAL(5, 2);
-    
-    DECLARE v_solar_score DECIMAL(5, 2);
-    DECLARE v_area_score DECIMAL(5, 2);
-    DECLARE v_grid_score DECIMAL(5, 2);
-    DECLARE v_slope_score DECIMAL(5, 2);
-    DECLARE v_infra_score DECIMAL(5, 2);
-    DECLARE v_total_score DECIMAL(5, 2);
-    
-    DECLARE v_solar_weight DECIMAL(4, 3);
-    DECLARE v_area_weight DECIMAL(4, 3);
-    DECLARE v_grid_weight DECIMAL(4, 3);
-    DECLARE v_slope_weight DECIMAL(4, 3);
-    DECLARE v_infra_weight DECIMAL(4, 3);
-    
-    DECLARE site_cursor CURSOR FOR 
-        SELECT site_id, solar_irradiance_kwh, area_sqm, grid_distance_km, 
-               slope_degrees, road_distance_km 
-        FROM sites;
-    
-    DECLARE CONTINUE HANDLER FOR NOT FOUND SET done = TRUE;
-    
-    -- Get current weights
-    SELECT weight_value INTO v_solar_weight FROM analysis_parameters WHERE parameter_name = 'solar_irradiance_weight';
-    SELECT weight_value INTO v_area_weight FROM analysis_parameters WHERE parameter_name = 'area_weight';
-    SELECT weight_value INTO v_grid_weight FROM analysis_parameters WHERE parameter_name = 'grid_distance_weight';
-    SELECT weight_value INTO v_slope_weight FROM analysis_parameters WHERE parameter_name = 'slope_weight';
-    SELECT weight_value INTO v_infra_weight FROM analysis_parameters WHERE parameter_name = 'infrastructure_weight';
-    
-    OPEN site_cursor;
-    
-    read_loop: LOOP
-        FETCH site_cursor INTO v_site_id, v_solar_irr, v_area, v_grid_dist, v_slope, v_road_dist;
-        
-        IF done THEN
-            LEAVE read_loop;
-        END IF;
-        
-        -- Calculate solar irradiance score (0-100)
-        SET v_solar_score = CASE
-            WHEN v_solar_irr >= 5.5 THEN 100
-            WHEN v_solar_irr < 3.0 THEN 0
-            ELSE ((v_solar_irr - 3.0) / 2.5) * 100
-        END;
-        
-        -- Calculate area score (0-100)
-        SET v_area_score = CASE
-            WHEN v_area >= 50000 THEN 100
-            WHEN v_area < 5000 THEN 0
-            ELSE ((v_area - 5000) / 45000) * 100
-        END;
-        
-        -- Calculate grid distance score (0-100, inverse relationship)
-        SET v_grid_score = CASE
-            WHEN v_grid_dist <= 1 THEN 100
-            WHEN v_grid_dist >= 20 THEN 0
-            ELSE 100 - ((v_grid_dist - 1) / 19) * 100
-        END;
-        
-        -- Calculate slope score (0-100)
-        SET v_slope_score = CASE
-            WHEN v_slope <= 5 THEN 100
-            WHEN v_slope > 20 THEN 0
-            WHEN v_slope <= 15 THEN 100 - ((v_slope - 5) / 10) * 50
-            ELSE 50 - ((v_slope - 15) / 5) * 50
-        END;
-        
-        -- Calculate infrastructure score (0-100, based on road proximity)
-        SET v_infra_score = CASE
-            WHEN v_road_dist <= 0.5 THEN 100
-            WHEN v_road_dist >= 5 THEN 0
-            ELSE 100 - ((v_road_dist - 0.5) / 4.5) * 100
-        END;
-        
-        -- Calculate total weighted score
-        SET v_total_score = (
-            v_solar_score * v_solar_weight +
-            v_area_score * v_area_weight +
-            v_grid_score * v_grid_weight +
-            v_slope_score * v_slope_weight +
-            v_infra_score * v_infra_weight
-        );
-        
-        -- Insert results
-        INSERT INTO analysis_results (
-            site_id, 
-            solar_irradiance_score, 
-            area_score, 
-            grid_distance_score, 
-            slope_score, 
-            infrastructure_score, 
-            total_suitability_score,
-            parameters_snapshot
-        ) VALUES (
-            v_site_id,
-            v_solar_score,
-            v_area_score,
-            v_grid_score,
-            v_slope_score,
-            v_infra_score,
-            v_total_score,
-            JSON_OBJECT(
-                'solar_weight', v_solar_weight,
-                'area_weight', v_area_weight,
-                'grid_weight', v_grid_weight,
-                'slope_weight', v_slope_weight,
-                'infra_weight', v_infra_weight
-            )
-        );
-        
-    END LOOP;
-    
-    CLOSE site_cursor;
-END //
-
-DELIMITER ;
+LEFT JOIN site_component_scores c ON c.site_id = s.site_id
+LEFT JOIN analysis_state st ON st.state_id = 1
+LEFT JOIN analysis_runs r ON r.run_id = st.active_run_id
+LEFT JOIN analysis_results ar ON ar.run_id = st.active_run_id AND ar.site_id = s.site_id;
 
 -- Create function to get site rank by score
 DELIMITER //
 
 CREATE FUNCTION get_site_rank(p_site_id INT)
 RETURNS INT
-DETERMINISTIC
+READS SQL DATA
 BEGIN
     DECLARE v_rank INT;
     
-    SELECT COUNT(*) + 1 INTO v_rank
-    FROM (
-        SELECT site_id, total_suitability_score
-        FROM analysis_results ar1
-        WHERE analysis_timestamp = (
-            SELECT MAX(analysis_timestamp) 
-            FROM analysis_results ar2 
-            WHERE ar2.site_id = ar1.site_id
-        )
-    ) latest_scores
-    WHERE total_suitability_score > (
-        SELECT total_suitability_score
-        FROM analysis_results
-        WHERE site_id = p_site_id
-        ORDER BY analysis_timestamp DESC
-        LIMIT 1
-    );
+    -- Ranks are stored with the active run's results: a primary key lookup
+    SELECT ar.score_rank INTO v_rank
+    FROM analysis_state st
+    JOIN analysis_results ar ON ar.run_id = st.active_run_id AND ar.site_id = p_site_id
+    WHERE st.state_id = 1;
     
     RETURN v_rank;
 END //
@@ -0,0 +1,146 @@
+"""
+Site detail latency benchmark
+Measures GET /api/sites/{id} lookups against growing analysis history and
+prints the query plan of the detail query
+"""
+
+import argparse
+import asyncio
+import hashlib
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import text
+
+from app.config import get_settings
+from app.database import get_db_context
+from app.services.analysis_service import AnalysisService
+from app.services.retention_service import RetentionService
+from app.services.site_service import SiteService, DETAIL_COLUMNS
+
+settings = get_settings()
+
+
+async def history_size(db):
+    """(runs, analysis_results rows) currently stored"""
+    result = await db.execute(text("""
+        SELECT
+            (SELECT COUNT(*) FROM analysis_runs) AS runs,
+            (SELECT COUNT(*) FROM analysis_results) AS result_rows
+    """))
+    row = result.fetchone()
+    return row.runs, row.result_rows
+
+
+async def explain_detail(db, site_id):
+    """Print the plan of the detail query; every table should be const or eq_ref"""
+    query = text(f"""
+        EXPLAIN SELECT {DETAIL_COLUMNS}
+        FROM sites_with_scores
+        WHERE site_id = :site_id
+    """)
+    result = await db.execute(query, {"site_id": site_id})
+    print(f"\n{'table':<8} {'type':<8} {'key':<14} {'rows':>6}")
+    for row in result.mappings().fetchall():
+        print(f"{str(row['table']):<8} {str(row['type']):<8} {str(row['key']):<14} {str(row['rows']):>6}")
+
+
+async def measure(db, site_ids, repeats):
+    """Median and p95 detail latency in milliseconds"""
+    timings = []
+    for _ in range(repeats):
+        for site_id in site_ids:
+            started = time.perf_counter()
+            await SiteService.get_site_by_id(db, site_id)
+            timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+async def add_archived_runs(db, active_run_id, count, offset):
+    """
+    Copy the active run's results into count completed, inactive runs.
+    Their fingerprints never match real weights, so they are not reused.
+    """
+    run_ids = []
+    for index in range(count):
+        fingerprint = hashlib.sha256(f"detail-benchmark-{offset + index}".encode()).hexdigest()
+        result = await db.execute(text("""
+            INSERT INTO analysis_runs (
+                status, weights_snapshot, weights_fingerprint, components_version,
+                sites_version, sites_analyzed, started_at, completed_at
+            )
+            SELECT 'completed', weights_snapshot, :fingerprint, components_version,
+                   sites_version, sites_analyzed, started_at, completed_at
+            FROM analysis_runs
+            WHERE run_id = :active_run_id
+        """), {"fingerprint": fingerprint, "active_run_id": active_run_id})
+        run_id = result.lastrowid
+        await db.execute(text("""
+            INSERT INTO analysis_results (run_id, site_id, total_suitability_score, score_rank)
+            SELECT :run_id, site_id, total_suitability_score, score_rank
+            FROM analysis_results
+            WHERE run_id = :active_run_id
+        """), {"run_id": run_id, "active_run_id": active_run_id})
+        await db.commit()
+        run_ids.append(run_id)
+    return run_ids
+
+
+async def main(steps, sample_size, repeats):
+    """Main benchmark function"""
+    
+    print("=" * 60)
+    print("Solar Site Analyzer - Site Detail Benchmark")
+    print("=" * 60)
+    
+    async with get_db_context() as db:
+        active_run_id = await AnalysisService.get_active_run_id(db)
+        if active_run_id is None:
+            print("No active analysis run; run scripts/init_database.py first")
+            sys.exit(1)
+        
+        result = await db.execute(text("SELECT site_id FROM sites"))
+        all_site_ids = [row.site_id for row in result.fetchall()]
+        if not all_site_ids:
+            print("No sites loaded; run scripts/init_database.py first")
+            sys.exit(1)
+        site_ids = random.sample(all_site_ids, min(sample_size, len(all_site_ids)))
+        
+        await explain_detail(db, site_ids[0])
+        
+        print(f"\n{'runs':>6} {'result rows':>12} {'median ms':>10} {'p95 ms':>8}")
+        archived = []
+        try:
+            for step in [0] + steps:
+                if step > len(archived):
+                    archived += await add_archived_runs(
+                        db, active_run_id, step - len(archived), len(archived)
+                    )
+                runs, result_rows = await history_size(db)
+                median, p95 = await measure(db, site_ids, repeats)
+                print(f"{runs:>6} {result_rows:>12} {median:>10.3f} {p95:>8.3f}")
+        finally:
+            for run_id in archived:
+                await RetentionService.delete_run(db, run_id, settings.RETENTION_BATCH_SIZE)
+            if archived:
+                print(f"\nRemoved {len(archived)} benchmark runs")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--runs", type=int, nargs="*", default=[5, 20, 50],
+        help="Archived runs to add before each measurement (cumulative totals)"
+    )
+    parser.add_argument("--sample", type=int, default=200, help="Sites looked up per measurement")
+    parser.add_argument("--repeats", type=int, default=3, help="Lookups per sampled site")
+    args = parser.parse_args()
+    
+    asyncio.run(main(sorted(args.runs), args.sample, args.repeats))
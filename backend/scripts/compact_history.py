@@ -0,0 +1,52 @@
+"""
+Analysis history compaction script
+Deletes analysis runs that fall outside the retention policy
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.database import get_db_context
+from app.services.retention_service import RetentionService
+
+
+async def main(keep_runs=None, keep_days=None, batch_size=None):
+    """Main compaction function"""
+    
+    print("=" * 60)
+    print("Solar Site Analyzer - Analysis History Compaction")
+    print("=" * 60)
+    
+    try:
+        async with get_db_context() as db:
+            result = await RetentionService.compact(
+                db,
+                keep_runs=keep_runs,
+                keep_days=keep_days,
+                batch_size=batch_size
+            )
+        
+        print(f"Runs deleted: {result.runs_deleted} {result.run_ids}")
+        print(f"Result rows deleted: {result.rows_deleted}")
+        print(f"Duration: {result.duration_seconds}s")
+    
+    except Exception as e:
+        print(f"\nError during compaction: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--keep-runs", type=int, help="Completed runs to keep (0 disables)")
+    parser.add_argument("--keep-days", type=int, help="Drop runs older than this many days (0 disables)")
+    parser.add_argument("--batch-size", type=int, help="Result rows deleted per transaction")
+    args = parser.parse_args()
+    
+    asyncio.run(main(args.keep_runs, args.keep_days, args.batch_size))
@@ -3,6 +3,7 @@ Database initialization script
 Loads data from CSV and calculates initial scores
 """
 
+import argparse
 import asyncio
 import csv
 import sys
@@ -12,6 +13,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from sqlalchemy import text
+from app.cache import CacheManager, invalidate_score_caches
 from app.database import get_db_context
 from app.services.analysis_service import AnalysisService
 from app.models.schemas import AnalysisWeights
@@ -74,12 +76,39 @@ async def calculate_initial_scores():
         
         # Perform analysis
         result = await AnalysisService.recalculate_all_sites(db, default_weights)
-        
-        print(f"Successfully calculated scores for {result.sites_analyzed} sites")
-        return result
+    
+    print(f"Successfully calculated scores for {result.sites_analyzed} sites")
+    
+    await invalidate_caches()
+    
+    return result
 
 
-async def main():
+async def update_changed_scores():
+    """Rescore only the sites added or updated since the last run"""
+    
+    print("Rescoring changed sites...")
+    
+    async with get_db_context() as db:
+        result = await AnalysisService.rescore_changed_sites(db)
+    
+    print(result.message)
+    
+    # A new run is written whenever any site column changed
+    if result.sites_analyzed:
+        await invalidate_caches()
+    
+    return result
+
+
+async def invalidate_caches():
+    """Drop cached responses built from the previous scores and site data"""
+    await CacheManager.init_redis()
+    await invalidate_score_caches()
+    await CacheManager.close_redis()
+
+
+async def main(full: bool = False):
     """Main initialization function"""
     
     print("=" * 60)
@@ -97,8 +126,11 @@ async def main():
         # Load data from CSV
         await load_csv_data(str(csv_file))
         
-        # Calculate initial scores
-        await calculate_initial_scores()
+        # Calculate scores, incrementally unless a full recalculation is requested
+        if full:
+            await calculate_initial_scores()
+        else:
+            await update_changed_scores()
         
         print("\n" + "=" * 60)
         print("Database initialization completed successfully!")
@@ -107,7 +139,7 @@ async def main():
         print("  python -m uvicorn app.main:app --reload")
         print("\nOr visit the API docs at:")
         print("  http://localhost:8000/docs")
-        
+    
     except Exception as e:
         print(f"\nError during initialization: {str(e)}")
         import traceback
@@ -116,4 +148,12 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Load site data and calculate scores")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Rescore every site with default weights instead of only changed sites"
+    )
+    args = parser.parse_args()
+    
+    asyncio.run(main(full=args.full))
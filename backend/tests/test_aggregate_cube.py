@@ -0,0 +1,84 @@
+"""Tests for building and rolling up the aggregate cube"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services.aggregate_cube import AggregateCube
+
+
+def site(region, land_type, score):
+    return SimpleNamespace(region=region, land_type=land_type, total_suitability_score=score)
+
+
+@pytest.fixture
+def rows():
+    return [
+        site("North", "Barren", 72.5),
+        site("North", "Barren", 72.1),
+        site("north", "Barren", 40.0),
+        site("North", "Agricultural", 100.0),
+        site("South", "Barren", 0.0),
+        site("South", "Barren", None),
+    ]
+
+
+def test_build_cells_skips_unscored_sites(rows):
+    cells = AggregateCube.build_cells(rows)
+    
+    assert sum(cell["site_count"] for cell in cells) == 5
+
+
+def test_build_cells_buckets_by_whole_score(rows):
+    cells = {
+        (cell["region"], cell["land_type"], cell["score_bucket"]): cell
+        for cell in AggregateCube.build_cells(rows)
+    }
+    
+    assert set(cells) == {
+        ("North", "Barren", 72),
+        ("North", "Barren", 40),
+        ("North", "Agricultural", 99),
+        ("South", "Barren", 0),
+    }
+    cell = cells[("North", "Barren", 72)]
+    assert cell["site_count"] == 2
+    assert cell["score_sum"] == pytest.approx(144.6)
+    assert cell["score_sum_squares"] == pytest.approx(72.5 ** 2 + 72.1 ** 2)
+    assert (cell["min_score"], cell["max_score"]) == (72.1, 72.5)
+
+
+def test_rolled_up_cells_match_direct_statistics(rows):
+    scores = np.array([72.5, 72.1, 40.0, 100.0, 0.0])
+    cells = AggregateCube.build_cells(rows)
+    totals = SimpleNamespace(
+        site_count=sum(cell["site_count"] for cell in cells),
+        score_sum=sum(cell["score_sum"] for cell in cells),
+        score_sum_squares=sum(cell["score_sum_squares"] for cell in cells),
+        min_score=min(cell["min_score"] for cell in cells),
+        max_score=max(cell["max_score"] for cell in cells)
+    )
+    
+    cell = AggregateCube._to_cell(totals, [])
+    
+    assert cell.site_count == 5
+    assert cell.avg_score == round(scores.mean(), 2)
+    assert cell.std_deviation == round(scores.std(), 2)
+    assert (cell.min_score, cell.max_score) == (0.0, 100.0)
+
+
+@pytest.mark.parametrize("first, second", [
+    ("North", "north"),
+    ("Tamil Nadu", "Tamil Nadu  "),
+    ("Pondichéry", "PONDICHERY"),
+])
+def test_collation_key_matches_case_accent_and_padding_insensitive_labels(first, second):
+    assert AggregateCube.collation_key(first) == AggregateCube.collation_key(second)
+
+
+def test_encode_labels_keeps_first_spelling():
+    labels, codes = AggregateCube.encode_labels(["North", "South", "NORTH", "south "])
+    
+    assert labels == ["North", "South"]
+    np.testing.assert_array_equal(codes, [0, 1, 0, 1])
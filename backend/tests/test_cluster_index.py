@@ -0,0 +1,64 @@
+"""Tests for the per-zoom map cluster pyramid"""
+
+import numpy as np
+import pytest
+
+from app.services.cluster_index import ClusterIndex
+
+WORLD = (-180.0, -85.0, 180.0, 85.0)
+
+
+@pytest.fixture
+def sites():
+    rng = np.random.default_rng(9)
+    latitudes = np.concatenate([rng.uniform(8, 14, 300), [0.0, 0.5, -0.5]])
+    longitudes = np.concatenate([rng.uniform(74, 80, 300), [179.5, -179.5, 179.9]])
+    scores = np.concatenate([rng.uniform(0, 100, 300), [np.nan, 40.0, 60.0]])
+    ClusterIndex.build(latitudes, longitudes, scores)
+    return latitudes, longitudes, scores
+
+
+@pytest.mark.parametrize("zoom", [0, 3, 7, 13])
+def test_every_zoom_level_counts_every_site_once(sites, zoom):
+    clusters = ClusterIndex.clusters(WORLD, zoom)
+    
+    assert sum(cluster.site_count for cluster in clusters) == len(sites[0])
+    assert sum(cluster.scored_count for cluster in clusters) == len(sites[0]) - 1
+
+
+def test_cluster_scores_aggregate_scored_sites(sites):
+    scores = sites[2]
+    
+    clusters = ClusterIndex.clusters(WORLD, 0)
+    
+    score_sum = sum(cluster.avg_score * cluster.scored_count for cluster in clusters)
+    assert score_sum / (len(scores) - 1) == pytest.approx(np.nanmean(scores), abs=0.01)
+    assert max(cluster.max_score for cluster in clusters) == round(np.nanmax(scores), 2)
+
+
+def test_viewport_only_returns_clusters_inside_it(sites):
+    clusters = ClusterIndex.clusters((74.0, 8.0, 80.0, 14.0), 10)
+    
+    assert sum(cluster.site_count for cluster in clusters) == 300
+    assert all(74 <= cluster.longitude <= 80 for cluster in clusters)
+
+
+@pytest.mark.parametrize("zoom", [0, 2, 8])
+def test_antimeridian_viewport_covers_both_sides_without_duplicates(sites, zoom):
+    clusters = ClusterIndex.clusters((179.0, -1.0, -179.0, 1.0), zoom)
+    
+    assert sum(cluster.site_count for cluster in clusters) == 3
+
+
+def test_wrapping_viewport_halves_sharing_cells_count_them_once(sites):
+    # Both halves of a box wrapping almost all the way around reach the same
+    # zoom 0 cells
+    clusters = ClusterIndex.clusters((80.5, -85.0, 80.0, 85.0), 0)
+    
+    assert sum(cluster.site_count for cluster in clusters) == len(sites[0])
+
+
+def test_empty_index_has_no_clusters():
+    ClusterIndex.build(np.empty(0), np.empty(0), np.empty(0))
+    
+    assert ClusterIndex.clusters(WORLD, 5) == []
@@ -0,0 +1,60 @@
+"""Tests for threshold-algorithm top-k over the component index"""
+
+import numpy as np
+import pytest
+
+from app.models.schemas import AnalysisWeights
+from app.services.component_index import ComponentIndex
+from app.services.scoring_engine import ScoringEngine
+
+
+@pytest.fixture
+def components():
+    rng = np.random.default_rng(3)
+    # Coarse scores produce ties across sites
+    components = np.round(rng.uniform(0, 100, (1000, 5)) / 5) * 5
+    ComponentIndex.build(np.arange(1, 1001, dtype=np.int64), components)
+    return components
+
+
+@pytest.mark.parametrize("weights", [
+    AnalysisWeights(),
+    AnalysisWeights(solar=0, area=1, grid_distance=0, slope=0, infrastructure=0),
+    AnalysisWeights(solar=0.5, area=0, grid_distance=0, slope=0.5, infrastructure=0),
+])
+@pytest.mark.parametrize("k", [1, 10, 200])
+def test_top_k_matches_scoring_every_site(components, weights, k):
+    site_ids = np.arange(1, 1001, dtype=np.int64)
+    scores = ScoringEngine.compute_total_scores(components, weights)
+    expected = np.lexsort((site_ids, -scores))[:k]
+    
+    top_ids, top_scores, examined = ComponentIndex.top_k(weights, k)
+    
+    np.testing.assert_array_equal(top_ids, site_ids[expected])
+    np.testing.assert_array_equal(top_scores, scores[expected])
+    assert k <= examined <= len(site_ids)
+
+
+def test_top_k_stops_early_for_a_single_component(components):
+    weights = AnalysisWeights(solar=1, area=0, grid_distance=0, slope=0, infrastructure=0)
+    
+    _, _, examined = ComponentIndex.top_k(weights, 5)
+    
+    assert examined < len(components)
+
+
+def test_top_k_with_zero_weights_returns_lowest_site_ids(components):
+    weights = AnalysisWeights(solar=0, area=0, grid_distance=0, slope=0, infrastructure=0)
+    
+    top_ids, top_scores, _ = ComponentIndex.top_k(weights, 3)
+    
+    np.testing.assert_array_equal(top_ids, [1, 2, 3])
+    np.testing.assert_array_equal(top_scores, [0, 0, 0])
+
+
+def test_top_k_caps_k_at_site_count():
+    ComponentIndex.build(np.array([4, 9], dtype=np.int64), np.full((2, 5), 50.0))
+    
+    top_ids, _, _ = ComponentIndex.top_k(AnalysisWeights(), 10)
+    
+    np.testing.assert_array_equal(top_ids, [4, 9])
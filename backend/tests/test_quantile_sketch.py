@@ -0,0 +1,51 @@
+"""Tests for the mergeable score quantile sketch"""
+
+import numpy as np
+import pytest
+
+from app.services.quantile_sketch import QuantileSketch
+
+
+@pytest.fixture
+def scores():
+    rng = np.random.default_rng(11)
+    return np.round(rng.uniform(0, 100, 2001), 2)
+
+
+def test_quantiles_match_numpy(scores):
+    qs = [0.0, 0.1, 0.25, 0.5, 0.9, 0.99, 1.0]
+    
+    sketch = QuantileSketch.from_scores(scores)
+    
+    np.testing.assert_allclose(sketch.quantiles(qs), np.quantile(scores, qs), atol=0.005)
+
+
+def test_merged_sketches_equal_sketch_of_all_scores(scores):
+    parts = [QuantileSketch.from_scores(part) for part in np.array_split(scores, 4)]
+    
+    merged = QuantileSketch.merge_all(parts)
+    
+    np.testing.assert_array_equal(merged.counts, QuantileSketch.from_scores(scores).counts)
+    assert merged.count() == len(scores)
+
+
+def test_restrict_keeps_inclusive_score_range():
+    sketch = QuantileSketch.from_scores(np.array([10.0, 20.0, 20.01, 30.0, 40.0]))
+    
+    restricted = sketch.restrict(min_score=20, max_score=30)
+    
+    assert restricted.count() == 3
+    assert restricted.quantiles([0, 1]) == [20.0, 30.0]
+    assert sketch.count() == 5
+
+
+def test_serialization_round_trip(scores):
+    sketch = QuantileSketch.from_scores(scores)
+    
+    restored = QuantileSketch.from_bytes(sketch.to_bytes())
+    
+    np.testing.assert_array_equal(restored.counts, sketch.counts)
+
+
+def test_empty_sketch_has_no_quantiles():
+    assert QuantileSketch().quantiles([0.5, 0.9]) == [None, None]
@@ -0,0 +1,60 @@
+"""Tests for the analysis history retention policy"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.analysis_service import AnalysisService
+from app.services.retention_service import RetentionService
+
+
+class RunsSession:
+    """Session answering the retention query with fixed rows, most recently used first"""
+    
+    def __init__(self, rows):
+        self.rows = rows
+    
+    async def execute(self, query, params=None):
+        return SimpleNamespace(fetchall=lambda: self.rows)
+
+
+def run(run_id, status="completed", is_aged_out=0):
+    return SimpleNamespace(run_id=run_id, status=status, is_aged_out=is_aged_out)
+
+
+@pytest.fixture
+def active_run(monkeypatch):
+    async def get_active_run_id(db):
+        return 10
+    monkeypatch.setattr(AnalysisService, "get_active_run_id", get_active_run_id)
+
+
+def find_expired(rows, keep_runs, keep_days):
+    return asyncio.run(RetentionService.find_expired_runs(RunsSession(rows), keep_runs, keep_days))
+
+
+def test_active_run_does_not_count_towards_keep_runs(active_run):
+    rows = [run(10), run(9), run(8), run(7)]
+    
+    assert find_expired(rows, keep_runs=2, keep_days=0) == [7]
+
+
+def test_running_runs_are_kept_and_failed_runs_expired(active_run):
+    rows = [run(12, "running"), run(11, "failed"), run(9), run(8, "deleting"), run(7)]
+    
+    assert find_expired(rows, keep_runs=1, keep_days=0) == [11, 8, 7]
+
+
+def test_aged_out_runs_expire_even_within_keep_runs(active_run):
+    rows = [run(10, is_aged_out=1), run(9), run(8, is_aged_out=1)]
+    
+    assert find_expired(rows, keep_runs=5, keep_days=30) == [8]
+
+
+def test_zero_limits_disable_their_rule(active_run):
+    rows = [run(9, is_aged_out=1), run(8), run(7)]
+    
+    assert find_expired(rows, keep_runs=0, keep_days=0) == []
+    assert find_expired(rows, keep_runs=0, keep_days=30) == [9]
+    assert find_expired(rows, keep_runs=1, keep_days=0) == [8, 7]
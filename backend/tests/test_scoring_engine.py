@@ -0,0 +1,71 @@
+"""Tests for the vectorized scoring engine"""
+
+import numpy as np
+import pytest
+
+from app.models.schemas import AnalysisWeights
+from app.services.scoring_engine import ScoringEngine
+
+
+def test_component_scores_at_breakpoints():
+    attributes = np.array([
+        # solar, area, grid distance, slope, road distance
+        [3.0, 5000, 20, 20, 5.0],
+        [5.5, 50000, 1, 5, 0.5],
+        [4.25, 27500, 10.5, 15, 2.75],
+        [7.0, 90000, 0, 0, 0.0],
+        [1.0, 100, 40, 30, 9.0],
+    ])
+    
+    components = ScoringEngine.compute_component_scores(attributes)
+    
+    np.testing.assert_array_equal(components, [
+        [0, 0, 0, 0, 0],
+        [100, 100, 100, 100, 100],
+        [50, 50, 50, 50, 50],
+        [100, 100, 100, 100, 100],
+        [0, 0, 0, 0, 0],
+    ])
+
+
+def test_round_scores_rounds_half_away_from_zero():
+    np.testing.assert_array_equal(
+        ScoringEngine.round_scores(np.array([12.345, 12.344, 99.995, 0.005])),
+        [12.35, 12.34, 100.0, 0.01]
+    )
+
+
+def test_total_scores_match_per_profile_scores():
+    rng = np.random.default_rng(7)
+    components = ScoringEngine.round_scores(rng.uniform(0, 100, (50, 5)))
+    profiles = [
+        AnalysisWeights(),
+        AnalysisWeights(solar=1, area=0, grid_distance=0, slope=0, infrastructure=0),
+    ]
+    
+    profile_scores = ScoringEngine.compute_profile_scores(components, profiles)
+    
+    for column, weights in enumerate(profiles):
+        np.testing.assert_allclose(
+            profile_scores[:, column],
+            ScoringEngine.compute_total_scores(components, weights)
+        )
+    np.testing.assert_allclose(profile_scores[:, 1], components[:, 0])
+
+
+@pytest.mark.parametrize("k", [0, 1, 5, 20, 100])
+def test_top_k_indices_matches_full_sort(k):
+    rng = np.random.default_rng(k)
+    # Few distinct values, so many ties have to be broken by site_id
+    scores = rng.integers(0, 10, 40).astype(np.float64)
+    site_ids = rng.permutation(1000)[:40]
+    
+    expected = np.lexsort((site_ids, -scores))[:k]
+    
+    np.testing.assert_array_equal(ScoringEngine.top_k_indices(scores, site_ids, k), expected)
+
+
+def test_dense_ranks_share_ranks_between_ties():
+    scores = np.array([50.0, 80.0, 50.0, 99.5, 10.0, 80.0])
+    
+    np.testing.assert_array_equal(ScoringEngine.dense_ranks(scores), [3, 2, 3, 1, 4, 2])
@@ -0,0 +1,23 @@
+"""Tests for keyset pagination cursors of GET /api/sites"""
+
+import pytest
+
+from app.services.site_service import SiteService
+
+
+@pytest.mark.parametrize("score, site_id, expected", [
+    ("87.45", 12, (87.45, 12)),
+    (0, 1, (0.0, 1)),
+    (None, 99, (None, 99)),
+])
+def test_cursor_round_trip(score, site_id, expected):
+    cursor = SiteService._encode_cursor(score, site_id)
+    
+    assert "=" not in cursor
+    assert SiteService._decode_cursor(cursor) == expected
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", "WzEsMiwzXQ", "eyJhIjogMX0"])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        SiteService._decode_cursor(cursor)
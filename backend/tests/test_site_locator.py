@@ -0,0 +1,81 @@
+"""Tests for the in-memory nearest-site grid"""
+
+import numpy as np
+import pytest
+
+from app.services.site_locator import SiteLocator
+from app.services.spatial import EARTH_RADIUS_KM
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+@pytest.fixture
+def sites():
+    rng = np.random.default_rng(5)
+    # A dense cluster plus a few isolated sites, including across the antimeridian
+    latitudes = np.concatenate([rng.uniform(8, 14, 500), [60.0, -45.0, 0.0, 0.0]])
+    longitudes = np.concatenate([rng.uniform(74, 80, 500), [10.0, 120.0, 179.9, -179.9]])
+    site_ids = np.arange(100, 100 + len(latitudes), dtype=np.int64)
+    SiteLocator.build(site_ids, latitudes, longitudes)
+    return site_ids, latitudes, longitudes
+
+
+def brute_force_nearest(sites, position, k):
+    site_ids, latitudes, longitudes = sites
+    distances = haversine_km(latitudes[position], longitudes[position], latitudes, longitudes)
+    others = np.delete(np.arange(len(site_ids)), position)
+    order = np.lexsort((site_ids[others], distances[others]))[:k]
+    return site_ids[others[order]], distances[others[order]]
+
+
+@pytest.mark.parametrize("position", [0, 250, 499, 500, 501, 502, 503])
+@pytest.mark.parametrize("k", [1, 8, 50])
+def test_nearest_matches_brute_force(sites, position, k):
+    site_ids = sites[0]
+    expected_ids, expected_distances = brute_force_nearest(sites, position, k)
+    
+    found_ids, distances = SiteLocator.nearest(int(site_ids[position]), k)
+    
+    np.testing.assert_allclose(distances, expected_distances, atol=1e-6)
+    # Ids may only differ between sites at the same distance
+    np.testing.assert_array_equal(np.sort(found_ids), np.sort(expected_ids))
+
+
+def test_nearest_across_the_antimeridian(sites):
+    site_ids = sites[0]
+    
+    found_ids, distances = SiteLocator.nearest(int(site_ids[502]), 1)
+    
+    assert found_ids.tolist() == [site_ids[503]]
+    assert distances[0] == pytest.approx(haversine_km(0, 179.9, 0, -179.9))
+
+
+def test_nearest_caps_k_and_excludes_the_site(sites):
+    site_ids = sites[0]
+    
+    found_ids, _ = SiteLocator.nearest(int(site_ids[0]), 10_000)
+    
+    assert len(found_ids) == len(site_ids) - 1
+    assert site_ids[0] not in found_ids
+
+
+def test_unknown_site_raises_key_error(sites):
+    assert not SiteLocator.contains(1)
+    with pytest.raises(KeyError):
+        SiteLocator.nearest(1, 5)
+
+
+def test_shell_offsets_hold_exactly_the_ring_cells():
+    for ring in range(5):
+        offsets = SiteLocator._shell_offsets(ring)
+        
+        assert len(offsets) == SiteLocator._shell_cell_count(ring)
+        assert len(np.unique(offsets, axis=0)) == len(offsets)
+        assert np.all(np.abs(offsets).max(axis=1) == ring)
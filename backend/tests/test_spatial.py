@@ -0,0 +1,77 @@
+"""Tests for bounding-box and radius filter parsing"""
+
+import math
+
+import pytest
+
+from app.services.spatial import EARTH_RADIUS_KM, SpatialFilter
+
+
+def test_parse_bbox():
+    assert SpatialFilter.parse_bbox("76.5,10.5,78.0,11.5") == (76.5, 10.5, 78.0, 11.5)
+    assert SpatialFilter.parse_bbox(None) is None
+
+
+@pytest.mark.parametrize("value", [
+    "76.5,10.5,78.0",
+    "a,b,c,d",
+    "76.5,11.5,78.0,10.5",
+    "76.5,10.5,181,11.5",
+    "76.5,-91,78.0,11.5",
+])
+def test_parse_bbox_rejects_invalid_boxes(value):
+    with pytest.raises(ValueError):
+        SpatialFilter.parse_bbox(value)
+
+
+def test_antimeridian_bbox_is_split_into_two_envelopes():
+    bbox = SpatialFilter.parse_bbox("170,-10,-170,10")
+    params = {}
+    
+    conditions = SpatialFilter.conditions(params, bbox=bbox, column="s.location")
+    
+    assert SpatialFilter.split_bbox(bbox) == [(170, -10, 180, 10), (-180, -10, -170, 10)]
+    assert len(conditions) == 1
+    assert " OR " in conditions[0]
+    assert (params["bbox_min_lon"], params["bbox_max_lon"]) == (170, 180)
+    assert (params["bbox_wrap_min_lon"], params["bbox_wrap_max_lon"]) == (-180, -170)
+
+
+def test_plain_bbox_is_one_envelope():
+    params = {}
+    
+    conditions = SpatialFilter.conditions(params, bbox=(76.5, 10.5, 78.0, 11.5))
+    
+    assert conditions == [
+        "MBRCovers(ST_MakeEnvelope(POINT(:bbox_min_lon, :bbox_min_lat), "
+        "POINT(:bbox_max_lon, :bbox_max_lat)), location)"
+    ]
+    assert "bbox_wrap_min_lon" not in params
+
+
+def test_parse_near_requires_radius_and_point_together():
+    assert SpatialFilter.parse_near("11.0244,77.1686", 5) == (11.0244, 77.1686)
+    assert SpatialFilter.parse_near(None, None) is None
+    with pytest.raises(ValueError):
+        SpatialFilter.parse_near("11.0244,77.1686", None)
+    with pytest.raises(ValueError):
+        SpatialFilter.parse_near(None, 5)
+
+
+def test_radius_bbox_encloses_the_circle():
+    lat, lon, radius_km = 11.0, 77.0, 50.0
+    
+    min_lon, min_lat, max_lon, max_lat = SpatialFilter.radius_bbox((lat, lon), radius_km)
+    
+    degrees = math.degrees(radius_km / EARTH_RADIUS_KM)
+    assert (min_lat, max_lat) == pytest.approx((lat - degrees, lat + degrees))
+    # Longitude span is widest at the latitude farthest from the equator
+    assert max_lon - lon == pytest.approx(degrees / math.cos(math.radians(max_lat)))
+    assert lon - min_lon == pytest.approx(max_lon - lon)
+
+
+@pytest.mark.parametrize("near", [(89.9, 0.0), (0.0, 179.9)])
+def test_radius_bbox_spans_every_longitude_at_poles_and_antimeridian(near):
+    min_lon, _, max_lon, _ = SpatialFilter.radius_bbox(near, 50)
+    
+    assert (min_lon, max_lon) == (-180.0, 180.0)
@@ -0,0 +1,60 @@
+"""Tests for the single-pass statistics engine"""
+
+import numpy as np
+
+from app.services.statistics_engine import StatisticsEngine
+
+
+def test_summarize_matches_numpy():
+    scores = np.array([10.0, 20.0, 35.5, 90.25])
+    
+    summary = StatisticsEngine.summarize(scores)
+    
+    assert summary == {
+        "average_score": round(scores.mean(), 2),
+        "median_score": 27.75,
+        "min_score": 10.0,
+        "max_score": 90.25,
+        "std_deviation": round(scores.std(), 2)
+    }
+
+
+def test_summarize_empty_scores():
+    assert set(StatisticsEngine.summarize(np.empty(0)).values()) == {0.0}
+
+
+def test_distribution_buckets_by_lower_bound():
+    scores = np.array([0.0, 19.99, 39.99, 40.0, 59.5, 60.0, 80.0, 100.0])
+    
+    buckets = StatisticsEngine.distribution(scores)
+    
+    assert [(bucket.range_label, bucket.count, bucket.percentage) for bucket in buckets] == [
+        ("80-100 (Excellent)", 2, 25.0),
+        ("60-79 (Good)", 1, 12.5),
+        ("40-59 (Fair)", 2, 25.0),
+        ("20-39 (Poor)", 1, 12.5),
+        ("0-19 (Very Poor)", 2, 25.0),
+    ]
+
+
+def test_distribution_leaves_out_empty_buckets():
+    buckets = StatisticsEngine.distribution(np.array([85.0, 90.0]))
+    
+    assert [bucket.range_label for bucket in buckets] == ["80-100 (Excellent)"]
+
+
+def test_group_stats_merges_collation_equal_keys():
+    keys = np.array(["North", "south", "NORTH", "South", "East"], dtype=object)
+    scores = np.array([80.0, 50.0, 60.0, 70.0, 10.0])
+    
+    groups = StatisticsEngine.group_stats(keys, scores)
+    
+    assert groups == [
+        {"key": "North", "count": 2, "avg_score": 70.0, "max_score": 80.0, "min_score": 60.0},
+        {"key": "south", "count": 2, "avg_score": 60.0, "max_score": 70.0, "min_score": 50.0},
+        {"key": "East", "count": 1, "avg_score": 10.0, "max_score": 10.0, "min_score": 10.0},
+    ]
+
+
+def test_group_stats_of_no_scores():
+    assert StatisticsEngine.group_stats(np.empty(0, dtype=object), np.empty(0)) == []
@@ -0,0 +1,143 @@
+"""Tests for the dependency-free vector tile encoder"""
+
+import struct
+
+import pytest
+
+from app.services.tile_service import TileService
+from app.services.vector_tile import PointFeature, VectorTileEncoder
+
+
+def read_varint(data, offset):
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, offset
+
+
+def read_fields(data):
+    """(field, value) pairs of a message; length-delimited values stay bytes"""
+    fields = []
+    offset = 0
+    while offset < len(data):
+        key, offset = read_varint(data, offset)
+        field, wire_type = key >> 3, key & 0x7
+        if wire_type == 0:
+            value, offset = read_varint(data, offset)
+        elif wire_type == 1:
+            value = struct.unpack("<d", data[offset:offset + 8])[0]
+            offset += 8
+        elif wire_type == 2:
+            length, offset = read_varint(data, offset)
+            value = data[offset:offset + length]
+            offset += length
+        else:
+            raise AssertionError(f"unexpected wire type {wire_type}")
+        fields.append((field, value))
+    return fields
+
+
+def read_packed(data):
+    values = []
+    offset = 0
+    while offset < len(data):
+        value, offset = read_varint(data, offset)
+        values.append(value)
+    return values
+
+
+def unzigzag(value):
+    return (value >> 1) ^ -(value & 1)
+
+
+def decode_value(data):
+    [(field, value)] = read_fields(data)
+    if field == 1:
+        return value.decode("utf-8")
+    if field == 6:
+        return unzigzag(value)
+    if field == 7:
+        return bool(value)
+    return value
+
+
+def decode_layer(data):
+    layer = {"features": [], "keys": [], "values": []}
+    for field, value in read_fields(data):
+        if field == 1:
+            layer["name"] = value.decode("utf-8")
+        elif field == 2:
+            layer["features"].append(dict(
+                (name, read_packed(raw) if name in (2, 4) else raw)
+                for name, raw in read_fields(value)
+            ))
+        elif field == 3:
+            layer["keys"].append(value.decode("utf-8"))
+        elif field == 4:
+            layer["values"].append(decode_value(value))
+        elif field == 5:
+            layer["extent"] = value
+        elif field == 15:
+            layer["version"] = value
+    return layer
+
+
+def feature_properties(layer, feature):
+    tags = feature.get(2, [])
+    return {
+        layer["keys"][tags[index]]: layer["values"][tags[index + 1]]
+        for index in range(0, len(tags), 2)
+    }
+
+
+def test_encoded_tile_decodes_to_the_features():
+    features = [
+        PointFeature(10, 4086, {"site_name": "Alpha", "score": 87.5, "rank": 1, "note": None}, 7),
+        PointFeature(-5, 300, {"site_name": "Beta", "score": 87.5, "offset": -3, "ok": True}, 8),
+    ]
+    
+    [(field, raw_layer)] = read_fields(VectorTileEncoder.encode([("sites", features)]))
+    layer = decode_layer(raw_layer)
+    
+    assert field == 3
+    assert (layer["name"], layer["version"], layer["extent"]) == ("sites", 2, 4096)
+    # Keys and values are shared between features
+    assert layer["keys"].count("score") == 1
+    assert layer["values"].count(87.5) == 1
+    
+    first, second = layer["features"]
+    assert (first[1], second[1]) == (7, 8)
+    assert feature_properties(layer, first) == {"site_name": "Alpha", "score": 87.5, "rank": 1}
+    assert feature_properties(layer, second) == {
+        "site_name": "Beta", "score": 87.5, "offset": -3, "ok": True
+    }
+    command, x, y = second[4]
+    assert (command, unzigzag(x), unzigzag(y)) == (9, -5, 300)
+
+
+def test_empty_layer_is_still_encoded():
+    [(_, raw_layer)] = read_fields(VectorTileEncoder.encode([("clusters", [])]))
+    
+    assert decode_layer(raw_layer)["features"] == []
+
+
+@pytest.mark.parametrize("value", [0, 1, 127, 128, 300, 2 ** 35])
+def test_varint_round_trip(value):
+    buffer = bytearray()
+    VectorTileEncoder._varint(buffer, value)
+    
+    assert read_varint(buffer, 0) == (value, len(buffer))
+
+
+def test_tile_bounds():
+    world = TileService.tile_bounds(0, 0, 0)
+    north_east = TileService.tile_bounds(1, 1, 0)
+    
+    assert world == pytest.approx((-180, -85.0511, 180, 85.0511), abs=1e-4)
+    assert north_east == pytest.approx((0, 0, 180, 85.0511), abs=1e-4)
+    with pytest.raises(ValueError):
+        TileService.tile_bounds(1, 2, 0)
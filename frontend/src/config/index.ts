@@ -9,8 +9,12 @@ export const DEFAULT_WEIGHTS = {
   infrastructure: 0.05,
 };
 
+export const ANALYSIS_POLL_INTERVAL_MS = 500;
+
 export const DEFAULT_MAP_CENTER: [number, number] = [78.9629, 20.5937]; // Center of India
 export const DEFAULT_MAP_ZOOM = 3.5;
+export const CLUSTER_MAX_ZOOM = 14; // Matches the backend: individual sites from this zoom on
+export const NEARBY_SITES_COUNT = 3; // Nearest sites listed in the site popup
 
 export const SCORE_COLORS = {
   excellent: '#10b981', // green-500
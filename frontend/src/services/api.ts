@@ -2,9 +2,13 @@ import axios, { AxiosInstance } from 'axios';
 import type {
   SiteListResponse,
   SiteDetail,
+  SiteBatchResponse,
+  NearestSitesResponse,
+  ClusterResponse,
   AnalysisRequest,
-  AnalysisResponse,
+  AnalysisJob,
   StatisticsResponse,
+  SiteFilterParams,
 } from '@/types';
 import { API_BASE_URL } from '@/config';
 
@@ -18,6 +22,8 @@ class ApiService {
       headers: {
         'Content-Type': 'application/json',
       },
+      // Repeat list parameters (region=A&region=B) the way FastAPI reads them
+      paramsSerializer: { indexes: null },
     });
 
     // Response interceptor for error handling
@@ -31,33 +37,61 @@ class ApiService {
   }
 
   // Get sites with optional filters
-  async getSites(params?: {
-    min_score?: number;
-    max_score?: number;
+  async getSites(params?: SiteFilterParams & {
     limit?: number;
     offset?: number;
+    cursor?: string;
+    include_total?: boolean;
   }): Promise<SiteListResponse> {
     const response = await this.client.get<SiteListResponse>('/api/sites', { params });
     return response.data;
   }
 
+  // Get map clusters (or individual sites at high zoom) for a viewport
+  async getSiteClusters(bbox: string, zoom: number): Promise<ClusterResponse> {
+    const response = await this.client.get<ClusterResponse>('/api/sites/clusters', {
+      params: { bbox, zoom },
+    });
+    return response.data;
+  }
+
   // Get site by ID
   async getSiteById(siteId: number): Promise<SiteDetail> {
     const response = await this.client.get<SiteDetail>(`/api/sites/${siteId}`);
     return response.data;
   }
 
-  // Analyze sites with custom weights
-  async analyzeSites(request: AnalysisRequest): Promise<AnalysisResponse> {
-    const response = await this.client.post<AnalysisResponse>('/api/analyze', request);
+  // Get the details of several sites in one request
+  async getSitesBatch(siteIds: number[]): Promise<SiteBatchResponse> {
+    const response = await this.client.post<SiteBatchResponse>('/api/sites/batch', {
+      site_ids: siteIds,
+    });
+    return response.data;
+  }
+
+  // Get the sites closest to a site
+  async getNearestSites(siteId: number, k: number = 5): Promise<NearestSitesResponse> {
+    const response = await this.client.get<NearestSitesResponse>(
+      `/api/sites/${siteId}/nearest`,
+      { params: { k } }
+    );
+    return response.data;
+  }
+
+  // Queue a recalculation with custom weights
+  async analyzeSites(request: AnalysisRequest): Promise<AnalysisJob> {
+    const response = await this.client.post<AnalysisJob>('/api/analyze', request);
+    return response.data;
+  }
+
+  // Get the status of a recalculation job
+  async getAnalysisJob(jobId: string): Promise<AnalysisJob> {
+    const response = await this.client.get<AnalysisJob>(`/api/analyze/jobs/${jobId}`);
     return response.data;
   }
 
   // Get statistics
-  async getStatistics(params?: {
-    min_score?: number;
-    max_score?: number;
-  }): Promise<StatisticsResponse> {
+  async getStatistics(params?: SiteFilterParams): Promise<StatisticsResponse> {
     const response = await this.client.get<StatisticsResponse>('/api/statistics', { params });
     return response.data;
   }
@@ -69,10 +103,7 @@ class ApiService {
   }
 
   // Export sites as CSV
-  async exportCSV(params?: {
-    min_score?: number;
-    max_score?: number;
-  }): Promise<void> {
+  async exportCSV(params?: SiteFilterParams): Promise<void> {
     const response = await this.client.get('/api/export', {
       params: { ...params, format: 'csv' },
       responseType: 'blob',
@@ -90,10 +121,7 @@ class ApiService {
   }
 
   // Export sites as JSON
-  async exportJSON(params?: {
-    min_score?: number;
-    max_score?: number;
-  }): Promise<void> {
+  async exportJSON(params?: SiteFilterParams): Promise<void> {
     const response = await this.client.get('/api/export', {
       params: { ...params, format: 'json' },
     });
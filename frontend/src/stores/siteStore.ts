@@ -3,20 +3,42 @@ import { ref, computed } from 'vue';
 import type {
   Site,
   SiteDetail,
+  NearbySite,
+  SiteCluster,
   AnalysisWeights,
   StatisticsResponse,
   MapFilters,
+  SiteFilterParams,
 } from '@/types';
 import apiService from '@/services/api';
-import { DEFAULT_WEIGHTS } from '@/config';
+import {
+  DEFAULT_WEIGHTS,
+  ANALYSIS_POLL_INTERVAL_MS,
+  NEARBY_SITES_COUNT,
+} from '@/config';
+
+interface SitesQuery extends SiteFilterParams {
+  limit?: number;
+  offset?: number;
+}
 
 export const useSiteStore = defineStore('site', () => {
   // State
   const sites = ref<Site[]>([]);
   const selectedSite = ref<Site | null>(null);
   const selectedSiteDetail = ref<SiteDetail | null>(null);
+  const nearbySites = ref<NearbySite[]>([]);
+  // Details fetched ahead of selection; cleared when scores change
+  const siteDetails = new Map<number, SiteDetail>();
   const statistics = ref<StatisticsResponse | null>(null);
   const loading = ref(false);
+  const loadingMore = ref(false);
+  const nextCursor = ref<string | null>(null);
+  const lastSitesParams = ref<SitesQuery>({});
+  const viewportSites = ref<Site[]>([]);
+  const mapClusters = ref<SiteCluster[]>([]);
+  const mapViewport = ref<{ bbox: string; zoom: number } | null>(null);
+  let viewportRequest = 0;
   const analyzing = ref(false);
   const error = ref<string | null>(null);
 
@@ -36,6 +58,14 @@ export const useSiteStore = defineStore('site', () => {
     });
   });
 
+  const filteredViewportSites = computed(() => {
+    return viewportSites.value.filter((site) => {
+      const score = site.total_suitability_score;
+      if (score === null) return false;
+      return score >= filters.value.minScore && score <= filters.value.maxScore;
+    });
+  });
+
   const sortedSites = computed(() => {
     return [...filteredSites.value].sort((a, b) => {
       const scoreA = a.total_suitability_score ?? 0;
@@ -49,18 +79,17 @@ export const useSiteStore = defineStore('site', () => {
     sites.value.filter(s => s.total_suitability_score !== null).length
   );
 
+  const hasMoreSites = computed(() => nextCursor.value !== null);
+
   // Actions
-  async function fetchSites(params?: {
-    min_score?: number;
-    max_score?: number;
-    limit?: number;
-    offset?: number;
-  }) {
+  async function fetchSites(params: SitesQuery = {}) {
     loading.value = true;
     error.value = null;
     try {
       const response = await apiService.getSites(params);
       sites.value = response.sites;
+      nextCursor.value = response.next_cursor;
+      lastSitesParams.value = { ...params };
       return response;
     } catch (err: any) {
       error.value = err.message || 'Failed to fetch sites';
@@ -70,11 +99,58 @@ export const useSiteStore = defineStore('site', () => {
     }
   }
 
+  // Append the next page of the last fetchSites query (keyset pagination)
+  async function fetchMoreSites() {
+    if (!nextCursor.value || loadingMore.value) return;
+    loadingMore.value = true;
+    error.value = null;
+    try {
+      const response = await apiService.getSites({
+        ...lastSitesParams.value,
+        cursor: nextCursor.value,
+        include_total: false,
+      });
+      sites.value = [...sites.value, ...response.sites];
+      nextCursor.value = response.next_cursor;
+      return response;
+    } catch (err: any) {
+      error.value = err.message || 'Failed to fetch more sites';
+      throw err;
+    } finally {
+      loadingMore.value = false;
+    }
+  }
+
+  // Clusters of the visible map area, or its sites at high zoom;
+  // bbox is min_lon,min_lat,max_lon,max_lat
+  async function fetchMapClusters(bbox: string, zoom: number) {
+    mapViewport.value = { bbox, zoom };
+    const request = ++viewportRequest;
+    try {
+      const response = await apiService.getSiteClusters(bbox, zoom);
+      // Ignore responses overtaken by a later map move
+      if (request === viewportRequest) {
+        mapClusters.value = response.clusters;
+        viewportSites.value = response.sites;
+      }
+      return response;
+    } catch (err: any) {
+      error.value = err.message || 'Failed to fetch map clusters';
+      throw err;
+    }
+  }
+
   async function fetchSiteDetail(siteId: number) {
+    const known = siteDetails.get(siteId);
+    if (known) {
+      selectedSiteDetail.value = known;
+      return known;
+    }
     loading.value = true;
     error.value = null;
     try {
       const detail = await apiService.getSiteById(siteId);
+      siteDetails.set(siteId, detail);
       selectedSiteDetail.value = detail;
       return detail;
     } catch (err: any) {
@@ -85,15 +161,54 @@ export const useSiteStore = defineStore('site', () => {
     }
   }
 
+  async function fetchNearbySites(siteId: number) {
+    try {
+      const response = await apiService.getNearestSites(siteId, NEARBY_SITES_COUNT);
+      // Keep only the answer for the site that is still selected
+      if (selectedSite.value?.site_id === siteId) {
+        nearbySites.value = response.sites;
+      }
+      // Nearby sites are likely next; fetch their details in one request
+      prefetchSiteDetails(response.sites.map((site) => site.site_id)).catch(() => {
+        // Details are fetched again on selection
+      });
+      return response;
+    } catch (err: any) {
+      error.value = err.message || 'Failed to fetch nearby sites';
+      throw err;
+    }
+  }
+
+  async function prefetchSiteDetails(siteIds: number[]) {
+    const missing = siteIds.filter((siteId) => !siteDetails.has(siteId));
+    if (missing.length === 0) return;
+    const response = await apiService.getSitesBatch(missing);
+    for (const detail of response.sites) {
+      siteDetails.set(detail.site_id, detail);
+    }
+  }
+
   async function analyzeSitesWithWeights(customWeights: AnalysisWeights) {
     analyzing.value = true;
     error.value = null;
     try {
-      const response = await apiService.analyzeSites({ weights: customWeights });
+      let job = await apiService.analyzeSites({ weights: customWeights });
+      // Poll until the background recalculation finishes
+      while (job.status === 'queued' || job.status === 'running') {
+        await new Promise((resolve) => setTimeout(resolve, ANALYSIS_POLL_INTERVAL_MS));
+        job = await apiService.getAnalysisJob(job.job_id);
+      }
+      if (job.status === 'failed') {
+        throw new Error(job.error || 'Analysis job failed');
+      }
       weights.value = { ...customWeights };
+      siteDetails.clear();
       // Refresh sites after analysis
-      await fetchSites();
-      return response;
+      await fetchSites(lastSitesParams.value);
+      if (mapViewport.value) {
+        await fetchMapClusters(mapViewport.value.bbox, mapViewport.value.zoom);
+      }
+      return job;
     } catch (err: any) {
       error.value = err.message || 'Failed to analyze sites';
       throw err;
@@ -102,10 +217,7 @@ export const useSiteStore = defineStore('site', () => {
     }
   }
 
-  async function fetchStatistics(params?: {
-    min_score?: number;
-    max_score?: number;
-  }) {
+  async function fetchStatistics(params?: SiteFilterParams) {
     loading.value = true;
     error.value = null;
     try {
@@ -122,8 +234,12 @@ export const useSiteStore = defineStore('site', () => {
 
   function selectSite(site: Site | null) {
     selectedSite.value = site;
+    nearbySites.value = [];
     if (site) {
       fetchSiteDetail(site.site_id);
+      fetchNearbySites(site.site_id).catch(() => {
+        // Error is surfaced through error
+      });
     } else {
       selectedSiteDetail.value = null;
     }
@@ -155,10 +271,14 @@ export const useSiteStore = defineStore('site', () => {
   return {
     // State
     sites,
+    viewportSites,
+    mapClusters,
     selectedSite,
     selectedSiteDetail,
+    nearbySites,
     statistics,
     loading,
+    loadingMore,
     analyzing,
     error,
     weights,
@@ -166,13 +286,19 @@ export const useSiteStore = defineStore('site', () => {
     
     // Computed
     filteredSites,
+    filteredViewportSites,
     sortedSites,
     totalSites,
     analyzedSites,
+    hasMoreSites,
     
     // Actions
     fetchSites,
+    fetchMoreSites,
+    fetchMapClusters,
     fetchSiteDetail,
+    fetchNearbySites,
+    prefetchSiteDetails,
     analyzeSitesWithWeights,
     fetchStatistics,
     selectSite,
@@ -6,10 +6,12 @@ export interface Site {
   region: string;
   land_type: string;
   total_suitability_score: number | null;
+  rank?: number | null;
   analysis_timestamp: string | null;
 }
 
 export interface SiteDetail extends Site {
+  ranked_sites?: number | null;
   area_sqm: number;
   solar_irradiance_kwh: number;
   grid_distance_km: number;
@@ -23,10 +25,60 @@ export interface SiteDetail extends Site {
   infrastructure_score: number | null;
 }
 
+export interface SiteBatchResponse {
+  sites: SiteDetail[];
+  missing: number[];
+}
+
+export interface NearbySite extends Site {
+  distance_km: number;
+}
+
+export interface NearestSitesResponse {
+  site_id: number;
+  k: number;
+  sites: NearbySite[];
+}
+
+export interface SiteCluster {
+  latitude: number;
+  longitude: number;
+  site_count: number;
+  scored_count: number;
+  avg_score: number | null;
+  max_score: number | null;
+}
+
+export interface ClusterResponse {
+  zoom: number;
+  bbox: number[];
+  clusters: SiteCluster[];
+  sites: Site[];
+  truncated: boolean;
+}
+
+// Site filters accepted by /api/sites, /api/statistics and /api/export
+export interface SiteFilterParams {
+  min_score?: number;
+  max_score?: number;
+  min_area?: number;
+  max_area?: number;
+  min_slope?: number;
+  max_slope?: number;
+  min_irradiance?: number;
+  max_irradiance?: number;
+  region?: string[];
+  land_type?: string[];
+  bbox?: string;
+  near?: string;
+  radius_km?: number;
+}
+
 export interface SiteListResponse {
-  total: number;
+  total: number | null;
   limit: number;
   offset: number;
+  next_cursor: string | null;
   sites: Site[];
 }
 
@@ -42,12 +94,20 @@ export interface AnalysisRequest {
   weights: AnalysisWeights;
 }
 
-export interface AnalysisResponse {
-  success: boolean;
-  message: string;
-  sites_analyzed: number;
-  weights_used: AnalysisWeights;
-  timestamp: string;
+export interface AnalysisJob {
+  job_id: string;
+  status: 'queued' | 'running' | 'completed' | 'failed';
+  weights: AnalysisWeights;
+  stage: string | null;
+  progress: number;
+  created_at: string;
+  started_at: string | null;
+  completed_at: string | null;
+  duration_seconds: number | null;
+  sites_analyzed: number | null;
+  components_refreshed: number | null;
+  run_id: number | null;
+  error: string | null;
 }
 
 export interface ScoreDistribution {